@@ -0,0 +1,236 @@
+import threading
+import weakref
+
+import numpy as np
+import pandas as pd
+
+# Materialized aggregate cube for the KPI metrics and demographic group-bys.
+#
+# The cube holds one row per (Region, Gender, Age, Day) cell with the row
+# count plus, for every metric, the non-null count n, the mean and M2 (the
+# sum of squared deviations from the mean). Cells are merged with Chan et
+# al.'s parallel update, so variances never come from differencing large
+# sums of squares. Means, standard deviations and group counts for any filter
+# are derived from those cells, so the dashboard views never scan raw rows.
+#
+# The day cells are merged once more into (Region, Gender, Age, Year) cells,
+# which answer every query whose date filter covers the whole dataset; date
+# ranges and the daily export use the day cells. append() merges new rows
+# into the day cells without rebuilding from the full frame.
+
+KEYS = ['Region', 'Gender', 'Age', 'Year']
+DAY_KEYS = ['Region', 'Gender', 'Age', 'Day']
+METRICS = ['Depression_Score', 'Anxiety_Score', 'Stress_Level', 'Social_Media_Usage', 'Physical_Activity', 'Sleep_Duration']
+
+
+def _cells(frame, metrics, keys):
+    # Aggregates raw rows into cells: count and per-metric n, mean, M2
+    dates = pd.to_datetime(frame['Date'])
+    columns = {
+        'Region': frame['Region'].astype(str).to_numpy(),
+        'Gender': frame['Gender'].astype(str).to_numpy(),
+        'Age': frame['Age'].to_numpy(),
+        'Year': dates.dt.year.to_numpy(),
+        'Day': dates.dt.normalize().to_numpy(),
+    }
+    data = pd.DataFrame({key: columns[key] for key in keys})
+    for metric in metrics:
+        data[metric] = frame[metric].to_numpy(dtype=np.float64)
+    grouped = data.groupby(keys, sort=False)
+    cells = grouped.size().rename('count').to_frame()
+    if metrics:
+        n = grouped[metrics].count()
+        mean = grouped[metrics].mean()
+        # groupby var uses Welford's update, so M2 = n * var(ddof=0) is stable
+        m2 = grouped[metrics].var(ddof=0).fillna(0.0) * n
+        for metric in metrics:
+            cells[f'{metric}_n'] = n[metric].astype(np.int64)
+            cells[f'{metric}_mean'] = mean[metric]
+            cells[f'{metric}_m2'] = m2[metric]
+    return _categorical(cells.reset_index())
+
+
+def _moments(cells, ids, size, metrics):
+    # Per-group sums over cells labelled 0..size-1 by ids: count and, per
+    # metric, n, mean and M2 with
+    #     M2 = sum(M2_i) + sum(n_i * (mean_i - mean)^2)
+    # `cells` maps column names to arrays (a DataFrame or dict)
+    sums = lambda weights: np.bincount(ids, weights=weights, minlength=size)
+    result = {'count': sums(np.asarray(cells['count'], dtype=np.float64)).astype(np.int64)}
+    for metric in metrics:
+        n = np.asarray(cells[f'{metric}_n'], dtype=np.float64)
+        mean = np.nan_to_num(np.asarray(cells[f'{metric}_mean'], dtype=np.float64))
+        m2 = np.nan_to_num(np.asarray(cells[f'{metric}_m2'], dtype=np.float64))
+        total_n = sums(n)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            total_mean = np.where(total_n > 0, sums(n * mean) / total_n, np.nan)
+        spread = np.where(n > 0, n * (mean - np.nan_to_num(total_mean)[ids]) ** 2, 0.0)
+        result[f'{metric}_n'] = total_n.astype(np.int64)
+        result[f'{metric}_mean'] = total_mean
+        result[f'{metric}_m2'] = np.where(total_n > 0, sums(m2 + spread), np.nan)
+    return result
+
+
+def combine(cells, by, metrics):
+    # Merges cells into one row per group of `by` (a single row when empty);
+    # missing keys form their own group
+    by = [by] if isinstance(by, str) else list(by)
+    if by:
+        grouped = cells.groupby(by, sort=True, observed=True, dropna=False)
+        ids = grouped.ngroup().to_numpy()
+        index = grouped.size().index
+    else:
+        ids = np.zeros(len(cells), dtype=np.int64)
+        index = pd.RangeIndex(1)
+    return pd.DataFrame(_moments(cells, ids, len(index), metrics), index=index)
+
+
+def std(n, m2):
+    # Sample standard deviation from n and M2; NaN below two values
+    n = np.asarray(n, dtype=np.float64)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return np.where(n > 1, np.sqrt(np.maximum(np.asarray(m2, dtype=np.float64) / (n - 1), 0.0)), np.nan)
+
+
+class AggregateCube:
+    def __init__(self, frame, metrics=None):
+        self.metrics = [m for m in (metrics or METRICS) if m in frame.columns]
+        self.rows = len(frame)
+        self._lock = threading.Lock()
+        self._set_days(_cells(frame, self.metrics, DAY_KEYS))
+
+    def _set_days(self, days):
+        days = days.assign(Year=pd.DatetimeIndex(days['Day']).year)
+        table = _categorical(combine(days, KEYS, self.metrics).reset_index())
+        span = (days['Day'].min(), days['Day'].max()) if len(days) else None
+        # One assignment, so readers never see day and year cells that differ
+        self._layers = {'Day': (days, _arrays(days)), 'Year': (table, _arrays(table)), 'span': span}
+
+    @property
+    def table(self):
+        return self._layers['Year'][0]
+
+    @property
+    def days(self):
+        return self._layers['Day'][0]
+
+    def append(self, frame):
+        # Merges the cells of new rows into the cube. Cells for a (Region,
+        # Gender, Age, Day) already present are combined with the same
+        # parallel update as any group-by.
+        new = _cells(frame, self.metrics, DAY_KEYS)
+        with self._lock:
+            merged = pd.concat([self.days.drop(columns='Year'), new], ignore_index=True)
+            for key in ('Region', 'Gender'):
+                merged[key] = merged[key].astype(str)
+            self._set_days(_categorical(combine(merged, DAY_KEYS, self.metrics).reset_index()))
+            self.rows += len(frame)
+        return self
+
+    def _layer(self, date_range, days):
+        # Year cells cover every day of the data; narrower ranges need day cells
+        span = self._layers['span']
+        covered = (date_range is None or span is None or
+                   (pd.Timestamp(date_range[0]) <= span[0] and pd.Timestamp(date_range[1]) >= span[1]))
+        return self._layers['Day' if days or not covered else 'Year']
+
+    def _mask(self, arrays, regions=None, genders=None, age_range=None, date_range=None):
+        mask = np.ones(len(arrays['count']), dtype=bool)
+        if regions is not None:
+            mask &= np.isin(arrays['Region'], list(regions))
+        if genders is not None:
+            mask &= np.isin(arrays['Gender'], list(genders))
+        if age_range is not None:
+            mask &= (arrays['Age'] >= age_range[0]) & (arrays['Age'] <= age_range[1])
+        if date_range is not None and 'Day' in arrays:
+            days = arrays['Day']
+            mask &= ((days >= np.datetime64(pd.Timestamp(date_range[0]).normalize())) &
+                     (days <= np.datetime64(pd.Timestamp(date_range[1]).normalize())))
+        return mask
+
+    def slice(self, regions=None, genders=None, age_range=None, date_range=None, days=False):
+        # Returns the cells matching the dashboard filters: day cells with
+        # days=True or a date_range narrower than the data, else year cells
+        table, arrays = self._layer(date_range, days)
+        return table[self._mask(arrays, regions, genders, age_range, date_range)]
+
+    def total(self, **filters):
+        return int(self.slice(**filters)['count'].sum())
+
+    def kpis(self, **filters):
+        # Mean and sample standard deviation of every metric for the filter;
+        # filters plain arrays rather than the DataFrame
+        _, arrays = self._layer(filters.get('date_range'), False)
+        mask = self._mask(arrays, **filters)
+        cells = {column: values[mask] for column, values in arrays.items()}
+        merged = _moments(cells, np.zeros(len(cells['count']), dtype=np.int64), 1, self.metrics)
+        result = {'count': int(merged['count'][0])}
+        for metric in self.metrics:
+            n = merged[f'{metric}_n'][0]
+            result[metric] = {'mean': merged[f'{metric}_mean'][0] if n else np.nan,
+                              'std': float(std(n, merged[f'{metric}_m2'][0]))}
+        return result
+
+    def stats(self, by, **filters):
+        # Count, mean and sample standard deviation of every metric per group
+        by = [by] if isinstance(by, str) else list(by)
+        merged = combine(self.slice(days='Day' in by, **filters), by, self.metrics)
+        columns = {'count': merged['count']}
+        for metric in self.metrics:
+            columns[f'{metric}_mean'] = merged[f'{metric}_mean']
+            columns[f'{metric}_std'] = std(merged[f'{metric}_n'], merged[f'{metric}_m2'])
+        result = pd.DataFrame(columns, index=merged.index)
+        return _plain_keys(result[result['count'] > 0].reset_index())
+
+    def counts(self, by, **filters):
+        # Row counts per group, e.g. the sunburst's (Age, Region, Gender)
+        by = [by] if isinstance(by, str) else list(by)
+        cells = self.slice(days='Day' in by, **filters)
+        return _plain_keys(cells.groupby(by, observed=True)['count'].sum().reset_index(name='Counts'))
+
+    def means(self, by, metric, **filters):
+        # Per-group metric means, e.g. the choropleth's Region averages
+        by = [by] if isinstance(by, str) else list(by)
+        merged = combine(self.slice(days='Day' in by, **filters), by, [metric])
+        merged = merged[merged[f'{metric}_n'] > 0]
+        return _plain_keys(merged[f'{metric}_mean'].rename(metric).reset_index())
+
+
+def _categorical(cells):
+    for key in ('Region', 'Gender'):
+        if key in cells:
+            cells[key] = cells[key].astype('category')
+    return cells
+
+
+def _arrays(cells):
+    # Plain arrays of the cells for the KPI fast path
+    arrays = {column: cells[column].to_numpy() for column in cells.columns}
+    for key in ('Region', 'Gender'):
+        arrays[key] = arrays[key].astype(str).astype(object)
+    return arrays
+
+
+def _plain_keys(frame):
+    # Plotly's hierarchical charts cannot aggregate unordered categoricals
+    for column in frame.columns:
+        if isinstance(frame[column].dtype, pd.CategoricalDtype):
+            frame[column] = frame[column].astype(str)
+    return frame
+
+
+_cubes = {}
+_lock = threading.Lock()
+
+
+def cube_for(frame, **kwargs):
+    # Returns the AggregateCube for a frame, building it on first use. Like
+    # filter_index.index_for, entries are dropped with the frame.
+    key = id(frame)
+    with _lock:
+        cube = _cubes.get(key)
+        if cube is None:
+            cube = AggregateCube(frame, **kwargs)
+            _cubes[key] = cube
+            weakref.finalize(frame, _cubes.pop, key, None)
+        return cube
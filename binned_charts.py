@@ -0,0 +1,221 @@
+import numpy as np
+import pandas as pd
+import plotly.express as px
+import plotly.graph_objects as go
+from plotly.subplots import make_subplots
+
+# Pre-binned replacements for raw-point Plotly figures.
+#
+# Histograms are binned with NumPy on the server and only the bin counts are
+# serialized. Above DENSITY_THRESHOLD rows the scatter matrix and the trellis
+# plot switch to 2D-binned densities, and the trellis trendline is fitted
+# from sufficient statistics (n, sums, sums of squares and products) rather
+# than a statsmodels OLS over every point. With a color column, the scatter
+# matrix draws one density per color group as binned markers sized by count,
+# so the groups stay distinguishable where they overlap.
+
+DENSITY_THRESHOLD = 5000
+DENSITY_BINS = 40
+GROUP_DENSITY_BINS = 20
+MARKER_MAX_SIZE = 14
+
+GENDER_COLORS = {'Male': '#636EFA', 'Female': '#EF553B'}
+
+
+def bin_edges(values, nbins):
+    values = values[~np.isnan(values)]
+    if len(values) == 0:
+        return np.linspace(0, 1, nbins + 1)
+    lo, hi = values.min(), values.max()
+    if lo == hi:
+        lo, hi = lo - 0.5, hi + 0.5
+    return np.linspace(lo, hi, nbins + 1)
+
+
+def histogram_counts(frame, x, nbins, color=None, edges=None):
+    # Returns one row per (color group, bin) with the bin bounds and count.
+    # All groups share the same edges so overlaid bars line up.
+    values = frame[x].to_numpy(dtype=np.float64)
+    if edges is None:
+        edges = bin_edges(values, nbins)
+    nbins = len(edges) - 1
+    bins = np.clip(np.searchsorted(edges, values, side='right') - 1, 0, nbins - 1)
+    valid = ~np.isnan(values)
+
+    if color is None:
+        groups = [(None, valid)]
+    else:
+        labels = pd.Categorical(frame[color])
+        groups = [(category, valid & (labels.codes == code)) for code, category in enumerate(labels.categories)]
+
+    parts = []
+    for label, mask in groups:
+        part = pd.DataFrame({
+            'bin_start': edges[:-1],
+            'bin_end': edges[1:],
+            'count': np.bincount(bins[mask], minlength=nbins),
+        })
+        if color is not None:
+            part[color] = label
+        parts.append(part)
+    counts = pd.concat(parts, ignore_index=True)
+    counts[x] = (counts['bin_start'] + counts['bin_end']) / 2
+    return counts
+
+
+def histogram(frame, x, nbins, color=None, title=None, opacity=None, color_discrete_map=None):
+    # Bar chart of server-side bin counts, laid out like px.histogram(barmode='overlay')
+    counts = histogram_counts(frame, x, nbins, color=color)
+    width = counts['bin_end'] - counts['bin_start']
+    fig = px.bar(
+        counts, x=x, y='count', color=color, title=title, opacity=opacity,
+        color_discrete_map=color_discrete_map, barmode='overlay',
+        hover_data={'bin_start': True, 'bin_end': True},
+    )
+    fig.update_traces(width=width.iloc[0] if len(width) else None)
+    fig.update_layout(bargap=0, yaxis_title='count')
+    return fig
+
+
+def sufficient_stats(x, y):
+    # Moments needed for a simple least-squares fit, ignoring NaN pairs
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    valid = ~(np.isnan(x) | np.isnan(y))
+    x, y = x[valid], y[valid]
+    return {
+        'n': len(x), 'sx': x.sum(), 'sy': y.sum(),
+        'sxx': (x * x).sum(), 'sxy': (x * y).sum(),
+        'min': x.min() if len(x) else np.nan, 'max': x.max() if len(x) else np.nan,
+    }
+
+
+def facet_stats(frame, x, y, facet):
+    # sufficient_stats per facet value, for the trellis trendlines
+    facets = [f for f in pd.Categorical(frame[facet]).categories if (frame[facet] == f).any()]
+    x_values = frame[x].to_numpy(dtype=np.float64)
+    y_values = frame[y].to_numpy(dtype=np.float64)
+    result = {}
+    for value in facets:
+        mask = (frame[facet] == value).to_numpy()
+        result[value] = sufficient_stats(x_values[mask], y_values[mask])
+    return result
+
+
+def ols_from_stats(stats):
+    # Returns (slope, intercept) of y ~ x, or None if the fit is undefined
+    n = stats['n']
+    denom = n * stats['sxx'] - stats['sx'] ** 2
+    if n < 2 or denom == 0:
+        return None
+    slope = (n * stats['sxy'] - stats['sx'] * stats['sy']) / denom
+    intercept = (stats['sy'] - slope * stats['sx']) / n
+    return slope, intercept
+
+
+def _density_heatmap(x, y, x_edges, y_edges, showscale=False):
+    counts, _, _ = np.histogram2d(x, y, bins=[x_edges, y_edges])
+    counts = np.where(counts > 0, counts, np.nan)
+    return go.Heatmap(
+        x=(x_edges[:-1] + x_edges[1:]) / 2, y=(y_edges[:-1] + y_edges[1:]) / 2, z=counts.T,
+        colorscale='Viridis', showscale=showscale, hovertemplate='x=%{x}<br>y=%{y}<br>count=%{z}<extra></extra>',
+    )
+
+
+def _binned_counts(x, y, x_edges, y_edges):
+    # Non-empty bins as (x centers, y centers, counts)
+    counts, _, _ = np.histogram2d(x, y, bins=[x_edges, y_edges])
+    ix, iy = np.nonzero(counts)
+    return (x_edges[ix] + x_edges[ix + 1]) / 2, (y_edges[iy] + y_edges[iy + 1]) / 2, counts[ix, iy]
+
+
+def _density_markers(binned, name, color, sizeref, showlegend):
+    x, y, counts = binned
+    return go.Scattergl(
+        x=x, y=y, mode='markers', name=str(name), legendgroup=str(name), showlegend=showlegend,
+        marker={'size': counts, 'sizemode': 'area', 'sizeref': sizeref, 'sizemin': 1, 'color': color, 'opacity': 0.6},
+        customdata=counts, hovertemplate=f'{name}<br>x=%{{x}}<br>y=%{{y}}<br>count=%{{customdata}}<extra></extra>',
+    )
+
+
+def scatter_matrix(frame, dimensions, color=None, title=None, color_discrete_map=None, threshold=DENSITY_THRESHOLD):
+    # px.scatter_matrix for small frames; above the threshold a grid of 2D
+    # density heatmaps, or one binned density per color group
+    if len(frame) <= threshold:
+        return px.scatter_matrix(frame, dimensions=dimensions, color=color, title=title, color_discrete_map=color_discrete_map)
+    size = len(dimensions)
+    fig = make_subplots(rows=size, cols=size, shared_xaxes=True, shared_yaxes=True,
+                        horizontal_spacing=0.01, vertical_spacing=0.01)
+    values = {d: frame[d].to_numpy(dtype=np.float64) for d in dimensions}
+    if color is None:
+        groups = None
+        edges = {d: bin_edges(values[d], DENSITY_BINS) for d in dimensions}
+    else:
+        labels = pd.Categorical(frame[color])
+        groups = [(category, labels.codes == code) for code, category in enumerate(labels.categories)
+                  if (labels.codes == code).any()]
+        edges = {d: bin_edges(values[d], GROUP_DENSITY_BINS) for d in dimensions}
+        palette = px.colors.qualitative.Plotly
+        colors = {label: (color_discrete_map or {}).get(label, palette[i % len(palette)])
+                  for i, (label, _) in enumerate(groups)}
+        # Bin every cell first so marker areas share one scale
+        binned = {}
+        for y_dim in dimensions:
+            for x_dim in dimensions:
+                valid = ~(np.isnan(values[x_dim]) | np.isnan(values[y_dim]))
+                for label, mask in groups:
+                    keep = valid & mask
+                    binned[x_dim, y_dim, label] = _binned_counts(values[x_dim][keep], values[y_dim][keep], edges[x_dim], edges[y_dim])
+        largest = max((counts.max() for _, _, counts in binned.values() if len(counts)), default=1)
+        sizeref = 2.0 * largest / MARKER_MAX_SIZE ** 2
+    for row, y_dim in enumerate(dimensions, start=1):
+        for col, x_dim in enumerate(dimensions, start=1):
+            if groups is None:
+                valid = ~(np.isnan(values[x_dim]) | np.isnan(values[y_dim]))
+                fig.add_trace(_density_heatmap(values[x_dim][valid], values[y_dim][valid], edges[x_dim], edges[y_dim]), row=row, col=col)
+            else:
+                for label, _ in groups:
+                    fig.add_trace(_density_markers(binned[x_dim, y_dim, label], label, colors[label], sizeref,
+                                                   showlegend=row == 1 and col == 1), row=row, col=col)
+            if row == size:
+                fig.update_xaxes(title_text=x_dim, row=row, col=col)
+            if col == 1:
+                fig.update_yaxes(title_text=y_dim, row=row, col=col)
+    fig.update_layout(title_text=title, height=150 * size, legend_title_text=color)
+    return fig
+
+
+def trellis(frame, x, y, facet, title=None, color_discrete_map=None, threshold=DENSITY_THRESHOLD, stats=None):
+    # One panel per facet value: raw points below the threshold, a density
+    # heatmap above it, and in both cases an OLS line from sufficient stats.
+    # `stats` is facet_stats(frame, x, y, facet) when the caller cached it.
+    facets = [f for f in pd.Categorical(frame[facet]).categories if (frame[facet] == f).any()]
+    if stats is None:
+        stats = facet_stats(frame, x, y, facet)
+    fig = make_subplots(rows=1, cols=max(len(facets), 1), shared_yaxes=True,
+                        subplot_titles=[f'{facet}={f}' for f in facets])
+    x_values = frame[x].to_numpy(dtype=np.float64)
+    y_values = frame[y].to_numpy(dtype=np.float64)
+    x_edges, y_edges = bin_edges(x_values, DENSITY_BINS), bin_edges(y_values, DENSITY_BINS)
+    colors = color_discrete_map or {}
+    for col, value in enumerate(facets, start=1):
+        mask = (frame[facet] == value).to_numpy()
+        fx, fy = x_values[mask], y_values[mask]
+        color = colors.get(value)
+        if len(frame) <= threshold:
+            fig.add_trace(go.Scattergl(x=fx, y=fy, mode='markers', name=str(value), marker={'color': color}), row=1, col=col)
+        else:
+            valid = ~(np.isnan(fx) | np.isnan(fy))
+            fig.add_trace(_density_heatmap(fx[valid], fy[valid], x_edges, y_edges), row=1, col=col)
+        fit = ols_from_stats(stats[value])
+        if fit is not None:
+            slope, intercept = fit
+            line_x = np.array([stats[value]['min'], stats[value]['max']])
+            fig.add_trace(go.Scatter(
+                x=line_x, y=slope * line_x + intercept, mode='lines', name=f'{value} OLS',
+                line={'color': color}, hovertemplate=f'y = {slope:.3f}x + {intercept:.3f}<extra></extra>',
+            ), row=1, col=col)
+        fig.update_xaxes(title_text=x, row=1, col=col)
+    fig.update_yaxes(title_text=y, row=1, col=1)
+    fig.update_layout(title_text=title)
+    return fig
@@ -0,0 +1,276 @@
+import abc
+import asyncio
+import importlib
+import os
+import queue
+import re
+import threading
+
+import conversation_store
+
+# Asynchronous chatbot service with streaming replies.
+#
+# Replies are produced by a ChatBackend: an object whose async stream()
+# yields pieces of text for a list of {'role', 'content'} messages. The
+# 'local' backend is a rule-based stand-in (sentiment-chosen canned replies,
+# no network) used by default and in tests; 'openai' and 'groq' stream from
+# hosted models through their async clients. Further backends are added with
+# register_backend().
+#
+# ChatService runs one asyncio event loop in a daemon thread per process and
+# is shared by all sessions. At most MH_CHAT_MAX_IN_FLIGHT replies are
+# generated at once; up to MH_CHAT_MAX_QUEUED more wait for a slot, and
+# anything beyond that is refused with ChatBusy instead of piling up. Both
+# sides of a turn are stored in conversation_store, and a backend sees only
+# the last MH_CHAT_CONTEXT messages.
+#
+# Streamlit script threads call submit(), which returns a ChatStream whose
+# tokens() generator yields pieces as they arrive; async callers can iterate
+# respond() directly on the service loop.
+
+BACKEND = os.environ.get('MH_CHAT_BACKEND', 'local')
+MODEL = os.environ.get('MH_CHAT_MODEL') or None
+MAX_IN_FLIGHT = int(os.environ.get('MH_CHAT_MAX_IN_FLIGHT', 8))
+MAX_QUEUED = int(os.environ.get('MH_CHAT_MAX_QUEUED', 32))
+CONTEXT_MESSAGES = int(os.environ.get('MH_CHAT_CONTEXT', 12))
+TOKEN_TIMEOUT = float(os.environ.get('MH_CHAT_TOKEN_TIMEOUT', 60))
+
+SYSTEM_PROMPT = (
+    "You are Menti, a supportive mental health assistant for young people in Rwanda. "
+    "Answer briefly and kindly, do not diagnose, and encourage reaching out to a professional "
+    "or the hotlines listed in the dashboard when someone is struggling."
+)
+
+
+class ChatBusy(Exception):
+    pass
+
+
+class ChatBackend(abc.ABC):
+    name = 'base'
+
+    @abc.abstractmethod
+    def stream(self, messages):
+        # Async generator of text pieces replying to the last message;
+        # implementations are `async def` methods that yield
+        ...
+
+
+class LocalBackend(ChatBackend):
+    # Stand-in model: the sentiment-based canned reply, streamed word by word
+    name = 'local'
+
+    def __init__(self, token_delay=0.0):
+        self.token_delay = token_delay
+
+    async def stream(self, messages):
+        from engine.sentiment import chat_reply
+
+        # TextBlob scoring is CPU work; keep it off the event loop
+        reply = await asyncio.to_thread(chat_reply, messages[-1]['content'])
+        for token in re.findall(r'\S+\s*', reply.response):
+            if self.token_delay:
+                await asyncio.sleep(self.token_delay)
+            yield token
+
+
+class OpenAIBackend(ChatBackend):
+    # Chat completions streamed from the OpenAI API (OPENAI_API_KEY)
+    name = 'openai'
+    module = 'openai'
+    client_class = 'AsyncOpenAI'
+    default_model = 'gpt-4o-mini'
+
+    def __init__(self, model=None, **client_kwargs):
+        self.model = model or self.default_model
+        self.client_kwargs = client_kwargs
+        self._client = None
+
+    def client(self):
+        if self._client is None:
+            self._client = getattr(importlib.import_module(self.module), self.client_class)(**self.client_kwargs)
+        return self._client
+
+    async def stream(self, messages):
+        response = await self.client().chat.completions.create(
+            model=self.model,
+            messages=[{'role': 'system', 'content': SYSTEM_PROMPT}] + list(messages),
+            stream=True,
+        )
+        async for chunk in response:
+            delta = chunk.choices[0].delta.content if chunk.choices else None
+            if delta:
+                yield delta
+
+
+class GroqBackend(OpenAIBackend):
+    # Same streaming API through the Groq client (GROQ_API_KEY)
+    name = 'groq'
+    module = 'groq'
+    client_class = 'AsyncGroq'
+    default_model = 'llama-3.1-8b-instant'
+
+
+BACKENDS = {'local': LocalBackend, 'openai': OpenAIBackend, 'groq': GroqBackend}
+
+
+def register_backend(name, factory):
+    BACKENDS[name] = factory
+
+
+def create_backend(name=None, **kwargs):
+    name = name or BACKEND
+    if name not in BACKENDS:
+        raise ValueError(f"unknown chat backend {name!r}; expected one of {sorted(BACKENDS)}")
+    if name != 'local' and MODEL and 'model' not in kwargs:
+        kwargs['model'] = MODEL
+    return BACKENDS[name](**kwargs)
+
+
+_END = object()
+
+
+class ChatStream:
+    # Handle for one reply, read from a (non-async) script thread
+    def __init__(self, conversation):
+        self.conversation = conversation
+        self.text = ''
+        self.future = None
+        self.released = False
+        self._queue = queue.Queue()
+
+    def _put(self, item):
+        self._queue.put(item)
+
+    def tokens(self, timeout=TOKEN_TIMEOUT):
+        # Yields text pieces until the reply is complete; re-raises backend
+        # errors and raises queue.Empty if the backend stalls past timeout
+        while True:
+            item = self._queue.get(timeout=timeout)
+            if item is _END:
+                return
+            if isinstance(item, BaseException):
+                raise item
+            self.text += item
+            yield item
+
+    def cancel(self):
+        if self.future is not None:
+            self.future.cancel()
+
+
+class ChatService:
+    def __init__(self, backend=None, max_in_flight=MAX_IN_FLIGHT, max_queued=MAX_QUEUED,
+                 context_messages=CONTEXT_MESSAGES, store_path=None):
+        self.backend = backend or create_backend()
+        self.max_in_flight = max_in_flight
+        self.max_queued = max_queued
+        self.context_messages = context_messages
+        self.store_path = store_path
+        self._lock = threading.Lock()
+        self._pending = 0
+        self._counters = {'completed': 0, 'failed': 0, 'cancelled': 0, 'rejected': 0}
+        self._loop = asyncio.new_event_loop()
+        self._slots = asyncio.Semaphore(max_in_flight)
+        self._thread = threading.Thread(target=self._loop.run_forever, name='chat-service', daemon=True)
+        self._thread.start()
+
+    def _admit(self):
+        with self._lock:
+            if self._pending >= self.max_in_flight + self.max_queued:
+                self._counters['rejected'] += 1
+                raise ChatBusy(f"{self._pending} chat replies pending")
+            self._pending += 1
+
+    def _release(self, outcome, stream=None):
+        # Exactly once per admitted reply, however it ends
+        with self._lock:
+            if stream is not None:
+                if stream.released:
+                    return
+                stream.released = True
+            self._pending -= 1
+            self._counters[outcome] += 1
+
+    async def _generate(self, conversation, text):
+        # Stores the user's message, streams the reply under a concurrency
+        # slot and stores the reply once complete
+        await asyncio.to_thread(conversation_store.add_message, conversation, 'user', text, path=self.store_path)
+        messages = await asyncio.to_thread(conversation_store.context, conversation, self.context_messages,
+                                           path=self.store_path)
+        reply = []
+        async with self._slots:
+            async for token in self.backend.stream(messages):
+                reply.append(token)
+                yield token
+        await asyncio.to_thread(conversation_store.add_message, conversation, 'assistant', ''.join(reply).strip(),
+                                path=self.store_path)
+
+    async def _admitted(self, conversation, text, stream=None):
+        outcome = 'failed'
+        try:
+            async for token in self._generate(conversation, text):
+                yield token
+            outcome = 'completed'
+        except asyncio.CancelledError:
+            outcome = 'cancelled'
+            raise
+        finally:
+            self._release(outcome, stream)
+
+    async def respond(self, conversation, text):
+        # Async generator of reply pieces; must run on this service's loop.
+        # Raises ChatBusy when the service is at capacity
+        self._admit()
+        async for token in self._admitted(conversation, text):
+            yield token
+
+    async def _pump(self, conversation, text, stream):
+        try:
+            async for token in self._admitted(conversation, text, stream):
+                stream._put(token)
+        except Exception as exc:
+            stream._put(exc)
+        finally:
+            stream._put(_END)
+
+    def submit(self, conversation, text):
+        # Starts a reply from any thread; raises ChatBusy when the service is
+        # at capacity
+        self._admit()
+        stream = ChatStream(conversation)
+        stream.future = asyncio.run_coroutine_threadsafe(self._pump(conversation, text, stream), self._loop)
+        stream.future.add_done_callback(lambda future: self._cancelled(future, stream))
+        return stream
+
+    def _cancelled(self, future, stream):
+        # A reply cancelled before its first step never reaches _admitted
+        if future.cancelled():
+            self._release('cancelled', stream)
+            stream._put(_END)
+
+    def stats(self):
+        with self._lock:
+            return {'pending': self._pending, 'max_in_flight': self.max_in_flight, 'max_queued': self.max_queued,
+                    'backend': self.backend.name, **self._counters}
+
+    def close(self):
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join(timeout=5)
+
+
+_service = None
+_service_lock = threading.Lock()
+
+
+def get_service():
+    # The process-wide service, created on first use
+    global _service
+    with _service_lock:
+        if _service is None:
+            _service = ChatService()
+        return _service
+
+
+def service_stats():
+    return _service.stats() if _service is not None else None
@@ -0,0 +1,292 @@
+import argparse
+import collections
+import concurrent.futures
+import glob
+import os
+import re
+import shutil
+
+import numpy as np
+import pandas as pd
+
+import aggregate_cube
+import data_store
+
+# Out-of-core ingestion for large survey extracts (full DHS, youth survey).
+#
+# The input CSV is split into byte ranges on line boundaries, one per worker
+# process. Each worker streams its range in bounded-memory chunks,
+# normalizes the schema (Sex -> Gender, District -> Region, "Western
+# Province" -> "Western"), writes every chunk as columnar parts partitioned
+# by Region, and accumulates the dashboard aggregates in the same pass. Rows
+# without a Region go to the MISSING_PARTITION partition rather than being
+# dropped. The aggregates are per-group count, n, mean and M2, merged chunk
+# by chunk and across workers with the aggregate cube's parallel update, so
+# peak memory depends on the chunk size and worker count, not on the input
+# size, and variances stay accurate for large values.
+#
+# Column dtypes are inferred once from the first SAMPLE_ROWS rows and applied
+# to every range, so all parts of a dataset agree: numeric columns are read
+# as float64 (values that fail to parse become NaN and are counted per
+# column in the _aggregates meta), everything else as strings. Category
+# counts keep at most MAX_CATEGORY_VALUES distinct values per column; later
+# values are counted under OTHER, so free-text columns cannot grow them
+# without bound.
+#
+# The output is for offline analysis of extracts too large for the
+# dashboard; the app itself still loads its datasets through data_store.
+#
+#     python chunked_ingest.py dhs_data.csv --name dhs --workers 4
+#
+# Output layout under --out (default <store>/partitioned/<name>):
+#     Region=<region>/part-<range>-<chunk>/   columnar parts (data_store format)
+#     _aggregates/                             count, n/mean/M2 per numeric column
+#     _category_counts/                        value counts per categorical column
+
+DEFAULT_CHUNKSIZE = 100_000
+SAMPLE_ROWS = 10_000
+NA_VALUES = ['', 'NA', 'N/A', 'n/a', 'NaN', 'null', 'NULL', 'None', '.', '-']
+MAX_CATEGORY_VALUES = 1_000
+OTHER = '(other)'
+DEFAULT_OUT_DIR = os.path.join(data_store.STORE_DIR, 'partitioned')
+
+COLUMN_RENAMES = {'Sex': 'Gender', 'District': 'Region'}
+REGION_VALUES = {'Kigali City': 'Kigali', 'City of Kigali': 'Kigali'}
+GROUP_KEYS = ['Region', 'Gender', 'Age']
+PARTITION_KEY = 'Region'
+MISSING_PARTITION = '__missing__'
+
+
+def normalize_schema(frame):
+    frame = frame.rename(columns=COLUMN_RENAMES)
+    if 'Region' in frame.columns:
+        regions = frame['Region'].astype(str).str.strip().str.replace(r'\s+Province$', '', regex=True)
+        frame['Region'] = regions.replace(REGION_VALUES).where(frame['Region'].notna())
+    if 'Gender' in frame.columns:
+        frame['Gender'] = frame['Gender'].astype(str).str.strip().str.capitalize()
+    return frame
+
+
+def infer_dtypes(path, sample_rows=SAMPLE_ROWS):
+    # {column: 'float64' | 'str'} from the first rows of the file. Integer
+    # columns become float64 too, since a later chunk may have gaps.
+    sample = pd.read_csv(path, nrows=sample_rows, na_values=NA_VALUES)
+    return {
+        column: 'float64' if pd.api.types.is_numeric_dtype(dtype) and not pd.api.types.is_bool_dtype(dtype) else 'str'
+        for column, dtype in sample.dtypes.items()
+    }
+
+
+def apply_dtypes(frame, dtypes):
+    # Casts a chunk to the inferred dtypes. Returns the frame and the number
+    # of values per numeric column that could not be parsed.
+    coerced = {}
+    for column, dtype in dtypes.items():
+        if dtype != 'float64' or frame[column].dtype == np.float64:
+            continue
+        values = pd.to_numeric(frame[column], errors='coerce')
+        failed = int((values.isna() & frame[column].notna()).sum())
+        if failed:
+            coerced[column] = failed
+        frame[column] = values.astype(np.float64)
+    return frame, coerced
+
+
+class _RangeReader:
+    # File-like view of [start, end) of a file for pd.read_csv
+    def __init__(self, path, start, end):
+        self._file = open(path, 'rb')
+        self._file.seek(start)
+        self._remaining = end - start
+
+    def read(self, size=-1):
+        if self._remaining <= 0:
+            return b''
+        if size is None or size < 0 or size > self._remaining:
+            size = self._remaining
+        data = self._file.read(size)
+        self._remaining -= len(data)
+        return data
+
+    def close(self):
+        self._file.close()
+
+
+def byte_ranges(path, parts):
+    # Splits the data section of a CSV into `parts` ranges ending on newlines
+    size = os.path.getsize(path)
+    with open(path, 'rb') as f:
+        header = f.readline()
+        start = len(header)
+        bounds = [start]
+        for i in range(1, parts):
+            f.seek(max(start + (size - start) * i // parts, bounds[-1]))
+            f.readline()
+            position = min(f.tell(), size)
+            if position > bounds[-1]:
+                bounds.append(position)
+        bounds.append(size)
+    columns = pd.read_csv(path, nrows=0).columns.tolist()
+    return columns, [(a, b) for a, b in zip(bounds, bounds[1:]) if b > a]
+
+
+class Aggregates:
+    # Running group-by state merged chunk by chunk
+    def __init__(self):
+        self.groups = None
+        self.categories = collections.Counter()
+        self.coerced = collections.Counter()
+        self._values = collections.defaultdict(set)   # column -> distinct values kept
+
+    def update(self, frame):
+        # Per-group count and, per numeric column, n, mean and M2 as in
+        # aggregate_cube._cells; missing keys form their own groups
+        keys = [k for k in GROUP_KEYS if k in frame.columns]
+        numeric = [c for c in frame.select_dtypes(include='number').columns if c not in keys]
+        grouped = frame[keys + numeric].groupby(keys, sort=False, dropna=False)
+        cells = grouped.size().rename('count').to_frame()
+        if numeric:
+            n = grouped[numeric].count()
+            mean = grouped[numeric].mean()
+            m2 = grouped[numeric].var(ddof=0).fillna(0.0) * n
+            for column in numeric:
+                cells[f'{column}_n'] = n[column].astype(np.int64)
+                cells[f'{column}_mean'] = mean[column]
+                cells[f'{column}_m2'] = m2[column]
+        self.merge_groups(cells)
+
+        categorical = [c for c in frame.columns if c not in keys and c not in numeric]
+        region = frame['Region'] if 'Region' in frame.columns else pd.Series('All', index=frame.index)
+        for column in categorical:
+            counts = pd.DataFrame({'Region': region, 'value': frame[column]}).value_counts(dropna=False)
+            for (reg, value), count in counts.items():
+                self._count_category(reg, column, value, int(count))
+
+    def _count_category(self, region, column, value, count):
+        seen = self._values[column]
+        if value not in seen:
+            if len(seen) >= MAX_CATEGORY_VALUES:
+                value = OTHER
+            else:
+                seen.add(value)
+        self.categories[(region, column, value)] += count
+
+    def merge_groups(self, grouped):
+        if self.groups is None:
+            self.groups = grouped
+            return
+        cells = pd.concat([self.groups, grouped])
+        keys = list(cells.index.names)
+        metrics = [column[:-2] for column in cells.columns if column.endswith('_n')]
+        self.groups = aggregate_cube.combine(cells.reset_index(), keys, metrics)
+
+    def merge(self, other):
+        if other.groups is not None:
+            self.merge_groups(other.groups)
+        for (region, column, value), count in other.categories.items():
+            self._count_category(region, column, value, count)
+        self.coerced.update(other.coerced)
+
+    def group_frame(self):
+        if self.groups is None:
+            return pd.DataFrame()
+        return self.groups.reset_index()
+
+    def category_frame(self):
+        rows = [(r, c, str(v), n) for (r, c, v), n in self.categories.items()]
+        return pd.DataFrame(rows, columns=['Region', 'Column', 'Value', 'Count'])
+
+
+def _safe(value):
+    return re.sub(r'[^A-Za-z0-9_.-]+', '_', str(value))
+
+
+def _ingest_range(path, columns, dtypes, start, end, range_id, out_dir, chunksize):
+    aggregates = Aggregates()
+    reader = _RangeReader(path, start, end)
+    rows = 0
+    strings = {column: dtype for column, dtype in dtypes.items() if dtype == 'str'}
+    try:
+        chunks = pd.read_csv(reader, names=columns, header=None, chunksize=chunksize, dtype=strings,
+                             na_values=NA_VALUES)
+        for chunk_id, chunk in enumerate(chunks):
+            chunk, coerced = apply_dtypes(chunk, dtypes)
+            aggregates.coerced.update(coerced)
+            chunk = normalize_schema(chunk)
+            aggregates.update(chunk)
+            rows += len(chunk)
+            if PARTITION_KEY in chunk.columns:
+                partitions = chunk.groupby(PARTITION_KEY, sort=False, dropna=False)
+            else:
+                partitions = [('All', chunk)]
+            for value, part in partitions:
+                if pd.isna(value):
+                    value = MISSING_PARTITION
+                target = os.path.join(out_dir, f'{PARTITION_KEY}={_safe(value)}', f'part-{range_id:04d}-{chunk_id:06d}')
+                data_store.write_frame(part.reset_index(drop=True), target)
+    finally:
+        reader.close()
+    return rows, aggregates
+
+
+def ingest(path, name=None, out_dir=None, chunksize=DEFAULT_CHUNKSIZE, workers=None):
+    # Ingests `path` into partitioned columnar parts and returns the merged
+    # Aggregates. Existing output for the dataset is replaced.
+    name = name or os.path.splitext(os.path.basename(path))[0]
+    out_dir = os.path.join(out_dir or DEFAULT_OUT_DIR, name)
+    workers = workers or os.cpu_count() or 1
+    if os.path.exists(out_dir):
+        shutil.rmtree(out_dir)
+    os.makedirs(out_dir)
+
+    columns, ranges = byte_ranges(path, workers)
+    dtypes = infer_dtypes(path)
+    total = Aggregates()
+    rows = 0
+    if workers == 1 or len(ranges) == 1:
+        results = [_ingest_range(path, columns, dtypes, a, b, i, out_dir, chunksize) for i, (a, b) in enumerate(ranges)]
+    else:
+        with concurrent.futures.ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = [pool.submit(_ingest_range, path, columns, dtypes, a, b, i, out_dir, chunksize) for i, (a, b) in enumerate(ranges)]
+            results = [future.result() for future in futures]
+    for part_rows, aggregates in results:
+        rows += part_rows
+        total.merge(aggregates)
+
+    data_store.write_frame(total.group_frame(), os.path.join(out_dir, '_aggregates'),
+                           {'rows': rows, 'coerced': dict(total.coerced)})
+    data_store.write_frame(total.category_frame(), os.path.join(out_dir, '_category_counts'))
+    return total
+
+
+def partitions(name, out_dir=None):
+    base = os.path.join(out_dir or DEFAULT_OUT_DIR, name)
+    return sorted(p.split('=', 1)[1] for p in map(os.path.basename, glob.glob(os.path.join(base, f'{PARTITION_KEY}=*'))))
+
+
+def open_partition(name, value, out_dir=None, columns=None):
+    # Concatenates the memory-mapped parts of one partition
+    base = os.path.join(out_dir or DEFAULT_OUT_DIR, name, f'{PARTITION_KEY}={_safe(value)}')
+    parts = [data_store.open_frame(p, columns) for p in sorted(glob.glob(os.path.join(base, 'part-*')))]
+    return pd.concat(parts, ignore_index=True) if parts else pd.DataFrame()
+
+
+def open_aggregates(name, out_dir=None):
+    base = os.path.join(out_dir or DEFAULT_OUT_DIR, name)
+    return data_store.open_frame(os.path.join(base, '_aggregates')), data_store.open_frame(os.path.join(base, '_category_counts'))
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Chunked, partitioned CSV ingestion')
+    parser.add_argument('path')
+    parser.add_argument('--name')
+    parser.add_argument('--out', default=DEFAULT_OUT_DIR)
+    parser.add_argument('--chunksize', type=int, default=DEFAULT_CHUNKSIZE)
+    parser.add_argument('--workers', type=int)
+    args = parser.parse_args()
+
+    result = ingest(args.path, args.name, args.out, args.chunksize, args.workers)
+    groups = result.group_frame()
+    print(f"Ingested {int(groups['count'].sum()) if len(groups) else 0} rows into {os.path.join(args.out, args.name or os.path.splitext(os.path.basename(args.path))[0])}")
+    for column, count in sorted(result.coerced.items()):
+        print(f"  {column}: {count} unparseable values stored as missing")
@@ -0,0 +1,322 @@
+import collections
+import re
+import threading
+import weakref
+
+import numpy as np
+import pandas as pd
+
+# Cohorts across the youth survey, the DHS extract and the youth health
+# indicators.
+#
+# The three datasets describe different respondents, so they are aligned on
+# harmonized keys instead of on people:
+#
+#     age_band   13-14, 15-20, 21-25, 26-30, 31-35 (from Age or Age Group)
+#     province   Kigali, Northern, Southern, Eastern, Western (Region, District)
+#     gender     Female, Male (Gender, Sex)
+#     education  None, Primary, Secondary, Tertiary (Education_Level, Education Level)
+#
+# Each dataset is converted once per frame into a Harmonized table: int8
+# codes for the keys it has (-1 where a value does not map), category codes
+# for its own attributes, and float measures (Yes/No columns become 0/1
+# rates). Every label is mapped once per category, never per row.
+#
+# A cohort is a set of conditions {column: allowed values} on keys or
+# attributes. Membership is a boolean lookup table gathered over the code
+# arrays. Group-by packs the key codes of each row into one mixed-radix code
+# and aggregates with np.bincount; masks and packed codes are cached per
+# table. Groups from different datasets are joined on the packed code
+# through a direct-address hash table (the packed key space is small and
+# dense).
+
+AGE_BANDS = (('13-14', 13, 14), ('15-20', 15, 20), ('21-25', 21, 25), ('26-30', 26, 30), ('31-35', 31, 35))
+KEYS = {
+    'age_band': tuple(band for band, _, _ in AGE_BANDS),
+    'province': ('Kigali', 'Northern', 'Southern', 'Eastern', 'Western'),
+    'gender': ('Female', 'Male'),
+    'education': ('None', 'Primary', 'Secondary', 'Tertiary'),
+}
+ALIASES = {
+    'province': {'kigali city': 'Kigali', 'city of kigali': 'Kigali'},
+    'education': {
+        'no formal education': 'None', 'no education': 'None', 'university': 'Tertiary', 'post-secondary': 'Tertiary',
+    },
+}
+MISSING = 'Not recorded'
+MASK_CACHE_SIZE = 64
+
+# Harmonized key -> source column, measures and attributes per dataset
+SCHEMAS = {
+    'rwanda_youth': {
+        'keys': {'age_band': 'Age', 'province': 'Region', 'gender': 'Gender', 'education': 'Education_Level'},
+        'measures': ['Depression_Score', 'Anxiety_Score', 'Life_Satisfaction', 'Access_to_Healthcare'],
+        'attributes': ['Employment_Status', 'Mental_Health_Status', 'Substance_Use', 'Social_Support'],
+    },
+    'dhs': {
+        'keys': {'age_band': 'Age', 'province': 'District', 'gender': 'Sex'},
+        'measures': ['Mental Health Indicator', 'Access to Mental Health Services'],
+        'attributes': ['School Attendance', 'Severity of Issue', 'Parental Education Level', 'Economic Quintile'],
+    },
+    'youth_health': {
+        'keys': {'age_band': 'Age Group', 'education': 'Education Level'},
+        'measures': ['Mental Health Issue', 'HIV/AIDS', 'Tobacco Use', 'Alcohol Use', 'Access to Mental Health Services',
+                     'Access to SRH Education', 'Physical Activity', 'Overweight/Obesity'],
+        'attributes': ['Coping Mechanism'],
+    },
+}
+
+_RANGE = re.compile(r'^\s*(\d+)\s*[-–]\s*(\d+)\s*$')
+
+
+def key_code(key, label):
+    # Harmonized code of one source label, or -1
+    text = str(label).strip()
+    if key == 'age_band':
+        match = _RANGE.match(text)
+        if match is not None:
+            low, high = int(match.group(1)), int(match.group(2))
+        elif text.isdigit():
+            low = high = int(text)
+        else:
+            return -1
+        for code, (_, band_low, band_high) in enumerate(AGE_BANDS):
+            if band_low <= low and high <= band_high:
+                return code
+        return -1
+    text = ALIASES.get(key, {}).get(text.lower(), text)
+    if key == 'province' and text.lower().endswith(' province'):
+        text = text[:-len(' province')]
+    for code, level in enumerate(KEYS[key]):
+        if level.lower() == text.lower():
+            return code
+    return -1
+
+
+def age_band_codes(ages):
+    ages = np.asarray(ages, dtype=np.float64)
+    lows = np.array([low for _, low, _ in AGE_BANDS], dtype=np.float64)
+    highs = np.array([high for _, _, high in AGE_BANDS], dtype=np.float64)
+    codes = np.searchsorted(lows, ages, side='right') - 1
+    valid = (codes >= 0) & (ages <= highs[np.clip(codes, 0, None)])
+    return np.where(valid, codes, -1).astype(np.int8)
+
+
+def _categorical(series):
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        return series.cat.codes.to_numpy(), [str(c) for c in series.cat.categories]
+    values = pd.Categorical(series)
+    return values.codes, [str(c) for c in values.categories]
+
+
+def _key_codes(series, key):
+    if key == 'age_band' and pd.api.types.is_numeric_dtype(series):
+        return age_band_codes(series.to_numpy())
+    codes, labels = _categorical(series)
+    # The trailing -1 entry maps missing values (code -1) to -1
+    lookup = np.array([key_code(key, label) for label in labels] + [-1], dtype=np.int8)
+    return lookup[codes]
+
+
+def _measure(series):
+    if pd.api.types.is_numeric_dtype(series):
+        return series.to_numpy(dtype=np.float64)
+    codes, labels = _categorical(series)
+    if not set(labels) <= {'Yes', 'No'}:
+        raise TypeError(f"measure {series.name!r} is neither numeric nor Yes/No")
+    lookup = np.array([1.0 if label == 'Yes' else 0.0 for label in labels] + [np.nan])
+    return lookup[codes]
+
+
+class Harmonized:
+    def __init__(self, frame, schema):
+        self.rows = len(frame)
+        self.codes = {}
+        self.levels = {}
+        for key, column in schema['keys'].items():
+            if column in frame.columns:
+                self.codes[key] = _key_codes(frame[column], key)
+                self.levels[key] = KEYS[key]
+        for column in schema.get('attributes', ()):
+            if column in frame.columns:
+                codes, labels = _categorical(frame[column])
+                if (codes < 0).any():
+                    codes = np.where(codes < 0, len(labels), codes)
+                    labels = labels + [MISSING]
+                self.codes[column] = codes
+                self.levels[column] = tuple(labels)
+        self.measures = {column: _measure(frame[column]) for column in schema.get('measures', ()) if column in frame.columns}
+        # Bincount weights: NaN filled with 0, plus a validity weight only
+        # for measures that have gaps
+        self._weights = {}
+        self._valid = {}
+        for measure, values in self.measures.items():
+            valid = ~np.isnan(values)
+            if valid.all():
+                self._weights[measure] = values
+            else:
+                self._weights[measure] = np.where(valid, values, 0.0)
+                self._valid[measure] = valid.astype(np.float64)
+        self._masks = collections.OrderedDict()
+        self._packed = collections.OrderedDict()
+        self._lock = threading.Lock()
+
+    def mask(self, conditions):
+        # Boolean row mask for {column: allowed values}, or None when a
+        # condition names a column this dataset does not have
+        conditions = tuple(sorted((column, tuple(sorted(values))) for column, values in dict(conditions).items() if values))
+        with self._lock:
+            if conditions in self._masks:
+                self._masks.move_to_end(conditions)
+                return self._masks[conditions]
+        if any(column not in self.codes for column, _ in conditions):
+            return None
+        mask = np.ones(self.rows, dtype=bool)
+        for column, values in conditions:
+            levels = self.levels[column]
+            allowed = np.zeros(len(levels) + 1, dtype=bool)   # last slot: code -1
+            allowed[[levels.index(v) for v in values if v in levels]] = True
+            mask &= allowed[self.codes[column]]
+        with self._lock:
+            self._masks[conditions] = mask
+            while len(self._masks) > MASK_CACHE_SIZE:
+                self._masks.popitem(last=False)
+        return mask
+
+    def pack(self, by):
+        # Mixed-radix code per row over the `by` columns and the size of the
+        # packed key space; rows with a missing key get code `size`, an
+        # overflow bin that is never reported. Cached per grouping.
+        by = tuple(by)
+        with self._lock:
+            if by in self._packed:
+                self._packed.move_to_end(by)
+                return self._packed[by]
+        packed = np.zeros(self.rows, dtype=np.int64)
+        valid = np.ones(self.rows, dtype=bool)
+        size = 1
+        for column in by:
+            codes = self.codes[column]
+            valid &= codes >= 0
+            packed = packed * len(self.levels[column]) + codes
+            size *= len(self.levels[column])
+        result = (np.where(valid, packed, size), size)
+        with self._lock:
+            self._packed[by] = result
+            while len(self._packed) > MASK_CACHE_SIZE:
+                self._packed.popitem(last=False)
+        return result
+
+    def group_by(self, by, mask=None, measures=None):
+        # Non-empty groups as (packed codes, {'rows', '<measure>_n',
+        # '<measure>_sum'}: arrays aligned with the codes). Rows outside the
+        # mask go to the overflow bin, so every measure is one bincount
+        # pass over the full column with no gather.
+        packed, size = self.pack(by)
+        groups = packed if mask is None else np.where(mask, packed, size)
+        rows = np.bincount(groups, minlength=size + 1)[:size]
+        codes = np.flatnonzero(rows)
+        stats = {'rows': rows[codes]}
+        for measure in (self.measures if measures is None else measures):
+            total = np.bincount(groups, weights=self._weights[measure], minlength=size + 1)[:size]
+            valid = self._valid.get(measure)
+            n = rows if valid is None else np.bincount(groups, weights=valid, minlength=size + 1)[:size]
+            stats[f'{measure}_n'] = n[codes]
+            stats[f'{measure}_sum'] = total[codes]
+        return codes, stats
+
+
+def probe(keys, build_keys, size):
+    # Hash join on packed codes: the position of each key in build_keys
+    # (unique), or -1. The table is direct-addressed by the packed code.
+    slots = np.full(size, -1, dtype=np.int64)
+    slots[build_keys] = np.arange(len(build_keys))
+    return slots[keys]
+
+
+def unpack(codes, by, levels):
+    # Label columns for packed codes
+    columns = {}
+    codes = np.asarray(codes, dtype=np.int64)
+    for column in reversed(by):
+        radix = len(levels[column])
+        columns[column] = np.asarray(levels[column], dtype=object)[codes % radix]
+        codes = codes // radix
+    return {column: columns[column] for column in by}
+
+
+def compare(tables, cohorts, by, measures=None, how='outer'):
+    # One row per (cohort, group) with each dataset's row count and measure
+    # means side by side. tables: {dataset: Harmonized}; cohorts: {name:
+    # conditions}; measures: {dataset: [measures]} (default: all). Returns
+    # (DataFrame, [(cohort, dataset, reason)]) for datasets left out.
+    by = list(by)
+    skipped = []
+    participants = {}
+    levels = None
+    for name, table in tables.items():
+        missing = [column for column in by if column not in table.levels]
+        if missing:
+            skipped.append((None, name, f"no {', '.join(missing)}"))
+        elif levels is not None and any(table.levels[c] != levels[c] for c in by):
+            skipped.append((None, name, f"levels of {', '.join(by)} differ"))
+        else:
+            levels = levels or {column: table.levels[column] for column in by}
+            participants[name] = table
+    size = int(np.prod([len(levels[c]) for c in by])) if levels else 1
+
+    frames = []
+    for cohort, conditions in cohorts.items():
+        groups = {}
+        for name, table in participants.items():
+            mask = table.mask(conditions)
+            if mask is None:
+                skipped.append((cohort, name, "cohort uses columns this dataset does not have"))
+                continue
+            groups[name] = table.group_by(by, mask, None if measures is None else measures.get(name, []))
+        if not groups:
+            continue
+        key_sets = [codes for codes, _ in groups.values()]
+        if how == 'inner':
+            keys = key_sets[0]
+            for codes in key_sets[1:]:
+                keys = keys[probe(keys, codes, size) >= 0]
+        else:
+            keys = np.unique(np.concatenate(key_sets))
+        frame = pd.DataFrame({'Cohort': cohort, **unpack(keys, by, levels)})
+        for name, (codes, stats) in groups.items():
+            positions = probe(keys, codes, size)
+            found = positions >= 0
+            rows = np.where(found, stats['rows'][positions], 0)
+            frame[f'{name}: rows'] = rows
+            for column in stats:
+                if column.endswith('_sum'):
+                    measure = column[:-len('_sum')]
+                    n = np.where(found, stats[f'{measure}_n'][positions], 0.0)
+                    total = np.where(found, stats[column][positions], 0.0)
+                    with np.errstate(invalid='ignore', divide='ignore'):
+                        frame[f'{name}: {measure}'] = np.where(n > 0, total / n, np.nan)
+        frames.append(frame)
+    result = pd.concat(frames, ignore_index=True) if frames else pd.DataFrame(columns=['Cohort'] + by)
+    for column in result.columns:
+        if column.endswith(': rows'):
+            # Missing where the dataset was left out for that cohort
+            result[column] = result[column].astype('Int64')
+    return result, skipped
+
+
+_tables = {}
+_lock = threading.Lock()
+
+
+def harmonized_for(frame, schema):
+    # Returns the Harmonized table for a frame, building it on first use;
+    # entries are dropped with the frame, like aggregate_cube.cube_for
+    key = id(frame)
+    with _lock:
+        table = _tables.get(key)
+        if table is None:
+            table = Harmonized(frame, SCHEMAS[schema] if isinstance(schema, str) else schema)
+            _tables[key] = table
+            weakref.finalize(frame, _tables.pop, key, None)
+        return table
@@ -0,0 +1,113 @@
+import datetime
+import json
+import os
+import sqlite3
+import threading
+
+# Saved cohort definitions.
+#
+# A definition is a name plus conditions {column: [allowed values]} on the
+# harmonized keys or dataset attributes of cohort_engine. Definitions live
+# in SQLite (WAL mode, one connection per thread, as in forum_store) so
+# every session and worker process sees the same list. Each thread caches
+# the list with its connection until a save or delete on that connection,
+# or a commit on any other (PRAGMA data_version), changes it.
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+DB_PATH = os.environ.get('MH_COHORT_DB', os.path.join(BASE_DIR, 'cohorts.db'))
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS cohorts (
+    name TEXT PRIMARY KEY,
+    conditions TEXT NOT NULL,
+    updated TEXT NOT NULL
+);
+"""
+
+# Stored on first use of an empty database
+DEFAULTS = {
+    'Everyone': {},
+    'Young women (15-20)': {'age_band': ['15-20'], 'gender': ['Female']},
+    'Young men (15-20)': {'age_band': ['15-20'], 'gender': ['Male']},
+    'Kigali': {'province': ['Kigali']},
+}
+
+_local = threading.local()
+_init_lock = threading.Lock()
+_initialized = set()
+
+
+def _connect(path):
+    conn = sqlite3.connect(path, timeout=30)
+    conn.row_factory = sqlite3.Row
+    conn.execute('PRAGMA journal_mode=WAL')
+    conn.execute('PRAGMA synchronous=NORMAL')
+    conn.execute('PRAGMA busy_timeout=30000')
+    with _init_lock:
+        if path not in _initialized:
+            conn.executescript(SCHEMA)
+            if conn.execute('SELECT COUNT(*) FROM cohorts').fetchone()[0] == 0:
+                with conn:
+                    for name, conditions in DEFAULTS.items():
+                        _write(conn, name, conditions)
+            _initialized.add(path)
+    return conn
+
+
+def connection(path=None):
+    path = path or DB_PATH
+    connections = getattr(_local, 'connections', None)
+    if connections is None:
+        connections = _local.connections = {}
+    if path not in connections:
+        connections[path] = _connect(path)
+    return connections[path]
+
+
+def _write(conn, name, conditions):
+    conditions = {column: sorted(values) for column, values in sorted(conditions.items()) if values}
+    conn.execute(
+        'INSERT OR REPLACE INTO cohorts (name, conditions, updated) VALUES (?, ?, ?)',
+        (name, json.dumps(conditions), datetime.datetime.now().isoformat(timespec='seconds')),
+    )
+
+
+def _cache():
+    cache = getattr(_local, 'cache', None)
+    if cache is None:
+        cache = _local.cache = {}   # path -> (data_version, definitions)
+    return cache
+
+
+def definitions(path=None):
+    # {name: {column: [values]}} sorted by name
+    path = path or DB_PATH
+    conn = connection(path)
+    version = conn.execute('PRAGMA data_version').fetchone()[0]
+    cached = _cache().get(path)
+    if cached is not None and cached[0] == version:
+        return cached[1]
+    rows = conn.execute('SELECT name, conditions FROM cohorts ORDER BY name').fetchall()
+    result = {row['name']: json.loads(row['conditions']) for row in rows}
+    _cache()[path] = (version, result)
+    return result
+
+
+def save(name, conditions, path=None):
+    name = name.strip()
+    if not name:
+        raise ValueError("cohort name is empty")
+    path = path or DB_PATH
+    conn = connection(path)
+    with conn:
+        _write(conn, name, conditions)
+    # data_version only changes for commits on other connections
+    _cache().pop(path, None)
+
+
+def delete(name, path=None):
+    path = path or DB_PATH
+    conn = connection(path)
+    with conn:
+        conn.execute('DELETE FROM cohorts WHERE name = ?', (name,))
+    _cache().pop(path, None)
@@ -0,0 +1,104 @@
+import datetime
+import os
+import sqlite3
+import threading
+import uuid
+
+# Persistent chatbot conversations.
+#
+# Messages live in SQLite (WAL mode, one connection per thread, as in
+# forum_store) rather than in Streamlit session state, so history survives
+# reconnects and its size never slows a rerun. Messages
+# are indexed by (conversation, id): the page reads a window of the latest
+# messages with a keyset cursor, and the chat service reads only the last
+# few turns as model context.
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+DB_PATH = os.environ.get('MH_CHAT_DB', os.path.join(BASE_DIR, 'chat.db'))
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS messages (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    conversation TEXT NOT NULL,
+    role TEXT NOT NULL,
+    content TEXT NOT NULL,
+    timestamp TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS messages_conversation ON messages (conversation, id);
+"""
+
+_local = threading.local()
+_init_lock = threading.Lock()
+_initialized = set()
+
+
+def _connect(path):
+    conn = sqlite3.connect(path, timeout=30)
+    conn.row_factory = sqlite3.Row
+    conn.execute('PRAGMA journal_mode=WAL')
+    conn.execute('PRAGMA synchronous=NORMAL')
+    conn.execute('PRAGMA busy_timeout=30000')
+    with _init_lock:
+        if path not in _initialized:
+            conn.executescript(SCHEMA)
+            _initialized.add(path)
+    return conn
+
+
+def connection(path=None):
+    path = path or DB_PATH
+    connections = getattr(_local, 'connections', None)
+    if connections is None:
+        connections = _local.connections = {}
+    if path not in connections:
+        connections[path] = _connect(path)
+    return connections[path]
+
+
+def new_conversation_id():
+    return uuid.uuid4().hex
+
+
+def _message(row):
+    return {'id': row['id'], 'role': row['role'], 'content': row['content'], 'timestamp': row['timestamp']}
+
+
+def add_message(conversation, role, content, timestamp=None, path=None):
+    timestamp = timestamp or datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    conn = connection(path)
+    with conn:
+        cursor = conn.execute(
+            'INSERT INTO messages (conversation, role, content, timestamp) VALUES (?, ?, ?, ?)',
+            (conversation, role, content, timestamp),
+        )
+    return {'id': cursor.lastrowid, 'role': role, 'content': content, 'timestamp': timestamp}
+
+
+def window(conversation, limit=20, before=None, path=None):
+    # Returns (messages oldest first, cursor for the next older window or
+    # None). The cursor is the id of the oldest message in this window.
+    conn = connection(path)
+    rows = conn.execute(
+        'SELECT * FROM messages WHERE conversation = ? AND id < ? ORDER BY id DESC LIMIT ?',
+        (conversation, before if before is not None else 2 ** 63 - 1, limit + 1),
+    ).fetchall()
+    messages = [_message(row) for row in reversed(rows[:limit])]
+    return messages, (messages[0]['id'] if len(rows) > limit else None)
+
+
+def context(conversation, limit, path=None):
+    # The last `limit` messages as {'role', 'content'} dicts for a model
+    messages, _ = window(conversation, limit, path=path)
+    return [{'role': m['role'], 'content': m['content']} for m in messages]
+
+
+def iter_messages(conversation, role=None, path=None):
+    # Streams a conversation oldest first, optionally one role only
+    conn = connection(path)
+    query = 'SELECT * FROM messages WHERE conversation = ?' + (' AND role = ?' if role else '') + ' ORDER BY id'
+    for row in conn.execute(query, (conversation, role) if role else (conversation,)):
+        yield _message(row)
+
+
+def count_messages(conversation, path=None):
+    return connection(path).execute('SELECT COUNT(*) FROM messages WHERE conversation = ?', (conversation,)).fetchone()[0]
@@ -0,0 +1,223 @@
+import os
+import tempfile
+import zlib
+
+import aggregate_cube
+import filter_index
+from lazy_imports import lazy_import
+
+# Streaming export of filtered survey rows and aggregate views.
+#
+# export() returns an iterator of encoded bytes. Filtered rows are read
+# from the bitmap index's row positions CHUNK_ROWS at a time, so only one
+# chunk is ever copied out of the memory-mapped frame, and each chunk is
+# encoded and yielded before the next is taken:
+#
+#     csv      one header, then chunk after chunk; optional streaming gzip
+#     parquet  one row group per chunk (snappy, zstd, gzip or none)
+#     arrow    Arrow IPC stream, one record batch per chunk (lz4, zstd or none)
+#
+# Aggregate views (counts, means and standard deviations per group) come
+# from the aggregate cube and are a single small chunk.
+#
+# Downloads are bounded by encoded size: max_rows() measures the encoded
+# bytes per row on a sample and lowers MH_EXPORT_MAX_ROWS so an export fits
+# in MH_EXPORT_MAX_BYTES (default 256 MiB). spool() writes the chunks to an
+# anonymous temporary file as they are encoded, so a download that must be
+# handed over whole (st.download_button) is held once rather than as a list
+# of chunks plus their join.
+
+CHUNK_ROWS = int(os.environ.get('MH_EXPORT_CHUNK_ROWS', 100_000))
+MAX_ROWS = int(os.environ.get('MH_EXPORT_MAX_ROWS', 1_000_000))
+MAX_BYTES = int(os.environ.get('MH_EXPORT_MAX_BYTES', 256 << 20))
+SAMPLE_ROWS = 1_000
+SIZE_MARGIN = 0.9   # rows vary in width; leave headroom below max_bytes
+
+FORMATS = {
+    'csv': ('text/csv', '.csv'),
+    'parquet': ('application/vnd.apache.parquet', '.parquet'),
+    'arrow': ('application/vnd.apache.arrow.stream', '.arrows'),
+}
+COMPRESSION = {
+    'csv': ('none', 'gzip'),
+    'parquet': ('snappy', 'zstd', 'gzip', 'none'),
+    'arrow': ('none', 'lz4', 'zstd'),
+}
+VIEWS = {
+    'rows': None,
+    'region_gender': ['Region', 'Gender'],
+    'age': ['Age'],
+    'daily': ['Day'],
+}
+
+pa = lazy_import('pyarrow')
+pq = lazy_import('pyarrow.parquet')
+
+
+class ExportTooLarge(ValueError):
+    pass
+
+
+def file_name(name, view, fmt, compression):
+    suffix = FORMATS[fmt][1] + ('.gz' if fmt == 'csv' and compression == 'gzip' else '')
+    return f'{name}_{view}{suffix}'
+
+
+def mime_type(fmt, compression):
+    return 'application/gzip' if fmt == 'csv' and compression == 'gzip' else FORMATS[fmt][0]
+
+
+def row_chunks(frame, positions, chunk_rows=CHUNK_ROWS):
+    for start in range(0, len(positions), chunk_rows):
+        yield frame.take(positions[start:start + chunk_rows])
+
+
+def filtered_positions(frame, regions=None, genders=None, age_range=None, date_range=None):
+    # Row positions matching the same filters as the aggregate cube
+    filters = {}
+    if regions is not None:
+        filters['Region'] = list(regions)
+    if genders is not None:
+        filters['Gender'] = list(genders)
+    return filter_index.index_for(frame).positions(filters=filters, age_range=age_range, date_range=date_range)
+
+
+def aggregate(frame, by, **filters):
+    # Count, mean and sample standard deviation of every metric per group
+    return aggregate_cube.cube_for(frame).stats(by, **filters)
+
+
+class _Spool:
+    # Write-only file object whose bytes are handed out after each chunk
+    def __init__(self):
+        self.parts = []
+        self.position = 0
+        self.closed = False
+
+    def write(self, data):
+        self.parts.append(bytes(data))
+        self.position += len(data)
+        return len(data)
+
+    def tell(self):
+        return self.position
+
+    def flush(self):
+        pass
+
+    def close(self):
+        self.closed = True
+
+    def drain(self):
+        data = b''.join(self.parts)
+        self.parts = []
+        return data
+
+
+def _csv(chunks, template, compression):
+    compressor = zlib.compressobj(wbits=31) if compression == 'gzip' else None   # gzip container
+    header = True
+    for chunk in chunks:
+        data = chunk.to_csv(index=False, header=header).encode('utf-8')
+        header = False
+        data = compressor.compress(data) if compressor else data
+        if data:
+            yield data
+    if header:
+        data = template.to_csv(index=False).encode('utf-8')
+        yield compressor.compress(data) if compressor else data
+    if compressor:
+        yield compressor.flush()
+
+
+def _arrow_tables(chunks, schema):
+    for chunk in chunks:
+        yield pa.Table.from_pandas(chunk, schema=schema, preserve_index=False)
+
+
+def _parquet(chunks, template, compression):
+    schema = pa.Schema.from_pandas(template, preserve_index=False)
+    spool = _Spool()
+    with pq.ParquetWriter(pa.PythonFile(spool, mode='w'), schema, compression=compression) as writer:
+        for table in _arrow_tables(chunks, schema):
+            writer.write_table(table)
+            yield spool.drain()
+    yield spool.drain()
+
+
+def _arrow(chunks, template, compression):
+    schema = pa.Schema.from_pandas(template, preserve_index=False)
+    spool = _Spool()
+    options = pa.ipc.IpcWriteOptions(compression=None if compression == 'none' else compression)
+    with pa.ipc.new_stream(pa.PythonFile(spool, mode='w'), schema, options=options) as writer:
+        for table in _arrow_tables(chunks, schema):
+            writer.write_table(table)
+            yield spool.drain()
+    yield spool.drain()
+
+
+ENCODERS = {'csv': _csv, 'parquet': _parquet, 'arrow': _arrow}
+
+
+def export(frame, fmt='csv', view='rows', compression=None, row_limit=None, chunk_rows=CHUNK_ROWS, **filters):
+    # Iterator of encoded bytes for the filtered rows or an aggregate view;
+    # filters are the aggregate cube's (regions, genders, age_range,
+    # date_range)
+    if fmt not in FORMATS:
+        raise ValueError(f"unknown export format {fmt!r}; expected one of {sorted(FORMATS)}")
+    if view not in VIEWS:
+        raise ValueError(f"unknown export view {view!r}; expected one of {sorted(VIEWS)}")
+    compression = compression or COMPRESSION[fmt][0]
+    if compression not in COMPRESSION[fmt]:
+        raise ValueError(f"{fmt} exports support {COMPRESSION[fmt]} compression, not {compression!r}")
+
+    if view == 'rows':
+        positions = filtered_positions(frame, **filters)
+        if row_limit is not None:
+            positions = positions[:row_limit]
+        template = frame.iloc[:0]
+        chunks = row_chunks(frame, positions, chunk_rows)
+    else:
+        table = aggregate(frame, VIEWS[view], **filters)
+        if row_limit is not None:
+            table = table.iloc[:row_limit]
+        template = table.iloc[:0]
+        chunks = iter([table]) if len(table) else iter([])
+    return ENCODERS[fmt](chunks, template, compression)
+
+
+def row_bytes(frame, fmt='csv', compression=None, sample_rows=SAMPLE_ROWS):
+    # Encoded bytes per row, measured on the first sample_rows rows. The
+    # file's fixed overhead is included, so small samples overestimate.
+    sample = frame.iloc[:sample_rows]
+    if not len(sample):
+        return 0.0
+    encoded = ENCODERS[fmt](iter([sample]), frame.iloc[:0], compression or COMPRESSION[fmt][0])
+    return sum(len(data) for data in encoded) / len(sample)
+
+
+def max_rows(frame, fmt='csv', compression=None, max_bytes=MAX_BYTES):
+    # MAX_ROWS, lowered so that a row export should fit in max_bytes. This
+    # is an estimate from a sample; spool() enforces the limit.
+    per_row = row_bytes(frame, fmt, compression)
+    if per_row <= 0:
+        return MAX_ROWS
+    return max(1, min(MAX_ROWS, int(max_bytes * SIZE_MARGIN / per_row)))
+
+
+def spool(chunks, max_bytes=MAX_BYTES):
+    # Writes encoded chunks to an anonymous temporary file and returns it
+    # rewound for reading. Raises ExportTooLarge past max_bytes.
+    file = tempfile.TemporaryFile(buffering=0)
+    try:
+        written = 0
+        for data in chunks:
+            written += len(data)
+            if max_bytes is not None and written > max_bytes:
+                raise ExportTooLarge(f"export exceeds {max_bytes} bytes; lower the row limit")
+            file.write(data)
+        file.seek(0)
+    except BaseException:
+        file.close()
+        raise
+    return file
@@ -0,0 +1,226 @@
+import json
+import os
+import shutil
+import tempfile
+import threading
+
+import numpy as np
+import pandas as pd
+
+# Columnar, memory-mapped store for the dashboard datasets.
+#
+# Each CSV is parsed once into a directory of .npy columns plus a meta.json
+# describing dtypes and categories. Columns are opened with mmap_mode='r', so
+# every worker process on the host shares the same page-cache pages instead of
+# holding its own parsed copy. String columns are dictionary-encoded
+# (categorical codes + category list) because object arrays cannot be mapped;
+# categories keep their JSON type, so 1 and '1' in an object column stay
+# distinct values.
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+STORE_DIR = os.environ.get('MH_STORE_DIR', os.path.join(BASE_DIR, '.data_store'))
+STORE_VERSION = 1
+
+DATASETS = {
+    'mental_health': 'mental_health_data.csv',
+    'rwanda_youth': 'mental_health_data_rwanda_youth.csv',
+    'dhs': 'dhs_data.csv',
+    'youth_health': 'youth_health_data_expanded (1).csv',
+    'who_mental_health': 'mental_health_indicators_rwa (1).csv',
+    'who_dementia': 'dementia_diagnosis_treatment_and_care_indicators_rwa (1).csv',
+}
+
+DATE_COLUMNS = {
+    'mental_health': ['Date'],
+}
+
+CATEGORICAL_COLUMNS = ['Region', 'Gender', 'District']
+
+_loaded = {}   # (name, columns) -> (source signature, frame)
+_lock = threading.Lock()
+
+
+def source_path(name):
+    return os.path.join(BASE_DIR, DATASETS[name])
+
+
+def dataset_available(name):
+    return name in DATASETS and os.path.exists(source_path(name))
+
+
+def _source_signature(path):
+    st = os.stat(path)
+    return {'size': st.st_size, 'mtime_ns': st.st_mtime_ns}
+
+
+def _has_hxl_row(path):
+    # WHO GHO exports carry a second '#indicator+code,...' header row
+    with open(path, encoding='utf-8') as f:
+        f.readline()
+        return f.readline().startswith('#')
+
+
+def read_source(name):
+    path = source_path(name)
+    skiprows = [1] if _has_hxl_row(path) else None
+    return pd.read_csv(path, skiprows=skiprows, parse_dates=DATE_COLUMNS.get(name, False))
+
+
+def _codes_dtype(n_categories):
+    for dtype in (np.int8, np.int16, np.int32):
+        if n_categories < np.iinfo(dtype).max:
+            return dtype
+    return np.int64
+
+
+def _encode_column(series):
+    # Returns (array, column meta) for a single column
+    if pd.api.types.is_datetime64_any_dtype(series):
+        values = series.values.astype('datetime64[ns]')
+        return values.view(np.int64), {'kind': 'datetime'}
+    if pd.api.types.is_bool_dtype(series):
+        return series.to_numpy(dtype=np.bool_), {'kind': 'numeric'}
+    if pd.api.types.is_numeric_dtype(series):
+        return series.to_numpy(), {'kind': 'numeric'}
+    cat = series.astype('category').cat
+    categories = [_category_value(c) for c in cat.categories]
+    if len({(type(c), c) for c in categories}) < len(categories):
+        raise ValueError(f"column {series.name!r} has distinct values with the same text; "
+                         f"convert it to a single type before storing it")
+    codes = cat.codes.to_numpy().astype(_codes_dtype(len(categories)))
+    return codes, {'kind': 'categorical', 'categories': categories}
+
+
+def _category_value(value):
+    # Categories are stored in meta.json: JSON scalars keep their type,
+    # anything else is stored as its text
+    if isinstance(value, np.generic):
+        value = value.item()
+    if isinstance(value, (str, bool, int, float)):
+        return value
+    return str(value)
+
+
+def write_frame(frame, target_dir, extra_meta=None):
+    # Writes a DataFrame as .npy columns. The directory is built next to the
+    # target and renamed into place, so readers never see a partial store.
+    parent = os.path.dirname(target_dir)
+    os.makedirs(parent, exist_ok=True)
+    tmp_dir = tempfile.mkdtemp(dir=parent, prefix='.tmp-')
+    try:
+        columns = []
+        for i, column in enumerate(frame.columns):
+            values, col_meta = _encode_column(frame[column])
+            np.save(os.path.join(tmp_dir, f'{i}.npy'), np.ascontiguousarray(values), allow_pickle=False)
+            col_meta['name'] = str(column)
+            col_meta['file'] = f'{i}.npy'
+            columns.append(col_meta)
+        meta = {'version': STORE_VERSION, 'rows': len(frame), 'columns': columns}
+        meta.update(extra_meta or {})
+        with open(os.path.join(tmp_dir, 'meta.json'), 'w') as f:
+            json.dump(meta, f)
+        if os.path.exists(target_dir):
+            shutil.rmtree(target_dir, ignore_errors=True)
+        try:
+            os.rename(tmp_dir, target_dir)
+        except OSError:
+            # Another process published the same store first
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+    except BaseException:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        raise
+
+
+def read_meta(store_dir):
+    try:
+        with open(os.path.join(store_dir, 'meta.json')) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def open_frame(store_dir, columns=None):
+    # Opens a store directory as a DataFrame whose columns are read-only
+    # memory maps. Categorical columns wrap the mapped code array directly.
+    meta = read_meta(store_dir)
+    if meta is None:
+        raise FileNotFoundError(f"No columnar store at {store_dir}")
+    data = {}
+    for col_meta in meta['columns']:
+        name = col_meta['name']
+        if columns is not None and name not in columns:
+            continue
+        values = np.load(os.path.join(store_dir, col_meta['file']), mmap_mode='r', allow_pickle=False)
+        if col_meta['kind'] == 'datetime':
+            data[name] = pd.Series(values.view('datetime64[ns]'), copy=False)
+        elif col_meta['kind'] == 'categorical':
+            # Codes were validated when the store was written; skipping the
+            # check keeps the categorical backed by the mapped array
+            dtype = pd.CategoricalDtype(col_meta['categories'])
+            codes = pd.Categorical.from_codes(values, dtype=dtype, validate=False)
+            data[name] = pd.Series(codes, copy=False)
+        else:
+            data[name] = pd.Series(values, copy=False)
+    return pd.DataFrame(data, copy=False)
+
+
+def _store_dir(name):
+    return os.path.join(STORE_DIR, name)
+
+
+def _is_fresh(name):
+    meta = read_meta(_store_dir(name))
+    return (
+        meta is not None
+        and meta.get('version') == STORE_VERSION
+        and meta.get('source') == _source_signature(source_path(name))
+    )
+
+
+def build_dataset(name, force=False):
+    # Parses the source CSV into the store unless an up-to-date copy exists
+    if force or not _is_fresh(name):
+        frame = read_source(name)
+        for column in CATEGORICAL_COLUMNS:
+            if column in frame.columns:
+                frame[column] = frame[column].astype('category')
+        write_frame(frame, _store_dir(name), {'source': _source_signature(source_path(name))})
+    return _store_dir(name)
+
+
+def load_dataset(name, columns=None):
+    # Returns the memory-mapped frame for a dataset, building the store on
+    # first use. Loaded frames are shared by every session in the process.
+    # A frame whose source is unchanged costs one stat and no lock; only a
+    # (re)load takes the lock and checks the store.
+    key = (name, tuple(columns) if columns is not None else None)
+    signature = _source_signature(source_path(name))
+    entry = _loaded.get(key)
+    if entry is not None and entry[0] == signature:
+        return entry[1]
+    with _lock:
+        entry = _loaded.get(key)
+        if entry is None or entry[0] != signature:
+            store_dir = build_dataset(name)
+            entry = (read_meta(store_dir)['source'], open_frame(store_dir, columns))
+            _loaded[key] = entry
+        return entry[1]
+
+
+def dataset_version(name):
+    # Token that changes whenever the source file does; used in cache keys
+    signature = _source_signature(source_path(name))
+    return f"{name}:{STORE_VERSION}:{signature['size']}:{signature['mtime_ns']}"
+
+
+def build_all(force=False):
+    for name in DATASETS:
+        if dataset_available(name):
+            build_dataset(name, force=force)
+
+
+if __name__ == '__main__':
+    build_all(force=True)
+    for name in DATASETS:
+        if dataset_available(name):
+            print(f"{name}: {read_meta(_store_dir(name))['rows']} rows -> {_store_dir(name)}")
@@ -0,0 +1,195 @@
+import datetime
+import glob
+import os
+import re
+import threading
+
+import joblib
+import numpy as np
+import pandas as pd
+import sklearn
+from sklearn.compose import ColumnTransformer
+from sklearn.ensemble import HistGradientBoostingRegressor
+from sklearn.impute import SimpleImputer
+from sklearn.metrics import mean_absolute_error, r2_score
+from sklearn.model_selection import train_test_split
+from sklearn.pipeline import Pipeline
+from sklearn.preprocessing import OneHotEncoder
+
+import data_store
+
+# Depression-score model: trained offline, saved as a versioned artifact and
+# loaded once per process. The dashboard and the prediction service never
+# train; without an artifact, load_model raises ModelUnavailable.
+#
+# Training combines mental_health_data.csv (when present) with the Rwanda
+# youth survey. The youth survey scores depression on 0-10 and has no
+# lifestyle columns, so its target is rescaled to 0-100 and the missing
+# features are imputed with a missing-indicator; the model still learns
+# Age/Gender/Region effects from it.
+#
+#     python depression_model.py train              # next artifact version
+#     python depression_model.py train --if-missing # e.g. in a build step
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+MODEL_DIR = os.environ.get('MH_MODEL_DIR', os.path.join(BASE_DIR, 'models'))
+MODEL_NAME = 'depression_model'
+
+NUMERIC_FEATURES = ['Age', 'Social_Media_Usage', 'Physical_Activity', 'Sleep_Duration']
+CATEGORICAL_FEATURES = ['Gender', 'Region']
+FEATURES = NUMERIC_FEATURES + CATEGORICAL_FEATURES
+TARGET = 'Depression_Score'
+
+_model = None
+_lock = threading.Lock()
+
+
+class ModelUnavailable(Exception):
+    pass
+
+
+def training_frame():
+    if not data_store.dataset_available('rwanda_youth'):
+        raise FileNotFoundError(f"training needs {data_store.DATASETS['rwanda_youth']}")
+    frames = []
+    if data_store.dataset_available('mental_health'):
+        survey = data_store.load_dataset('mental_health')
+        frames.append(pd.DataFrame({c: survey[c].to_numpy() for c in FEATURES + [TARGET]}))
+    youth = data_store.load_dataset('rwanda_youth')
+    frames.append(pd.DataFrame({
+        'Age': youth['Age'].to_numpy(),
+        'Gender': youth['Gender'].astype(str).to_numpy(),
+        'Region': youth['Region'].astype(str).to_numpy(),
+        TARGET: youth[TARGET].to_numpy(dtype=np.float64) * 10,
+    }))
+    frame = pd.concat(frames, ignore_index=True).reindex(columns=FEATURES + [TARGET])
+    for column in CATEGORICAL_FEATURES:
+        frame[column] = frame[column].astype(object)
+    return frame
+
+
+def build_pipeline():
+    preprocess = ColumnTransformer([
+        ('num', SimpleImputer(strategy='median', add_indicator=True, keep_empty_features=True), NUMERIC_FEATURES),
+        ('cat', Pipeline([
+            ('impute', SimpleImputer(strategy='constant', fill_value='Unknown')),
+            ('encode', OneHotEncoder(handle_unknown='ignore')),
+        ]), CATEGORICAL_FEATURES),
+    ])
+    return Pipeline([
+        ('preprocess', preprocess),
+        ('regressor', HistGradientBoostingRegressor(max_iter=200, learning_rate=0.05, random_state=42)),
+    ])
+
+
+def _artifact_paths():
+    pattern = os.path.join(MODEL_DIR, f'{MODEL_NAME}-v*.joblib')
+    versioned = []
+    for path in glob.glob(pattern):
+        match = re.search(r'-v(\d+)\.joblib$', path)
+        if match:
+            versioned.append((int(match.group(1)), path))
+    return sorted(versioned)
+
+
+def train(save=True):
+    # Fits the pipeline, evaluates it on a holdout split and writes the next
+    # artifact version. Returns the saved artifact dict.
+    frame = training_frame()
+    train_rows, test_rows = train_test_split(frame, test_size=0.2, random_state=42)
+    pipeline = build_pipeline()
+    pipeline.fit(train_rows[FEATURES], train_rows[TARGET])
+    predicted = pipeline.predict(test_rows[FEATURES])
+    metrics = {
+        'mae': float(mean_absolute_error(test_rows[TARGET], predicted)),
+        'r2': float(r2_score(test_rows[TARGET], predicted)),
+        'train_rows': len(train_rows),
+        'test_rows': len(test_rows),
+        'datasets': [name for name in ('mental_health', 'rwanda_youth') if data_store.dataset_available(name)],
+    }
+    # Refit on all rows for the shipped artifact
+    pipeline.fit(frame[FEATURES], frame[TARGET])
+
+    existing = _artifact_paths()
+    version = existing[-1][0] + 1 if existing else 1
+    artifact = {
+        'pipeline': pipeline,
+        'version': version,
+        'features': FEATURES,
+        'metrics': metrics,
+        'trained_at': datetime.datetime.now().isoformat(timespec='seconds'),
+        'sklearn_version': sklearn.__version__,
+    }
+    if save:
+        os.makedirs(MODEL_DIR, exist_ok=True)
+        path = os.path.join(MODEL_DIR, f'{MODEL_NAME}-v{version}.joblib')
+        tmp_path = path + '.tmp'
+        joblib.dump(artifact, tmp_path)
+        os.replace(tmp_path, path)
+    return artifact
+
+
+class DepressionModel:
+    def __init__(self, artifact):
+        self.pipeline = artifact['pipeline']
+        self.version = artifact['version']
+        self.metrics = artifact['metrics']
+        self.trained_at = artifact['trained_at']
+
+    def warm_up(self):
+        # One throwaway prediction so the first real request does not pay for
+        # lazy initialisation inside sklearn
+        self.predict_batch(pd.DataFrame([{'Age': 20, 'Social_Media_Usage': 3, 'Physical_Activity': 4, 'Sleep_Duration': 7}]))
+
+    def predict_batch(self, frame):
+        # Scores a whole cohort in one vectorized call. Missing feature
+        # columns are treated as unknown; scores are clipped to 0-100.
+        inputs = pd.DataFrame(index=range(len(frame)))
+        for column in NUMERIC_FEATURES:
+            inputs[column] = frame[column].to_numpy(dtype=np.float64) if column in frame else np.nan
+        for column in CATEGORICAL_FEATURES:
+            inputs[column] = frame[column].astype(object).to_numpy() if column in frame else np.nan
+        return np.clip(self.pipeline.predict(inputs), 0, 100)
+
+
+def available():
+    return _model is not None or bool(_artifact_paths())
+
+
+def load_model(version=None):
+    # Returns the process-wide model, loading it on first use. Raises
+    # ModelUnavailable when no (or not the requested) artifact exists.
+    global _model
+    with _lock:
+        if _model is not None and (version is None or _model.version == version):
+            return _model
+        artifacts = dict(_artifact_paths())
+        if not artifacts or (version is not None and version not in artifacts):
+            wanted = f'{MODEL_NAME} v{version}' if version is not None else MODEL_NAME
+            raise ModelUnavailable(f"no {wanted} artifact in {MODEL_DIR}; "
+                                   f"run `python {os.path.basename(__file__)} train`")
+        artifact = joblib.load(artifacts[max(artifacts) if version is None else version])
+        model = DepressionModel(artifact)
+        model.warm_up()
+        _model = model
+        return _model
+
+
+def predict_batch(frame):
+    return load_model().predict_batch(frame)
+
+
+if __name__ == '__main__':
+    import sys
+
+    if len(sys.argv) > 1 and sys.argv[1] == 'train':
+        if '--if-missing' in sys.argv[2:] and _artifact_paths():
+            print(f"{MODEL_NAME} v{_artifact_paths()[-1][0]} already exists in {MODEL_DIR}")
+            sys.exit(0)
+        try:
+            artifact = train()
+        except FileNotFoundError as error:
+            sys.exit(f"cannot train {MODEL_NAME}: {error}")
+        print(f"Saved {MODEL_NAME} v{artifact['version']}: {artifact['metrics']}")
+    else:
+        print(f"usage: python {os.path.basename(__file__)} train [--if-missing]")
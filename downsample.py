@@ -0,0 +1,126 @@
+import numpy as np
+import pandas as pd
+
+# Server-side reduction of time series before they are sent to the browser.
+#
+# Series are first aggregated into time buckets (mean per bucket), then
+# reduced with Largest-Triangle-Three-Buckets to at most `max_points` points,
+# which keeps the visual shape (peaks and troughs) of the line. Passing a
+# narrower x-range re-fetches the series at full budget for that window only,
+# so zooming in reveals finer detail.
+
+DEFAULT_MAX_POINTS = 1000
+
+
+def lttb(x, y, max_points):
+    # Returns the indices of the points kept by Largest-Triangle-Three-Buckets
+    n = len(x)
+    if max_points >= n or max_points < 3:
+        return np.arange(n)
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    # Bucket edges over the interior points; first and last are always kept
+    edges = np.linspace(1, n - 1, max_points - 1).astype(np.int64)
+    keep = np.empty(max_points, dtype=np.int64)
+    keep[0] = 0
+    keep[-1] = n - 1
+    prev = 0
+    for i in range(max_points - 2):
+        start, end = edges[i], max(edges[i + 1], edges[i] + 1)
+        next_start, next_end = edges[i + 1], edges[i + 2] if i + 2 < len(edges) else n
+        next_end = max(next_end, next_start + 1)
+        avg_x = x[next_start:next_end].mean()
+        avg_y = y[next_start:next_end].mean()
+        area = np.abs(
+            (x[prev] - avg_x) * (y[start:end] - y[prev])
+            - (x[prev] - x[start:end]) * (avg_y - y[prev])
+        )
+        prev = start + int(np.argmax(area))
+        keep[i + 1] = prev
+    return keep
+
+
+# Candidate bucket units (NumPy datetime64 units, with a month multiple for
+# quarters) and their approximate widths, finest first
+FREQUENCIES = [
+    ('min', ('m', 1), pd.Timedelta(minutes=1)),
+    ('h', ('h', 1), pd.Timedelta(hours=1)),
+    ('D', ('D', 1), pd.Timedelta(days=1)),
+    ('W', ('W', 1), pd.Timedelta(weeks=1)),
+    ('MS', ('M', 1), pd.Timedelta(days=30)),
+    ('QS', ('M', 3), pd.Timedelta(days=91)),
+    ('YS', ('Y', 1), pd.Timedelta(days=365)),
+]
+_UNITS = {freq: unit for freq, unit, _ in FREQUENCIES}
+
+# Buckets produced per output point, so LTTB has detail to choose from
+OVERSAMPLE = 4
+
+
+def bucket_frequency(span, max_points):
+    # Finest calendar bucket that yields at most OVERSAMPLE * max_points buckets
+    target = span / (max_points * OVERSAMPLE)
+    for freq, _, width in FREQUENCIES:
+        if width >= target:
+            return freq
+    return FREQUENCIES[-1][0]
+
+
+def resample(frame, x, columns, freq=None, max_points=DEFAULT_MAX_POINTS):
+    # Aggregates `columns` of `frame` into time buckets along `x` (mean per
+    # bucket). Buckets are computed by truncating datetime64 values and
+    # summed with bincount, so unsorted input is never sorted.
+    columns = list(columns)
+    xs = pd.to_datetime(frame[x]).to_numpy(dtype='datetime64[ns]')
+    if len(xs) == 0:
+        return pd.DataFrame({x: xs, **{c: np.empty(0) for c in columns}})
+    if freq is None:
+        freq = bucket_frequency(pd.Timedelta(xs.max() - xs.min()), max_points)
+    unit, step = _UNITS[freq]
+    buckets = xs.astype(f'datetime64[{unit}]').astype(np.int64) // step
+    origin = buckets.min()
+    ids = buckets - origin
+    size = int(ids.max()) + 1
+
+    result = {}
+    occupied = np.zeros(size, dtype=bool)
+    for column in columns:
+        values = frame[column].to_numpy(dtype=np.float64)
+        valid = ~np.isnan(values)
+        counts = np.bincount(ids[valid], minlength=size)
+        sums = np.bincount(ids[valid], weights=values[valid], minlength=size)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            result[column] = sums / counts
+        occupied |= counts > 0
+    starts = ((np.flatnonzero(occupied) + origin) * step).astype(f'datetime64[{unit}]')
+    out = pd.DataFrame({x: starts.astype('datetime64[ns]')})
+    for column in columns:
+        out[column] = result[column][occupied]
+    return out
+
+
+def downsample(frame, x, columns, max_points=DEFAULT_MAX_POINTS, x_range=None, freq=None):
+    # Returns a reduced frame with at most roughly `max_points` rows per
+    # column. `x_range` limits the series to the visible window first.
+    columns = list(columns)
+    data = frame[[x] + columns]
+    if x_range is not None and x_range[0] is not None:
+        xs = pd.to_datetime(data[x])
+        data = data[(xs >= pd.Timestamp(x_range[0])) & (xs <= pd.Timestamp(x_range[1]))]
+    if len(data) <= max_points:
+        return data.sort_values(x).reset_index(drop=True)
+
+    buckets = resample(data, x, columns, freq=freq, max_points=max_points)
+    if len(buckets) <= max_points:
+        return buckets
+    # LTTB per column, then the union of kept rows so the lines share x values
+    xs = buckets[x].to_numpy(dtype='datetime64[ns]').astype(np.int64)
+    keep = set()
+    per_column = max(3, max_points // len(columns))
+    for column in columns:
+        values = buckets[column].to_numpy(dtype=np.float64)
+        valid = ~np.isnan(values)
+        positions = np.flatnonzero(valid)
+        keep.update(positions[lttb(xs[valid], values[valid], per_column)].tolist())
+    return buckets.iloc[sorted(keep)].reset_index(drop=True)
+
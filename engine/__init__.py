@@ -0,0 +1,12 @@
+from engine import aggregation, charts, cohorts, data, export, filtering, indicators, prediction, sentiment, text
+from engine.types import (
+    ChatReply, Cohort, CohortComparison, CorrelationStats, Dataset, Demographics, ExportOptions, FilterOptions,
+    FilterSpec, ForumSentiment, HomeSummary, IndicatorCatalog, Kpis, Overview, Prediction, PredictionInput,
+)
+
+# Headless compute core for the dashboard.
+#
+# Every function here takes typed inputs (engine.types) and returns plain
+# data or DataFrames with no Streamlit calls, so it can run in scripts,
+# benchmarks and worker processes. streamlit_app.py only collects widget
+# values, calls the engine and renders the results.
@@ -0,0 +1,127 @@
+import datetime
+from typing import Optional, Sequence, Tuple
+
+import pandas as pd
+
+import aggregate_cube
+import downsample
+import home_cache
+import job_pool
+import result_cache
+import stats_engine
+from engine import data
+from engine.filtering import filter_key, filter_rows
+from engine.types import CorrelationStats, Dataset, Demographics, FilterSpec, HomeSummary, Kpis, Overview
+
+# Aggregates behind the dashboard pages. KPIs and region means come from the
+# aggregate cube; group counts and trends from the filtered rows;
+# correlations from co-moments, cached per filter.
+
+TREND_METRICS = ['Depression_Score', 'Anxiety_Score', 'Stress_Level']
+CORRELATION_COLUMNS = ['Depression_Score', 'Anxiety_Score', 'Stress_Level', 'Social_Media_Usage',
+                       'Physical_Activity', 'Sleep_Duration', 'Age']
+
+
+def home_summary(dataset: Dataset) -> HomeSummary:
+    assets = home_cache.home_assets(dataset.frame)
+    return HomeSummary(sunburst=assets['sunburst'], summary=assets['summary'], kpis=assets['kpis'])
+
+
+def overview(dataset: Dataset, spec: FilterSpec) -> Overview:
+    cube = aggregate_cube.cube_for(dataset.frame)
+    kpis = cube.kpis(**spec.cube_filters())
+    return Overview(
+        kpis=Kpis(
+            count=kpis['count'],
+            means={metric: float(kpis[metric]['mean']) for metric in cube.metrics},
+            stds={metric: float(kpis[metric]['std']) for metric in cube.metrics},
+        ),
+        region_means=cube.means('Region', 'Depression_Score', **spec.cube_filters()),
+    )
+
+
+def demographics(filtered: pd.DataFrame) -> Demographics:
+    return Demographics(
+        gender_counts=filtered.groupby('Gender', observed=True).size().reset_index(name='Counts').astype({'Gender': str}),
+        region_gender_counts=filtered.groupby(['Region', 'Gender'], observed=True).size().reset_index(name='Counts')
+        .astype({'Region': str, 'Gender': str}),
+    )
+
+
+def date_bounds(filtered: pd.DataFrame) -> Optional[Tuple[datetime.datetime, datetime.datetime]]:
+    # None when there is no date span to zoom into
+    if len(filtered) == 0:
+        return None
+    date_min, date_max = filtered['Date'].min(), filtered['Date'].max()
+    if not date_min < date_max:
+        return None
+    return date_min.to_pydatetime(), date_max.to_pydatetime()
+
+
+def trend(filtered: pd.DataFrame, metrics: Sequence[str], x_range=None) -> pd.DataFrame:
+    # Zooming re-fetches the window at full point budget for finer detail
+    return downsample.downsample(filtered, 'Date', list(metrics), x_range=x_range)
+
+
+def correlation(dataset: Dataset, spec: FilterSpec, filtered: pd.DataFrame,
+                columns: Sequence[str] = CORRELATION_COLUMNS) -> pd.DataFrame:
+    key = ('correlation', tuple(columns)) + filter_key(dataset, spec)
+    return result_cache.results.get_or_compute(key, lambda: stats_engine.comoments(filtered, list(columns)).correlation())
+
+
+def _rows(dataset: Dataset, spec: Optional[FilterSpec]) -> pd.DataFrame:
+    return dataset.frame if spec is None else filter_rows(dataset, spec)
+
+
+def block_moments_job(name: str, version: str, spec: Optional[FilterSpec], task: tuple):
+    # Worker-pool job: one row range of the bootstrap block moments over the
+    # rows matching spec
+    dataset = data.dataset(name)
+    if dataset is None or dataset.version != version:
+        raise LookupError(f"dataset {name!r} version {version!r} is not available")
+    return stats_engine.range_moments(_rows(dataset, spec), *task)
+
+
+def _pooled_ranges(dataset: Dataset, spec: Optional[FilterSpec]):
+    pool = job_pool.get_pool()
+
+    def run(tasks):
+        jobs = [pool.submit(block_moments_job, dataset.name, dataset.version, spec, task) for task in tasks]
+        try:
+            return [job.result() for job in jobs]
+        finally:
+            for job in jobs:
+                job.release()
+
+    return max(pool.workers, 1), run
+
+
+def correlation_stats(dataset: Dataset, spec: Optional[FilterSpec] = None) -> CorrelationStats:
+    # Pearson and partial correlations with bootstrap intervals over every
+    # numeric column except identifiers, for the rows matching spec (all
+    # rows without one)
+    frame = _rows(dataset, spec)
+    columns = [c for c in stats_engine.numeric_columns(frame) if c != 'ID']
+
+    def compute():
+        # Large datasets are split across the worker pool, which reloads the
+        # memory-mapped frame by name and applies the same filter
+        processes, run = _pooled_ranges(dataset, spec)
+        result = stats_engine.bootstrap(frame, columns, processes=processes, run=run)
+        return CorrelationStats(
+            rows=result['rows'],
+            estimates={kind: result[kind]['estimate'] for kind in ('correlation', 'partial')},
+            intervals={kind: stats_engine.pairs(result[kind]) for kind in ('correlation', 'partial')},
+        )
+
+    scope = filter_key(dataset, spec) if spec is not None else (dataset.version,)
+    return result_cache.results.get_or_compute(('bootstrap', tuple(columns)) + scope, compute)
+
+
+def yearly_means(dataset: Dataset, metrics: Sequence[str] = ('Depression_Score', 'Anxiety_Score')) -> pd.DataFrame:
+    # Survey yearly means come from the aggregate cube, not the raw rows
+    merged = aggregate_cube.combine(aggregate_cube.cube_for(dataset.frame).slice(), ['Year'], list(metrics))
+    frame = pd.DataFrame({'Year': merged.index.to_numpy()})
+    for metric in metrics:
+        frame[metric] = merged[f'{metric}_mean'].to_numpy()
+    return frame
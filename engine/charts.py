@@ -0,0 +1,45 @@
+from typing import Dict, Optional, Sequence
+
+import binned_charts
+import result_cache
+from engine import data, filtering
+from engine.types import Dataset, FilterSpec
+
+# Heavy chart builds, written as jobs for the worker pool (job_pool).
+#
+# Arguments are small and picklable: a dataset name and version and a
+# FilterSpec, never the frame. Each worker loads the memory-mapped dataset
+# and filters it itself; the version is part of the arguments so a job's
+# dedup key changes when the data does. Trendline statistics are cached in
+# the result cache per filter, like the correlations.
+
+
+def _dataset(name: str, version: str) -> Dataset:
+    dataset = data.dataset(name)
+    if dataset is None or dataset.version != version:
+        raise LookupError(f"dataset {name!r} version {version!r} is not available")
+    return dataset
+
+
+def _filtered(name: str, version: str, spec: FilterSpec):
+    return filtering.filter_rows(_dataset(name, version), spec)
+
+
+def trend_stats(dataset: Dataset, spec: FilterSpec, x: str, y: str, facet: str) -> dict:
+    # Per-facet sufficient statistics behind the trellis OLS lines
+    key = ('trend_stats', x, y, facet) + filtering.filter_key(dataset, spec)
+    return result_cache.results.get_or_compute(
+        key, lambda: binned_charts.facet_stats(filtering.filter_rows(dataset, spec), x, y, facet))
+
+
+def scatter_matrix(name: str, version: str, spec: FilterSpec, dimensions: Sequence[str], color: Optional[str] = None,
+                   title: Optional[str] = None, color_discrete_map: Optional[Dict[str, str]] = None):
+    return binned_charts.scatter_matrix(_filtered(name, version, spec), dimensions=list(dimensions), color=color,
+                                        title=title, color_discrete_map=color_discrete_map)
+
+
+def trellis(name: str, version: str, spec: FilterSpec, x: str, y: str, facet: str, title: Optional[str] = None,
+            color_discrete_map: Optional[Dict[str, str]] = None):
+    dataset = _dataset(name, version)
+    return binned_charts.trellis(filtering.filter_rows(dataset, spec), x=x, y=y, facet=facet, title=title,
+                                 color_discrete_map=color_discrete_map, stats=trend_stats(dataset, spec, x, y, facet))
@@ -0,0 +1,61 @@
+from typing import Dict, Sequence, Tuple
+
+import cohort_engine
+import cohort_store
+import result_cache
+from engine import data
+from engine.types import Cohort, CohortComparison
+
+# Cohort comparisons across the youth survey, the DHS extract and the youth
+# health indicators. Datasets are harmonized once per loaded frame
+# (cohort_engine), comparisons are cached by dataset versions, cohorts and
+# grouping, and definitions are saved in cohort_store.
+
+DATASETS = ('rwanda_youth', 'dhs', 'youth_health')
+KEYS = tuple(cohort_engine.KEYS)
+
+
+def tables(names: Sequence[str] = DATASETS) -> Dict[str, 'cohort_engine.Harmonized']:
+    return {name: cohort_engine.harmonized_for(dataset.frame, name) for name, dataset in data.load_datasets(names).items()}
+
+
+def levels(names: Sequence[str] = DATASETS) -> Dict[str, Tuple[str, ...]]:
+    # Every column a cohort can be defined on and its values: the harmonized
+    # keys, then each dataset's attributes
+    result = dict(cohort_engine.KEYS)
+    for table in tables(names).values():
+        for column, values in table.levels.items():
+            result.setdefault(column, values)
+    return result
+
+
+def saved() -> Tuple[Cohort, ...]:
+    return tuple(Cohort.create(name, conditions) for name, conditions in cohort_store.definitions().items())
+
+
+def save(cohort: Cohort) -> None:
+    cohort_store.save(cohort.name, {column: list(values) for column, values in cohort.conditions})
+
+
+def delete(name: str) -> None:
+    cohort_store.delete(name)
+
+
+def compare(cohorts: Sequence[Cohort], by: Sequence[str], names: Sequence[str] = DATASETS,
+            how: str = 'outer') -> CohortComparison:
+    # Row counts and measure means per (cohort, group) with every dataset
+    # that has the grouping columns side by side; 'inner' keeps only groups
+    # present in all of them
+    datasets = data.load_datasets(names)
+    key = ('cohorts', tuple((name, dataset.version) for name, dataset in datasets.items()), tuple(cohorts), tuple(by), how)
+
+    def compute():
+        table, skipped = cohort_engine.compare(
+            {name: cohort_engine.harmonized_for(dataset.frame, name) for name, dataset in datasets.items()},
+            {cohort.name: cohort.as_dict() for cohort in cohorts},
+            by,
+            how=how,
+        )
+        return CohortComparison(by=tuple(by), table=table, skipped=tuple(skipped))
+
+    return result_cache.results.get_or_compute(key, compute)
@@ -0,0 +1,81 @@
+import threading
+from typing import Dict, Iterable, Optional
+
+import numpy as np
+import pandas as pd
+
+import data_store
+import filter_index
+from engine.types import Dataset, FilterOptions
+
+# Dataset loading. The survey comes from the memory-mapped store; without
+# the CSV a simulated frame with the same schema is used.
+
+SURVEY = 'mental_health'
+
+_simulated = None
+_lock = threading.Lock()
+
+
+def simulate_data() -> pd.DataFrame:
+    np.random.seed(42)
+    num_samples = 1000
+    data = pd.DataFrame({
+        'Age': np.random.randint(15, 25, num_samples),
+        'Gender': np.random.choice(['Male', 'Female'], num_samples),
+        'Depression_Score': np.random.normal(50, 15, num_samples),
+        'Anxiety_Score': np.random.normal(50, 15, num_samples),
+        'Stress_Level': np.random.normal(50, 15, num_samples),
+        'Social_Media_Usage': np.random.randint(0, 12, num_samples),  # Hours per day
+        'Physical_Activity': np.random.randint(0, 14, num_samples),    # Hours per week
+        'Sleep_Duration': np.random.normal(7, 1.5, num_samples),      # Hours per night
+        'Region': np.random.choice(['Kigali', 'Northern', 'Southern', 'Eastern', 'Western'], num_samples),
+        'Date': pd.date_range(start='2022-01-01', periods=num_samples, freq='D').tolist()
+    })
+    # Ensure scores are within 0-100
+    for score in ['Depression_Score', 'Anxiety_Score', 'Stress_Level']:
+        data[score] = data[score].clip(0, 100)
+    # Ensure no missing values in 'Region'
+    data['Region'] = data['Region'].fillna('Unknown')
+    return data
+
+
+def load_dataset(name: str) -> Optional[Dataset]:
+    if not data_store.dataset_available(name):
+        return None
+    return Dataset(name=name, version=data_store.dataset_version(name), frame=data_store.load_dataset(name))
+
+
+def load_survey() -> Dataset:
+    # The simulated fallback is built once per process and shared
+    global _simulated
+    dataset = load_dataset(SURVEY)
+    if dataset is not None:
+        return dataset
+    with _lock:
+        if _simulated is None:
+            _simulated = Dataset(name=SURVEY, version='simulated', frame=simulate_data())
+        return _simulated
+
+
+def dataset(name: str) -> Optional[Dataset]:
+    return load_survey() if name == SURVEY else load_dataset(name)
+
+
+def load_datasets(names: Iterable[str]) -> Dict[str, Dataset]:
+    datasets = {}
+    for name in names:
+        loaded = dataset(name)
+        if loaded is not None:
+            datasets[name] = loaded
+    return datasets
+
+
+def filter_options(dataset: Dataset) -> FilterOptions:
+    index = filter_index.index_for(dataset.frame)
+    return FilterOptions(
+        regions=tuple(index.categories('Region')),
+        genders=tuple(index.categories('Gender')),
+        date_min=pd.Timestamp(index.sorted_dates[0]).date(),
+        date_max=pd.Timestamp(index.sorted_dates[-1]).date(),
+    )
@@ -0,0 +1,35 @@
+from typing import BinaryIO, Iterator, Optional
+
+import data_export
+import result_cache
+from engine.types import Dataset, ExportOptions, FilterSpec
+
+# Downloads of the filtered rows or aggregate views, encoded chunk by chunk.
+
+
+def export(dataset: Dataset, spec: FilterSpec, options: ExportOptions) -> Iterator[bytes]:
+    return data_export.export(
+        dataset.frame, options.format, options.view, options.compression, options.row_limit, **spec.cube_filters()
+    )
+
+
+def export_file(dataset: Dataset, spec: FilterSpec, options: ExportOptions) -> BinaryIO:
+    # The encoded export in a rewound temporary file, for download buttons
+    return data_export.spool(export(dataset, spec, options))
+
+
+def max_rows(dataset: Dataset, fmt: str, compression: Optional[str] = None, view: str = 'rows') -> int:
+    # Row limit for a download; row exports are capped by their encoded size
+    if view != 'rows':
+        return data_export.MAX_ROWS
+    key = ('export_max_rows', dataset.version, fmt, compression)
+    return result_cache.results.get_or_compute(key, lambda: data_export.max_rows(dataset.frame, fmt, compression))
+
+
+def file_name(dataset: Dataset, options: ExportOptions) -> str:
+    compression = options.compression or data_export.COMPRESSION[options.format][0]
+    return data_export.file_name(dataset.name, options.view, options.format, compression)
+
+
+def mime_type(options: ExportOptions) -> str:
+    return data_export.mime_type(options.format, options.compression)
@@ -0,0 +1,21 @@
+import pandas as pd
+
+import filter_index
+import result_cache
+from engine.types import Dataset, FilterSpec
+
+# Row filtering through the bitmap index. Filtered frames are shared across
+# sessions by (dataset version, filter spec).
+
+
+def filter_key(dataset: Dataset, spec: FilterSpec) -> tuple:
+    return result_cache.make_key(dataset.version, spec.regions, spec.genders, spec.age_range, spec.date_range)
+
+
+def filter_rows(dataset: Dataset, spec: FilterSpec) -> pd.DataFrame:
+    index = filter_index.index_for(dataset.frame)
+    return result_cache.results.get_or_compute(('filtered',) + filter_key(dataset, spec), lambda: index.query(
+        filters={'Region': list(spec.regions), 'Gender': list(spec.genders)},
+        age_range=spec.age_range,
+        date_range=spec.date_range,
+    ))
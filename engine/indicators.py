@@ -0,0 +1,45 @@
+from typing import Sequence
+
+import pandas as pd
+
+import gho_indicators
+from engine.types import IndicatorCatalog
+
+# WHO GHO indicators from the indexed indicator store. The catalog is kept
+# until load_store() returns a new store, i.e. until a source file changes.
+
+_catalog = (None, None)   # (IndicatorStore, IndicatorCatalog built from it)
+
+
+def catalog() -> IndicatorCatalog:
+    global _catalog
+    store = gho_indicators.load_store()
+    cached_store, cached = _catalog
+    if cached_store is store:
+        return cached
+    names = store.codes()
+    dimension_names = {}
+    for code in names:
+        for dimension in store.dimensions(code):
+            dimension_names[(code, dimension)] = str(store.series(code, dimension)['Dimension_Name'].iloc[0])
+    numeric = tuple(code for code in names if store.is_numeric(code))
+    result = IndicatorCatalog(
+        names=names,
+        numeric=numeric,
+        policy=tuple(code for code in names if code not in numeric),
+        dimension_names=dimension_names,
+    )
+    _catalog = (store, result)
+    return result
+
+
+def series(code: str, dimensions: Sequence[str]) -> pd.DataFrame:
+    return gho_indicators.load_store().indicator_frame(code, list(dimensions))
+
+
+def policy_table(codes: Sequence[str]) -> pd.DataFrame:
+    store = gho_indicators.load_store()
+    frames = [store.indicator_frame(code) for code in codes]
+    if not frames:
+        return pd.DataFrame(columns=['Indicator', 'Year', 'Value'])
+    return pd.concat(frames, ignore_index=True)[['Indicator', 'Year', 'Value']]
@@ -0,0 +1,40 @@
+from typing import Sequence
+
+import pandas as pd
+
+from engine.types import Prediction, PredictionInput
+from lazy_imports import lazy_import
+
+# Depression score predictions from the trained model (loaded once per
+# process). scikit-learn is imported on first use. The model is trained
+# offline (python depression_model.py train); until an artifact exists,
+# available() is False and predictions raise depression_model.ModelUnavailable.
+
+depression_model = lazy_import('depression_model')
+
+
+def _frame(inputs: Sequence[PredictionInput]) -> pd.DataFrame:
+    return pd.DataFrame([{
+        'Age': item.age,
+        'Social_Media_Usage': item.social_media_usage,
+        'Physical_Activity': item.physical_activity,
+        'Sleep_Duration': item.sleep_duration,
+    } for item in inputs])
+
+
+def available() -> bool:
+    return depression_model.available()
+
+
+def predict_many(inputs: Sequence[PredictionInput]) -> list:
+    model = depression_model.load_model()
+    scores = model.predict_batch(_frame(inputs))
+    return [
+        Prediction(depression_score=float(score), model_version=model.version,
+                   mae=float(model.metrics['mae']), r2=float(model.metrics['r2']))
+        for score in scores
+    ]
+
+
+def predict(inputs: PredictionInput) -> Prediction:
+    return predict_many([inputs])[0]
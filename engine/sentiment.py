@@ -0,0 +1,55 @@
+import threading
+
+import pandas as pd
+
+import downsample
+import forum_store
+from engine.types import ChatReply, ForumSentiment
+from lazy_imports import lazy_import
+
+# Sentiment for chatbot messages and forum posts, through the cached scorer.
+
+sentiment_engine = lazy_import('sentiment_engine')
+
+POSITIVE_THRESHOLD = 0.1
+NEGATIVE_THRESHOLD = -0.1
+SCORE_BATCH = 10000
+
+_score_lock = threading.Lock()
+
+
+def chat_reply(message: str) -> ChatReply:
+    # Simulated chatbot response chosen by the message's polarity
+    sentiment = sentiment_engine.score(message)
+    if sentiment > POSITIVE_THRESHOLD:
+        response = "That's great to hear! How can I assist you further?"
+    elif sentiment < NEGATIVE_THRESHOLD:
+        response = "I'm sorry you're feeling this way. Please consider reaching out to a professional for support."
+    else:
+        response = "I understand. Could you please provide more details or specify how I can help you?"
+    return ChatReply(sentiment=sentiment, response=response)
+
+
+def score_new_posts() -> int:
+    # Stores the polarity of posts that have none yet; returns how many
+    scored = 0
+    with _score_lock:
+        while True:
+            pending = forum_store.unscored_posts(SCORE_BATCH)
+            if not pending:
+                return scored
+            scores = sentiment_engine.score_texts([content for _, content in pending])
+            forum_store.set_sentiments(zip((post_id for post_id, _ in pending), scores))
+            scored += len(pending)
+
+
+def forum_sentiment() -> ForumSentiment:
+    # Only posts added since the last view are scored; the trend is
+    # aggregated by SQLite from the stored polarities
+    score_new_posts()
+    trend = forum_store.sentiment_trend(downsample.DEFAULT_MAX_POINTS)
+    if not trend:
+        return ForumSentiment(posts=0, trend=None)
+    frame = pd.DataFrame(trend, columns=['Date', 'Sentiment'])
+    frame['Date'] = pd.to_datetime(frame['Date'])
+    return ForumSentiment(posts=forum_store.count_posts(), trend=frame)
@@ -0,0 +1,26 @@
+from typing import Optional
+
+from lazy_imports import lazy_import
+
+# Word frequencies and word-cloud images. Counters are updated per message
+# and images are cached by counter version, so unchanged text never
+# re-renders. render(fn, *args) runs the image layout elsewhere, e.g. in
+# the worker pool.
+
+word_frequencies = lazy_import('word_frequencies')
+
+
+def conversation_counter():
+    return word_frequencies.TokenCounter()
+
+
+def add_message(counter, text: str) -> None:
+    counter.add(text)
+
+
+def conversation_wordcloud(counter, render=None) -> Optional[bytes]:
+    return word_frequencies.wordcloud_png(counter, render=render)
+
+
+def forum_wordcloud(render=None) -> Optional[bytes]:
+    return word_frequencies.wordcloud_png(word_frequencies.forum_counter(), render=render)
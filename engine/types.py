@@ -0,0 +1,152 @@
+import datetime
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, Mapping, Optional, Tuple
+
+import pandas as pd
+
+# Inputs and results of the engine functions. Inputs are frozen and
+# hashable so they can key caches and be sent to worker processes; results
+# carry plain values or DataFrames ready to render.
+
+
+@dataclass(frozen=True)
+class Dataset:
+    name: str
+    version: str
+    frame: pd.DataFrame = field(compare=False, hash=False, repr=False)
+
+
+@dataclass(frozen=True)
+class FilterOptions:
+    regions: Tuple[str, ...]
+    genders: Tuple[str, ...]
+    date_min: datetime.date
+    date_max: datetime.date
+
+
+@dataclass(frozen=True)
+class FilterSpec:
+    regions: Tuple[str, ...]
+    genders: Tuple[str, ...]
+    age_range: Tuple[int, int]
+    date_range: Optional[Tuple[datetime.date, datetime.date]]
+
+    @classmethod
+    def create(cls, regions, genders, age_range, date_range) -> 'FilterSpec':
+        # Multiselect choices are order-insensitive. While a range is being
+        # picked, date_input returns a single date, which filters to that
+        # day; no dates at all means no date filter
+        dates = [pd.Timestamp(d).date() for d in (date_range or ())]
+        return cls(
+            regions=tuple(sorted(str(r) for r in regions)),
+            genders=tuple(sorted(str(g) for g in genders)),
+            age_range=(int(age_range[0]), int(age_range[1])),
+            date_range=(dates[0], dates[-1]) if dates else None,
+        )
+
+    def cube_filters(self) -> dict:
+        return dict(regions=self.regions, genders=self.genders, age_range=self.age_range, date_range=self.date_range)
+
+
+@dataclass(frozen=True)
+class ExportOptions:
+    format: str = 'csv'
+    view: str = 'rows'
+    compression: Optional[str] = None
+    row_limit: Optional[int] = None
+
+
+@dataclass(frozen=True)
+class Kpis:
+    count: int
+    means: Dict[str, float]
+    stds: Dict[str, float]
+
+
+@dataclass(frozen=True)
+class Overview:
+    kpis: Kpis
+    region_means: pd.DataFrame = field(compare=False, hash=False)
+
+
+@dataclass(frozen=True)
+class Demographics:
+    gender_counts: pd.DataFrame = field(compare=False, hash=False)
+    region_gender_counts: pd.DataFrame = field(compare=False, hash=False)
+
+
+@dataclass(frozen=True)
+class HomeSummary:
+    sunburst: dict = field(compare=False, hash=False)
+    summary: pd.DataFrame = field(compare=False, hash=False)
+    kpis: Dict[str, float] = field(compare=False, hash=False)
+
+
+@dataclass(frozen=True)
+class PredictionInput:
+    age: int
+    social_media_usage: float
+    physical_activity: float
+    sleep_duration: float
+
+
+@dataclass(frozen=True)
+class Prediction:
+    depression_score: float
+    model_version: int
+    mae: float
+    r2: float
+
+
+@dataclass(frozen=True)
+class ChatReply:
+    sentiment: float
+    response: str
+
+
+@dataclass(frozen=True)
+class CorrelationStats:
+    rows: int
+    estimates: Dict[str, pd.DataFrame] = field(compare=False, hash=False)
+    intervals: Dict[str, pd.DataFrame] = field(compare=False, hash=False)
+
+
+@dataclass(frozen=True)
+class IndicatorCatalog:
+    names: Dict[str, str]
+    numeric: Tuple[str, ...]
+    policy: Tuple[str, ...]
+    dimension_names: Dict[Tuple[str, str], str]
+
+    def dimensions(self, code: str) -> Tuple[str, ...]:
+        return tuple(dimension for c, dimension in self.dimension_names if c == code)
+
+
+@dataclass(frozen=True)
+class ForumSentiment:
+    posts: int
+    trend: Optional[pd.DataFrame] = field(compare=False, hash=False)
+
+
+@dataclass(frozen=True)
+class Cohort:
+    name: str
+    conditions: Tuple[Tuple[str, Tuple[str, ...]], ...] = ()
+
+    @classmethod
+    def create(cls, name, conditions: Mapping[str, Iterable[str]]) -> 'Cohort':
+        # Conditions are order-insensitive; empty selections mean no condition
+        return cls(name=name, conditions=tuple(
+            (str(column), tuple(sorted(str(v) for v in values)))
+            for column, values in sorted(conditions.items()) if values
+        ))
+
+    def as_dict(self) -> Dict[str, Tuple[str, ...]]:
+        return dict(self.conditions)
+
+
+@dataclass(frozen=True)
+class CohortComparison:
+    by: Tuple[str, ...]
+    table: pd.DataFrame = field(compare=False, hash=False)
+    skipped: Tuple[Tuple[Optional[str], str, str], ...] = ()   # (cohort or None for all, dataset, reason)
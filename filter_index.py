@@ -0,0 +1,153 @@
+import threading
+import weakref
+
+import numpy as np
+import pandas as pd
+
+# Precomputed filter index for the Data Visualization sidebar filters.
+#
+# Rows are pre-sorted on Date so a date range is a contiguous slice found by
+# binary search. Region and Gender keep one packed bitmap per category and Age
+# keeps one bitmap per integer age bucket; a query ORs the selected bitmaps
+# within each filter, ANDs across filters, and only touches the bytes that
+# fall inside the date slice.
+#
+# Rows with a missing category or age get a bitmap of their own under the
+# MISSING key. An age range never selects it; a category selection does when
+# it contains a missing value (None or NaN). Keeping those rows in a bitmap
+# makes the complement path exclude them exactly as the direct path does.
+# Matching positions are returned in the frame's row order.
+
+MISSING = None
+
+
+def _packed(mask):
+    return np.packbits(mask)
+
+
+class FilterIndex:
+    def __init__(self, frame, date_column='Date', category_columns=('Region', 'Gender'), age_column='Age'):
+        self._frame = weakref.ref(frame)
+        self.n_rows = len(frame)
+        dates = pd.to_datetime(frame[date_column]).to_numpy(dtype='datetime64[ns]')
+        self.order = np.argsort(dates, kind='stable')
+        self.sorted_dates = dates[self.order]
+
+        # Positions come back in row order; skip the sort when rows already
+        # are in date order
+        self.in_order = bool(np.all(self.order[1:] > self.order[:-1]))
+
+        self.bitmaps = {}
+        for column in category_columns:
+            values = pd.Categorical(frame[column])
+            codes = values.codes[self.order]
+            self.bitmaps[column] = {
+                category: _packed(codes == code)
+                for code, category in enumerate(values.categories)
+            }
+            if (codes < 0).any():
+                self.bitmaps[column][MISSING] = _packed(codes < 0)
+
+        # Integer age buckets; fractional ages fall into the bucket below
+        ages = np.floor(frame[age_column].to_numpy(dtype=np.float64))[self.order]
+        missing = np.isnan(ages)
+        self.age_buckets = {int(age): _packed(ages == age) for age in np.unique(ages[~missing])}
+        if missing.any():
+            self.age_buckets[MISSING] = _packed(missing)
+        self.age_column = age_column
+
+    @property
+    def frame(self):
+        return self._frame()
+
+    def categories(self, column):
+        return [category for category in self.bitmaps[column] if category is not MISSING]
+
+    def _date_slice(self, date_range):
+        if date_range is None:
+            return 0, self.n_rows
+        start = np.datetime64(pd.Timestamp(date_range[0]), 'ns')
+        end = np.datetime64(pd.Timestamp(date_range[1]), 'ns')
+        lo = np.searchsorted(self.sorted_dates, start, side='left')
+        hi = np.searchsorted(self.sorted_dates, end, side='right')
+        return int(lo), int(hi)
+
+    @staticmethod
+    def _union(bitmaps, byte_lo, byte_hi):
+        result = None
+        for bitmap in bitmaps:
+            part = bitmap[byte_lo:byte_hi]
+            result = part.copy() if result is None else np.bitwise_or(result, part, out=result)
+        return result
+
+    def _restrict(self, mask, bitmaps, chosen, byte_lo, byte_hi):
+        # ANDs the union of the chosen buckets into `mask` and returns whether
+        # any rows can still match. Choosing every bucket is a no-op, and when
+        # most buckets are chosen the complement is cheaper to OR together.
+        if len(chosen) == len(bitmaps):
+            return True
+        if not chosen:
+            return False
+        if len(chosen) * 2 <= len(bitmaps):
+            np.bitwise_and(mask, self._union([bitmaps[key] for key in chosen], byte_lo, byte_hi), out=mask)
+        else:
+            rest = [bitmaps[key] for key in bitmaps if key not in chosen]
+            np.bitwise_and(mask, np.invert(self._union(rest, byte_lo, byte_hi)), out=mask)
+        return True
+
+    def _result(self, positions):
+        return positions if self.in_order else np.sort(positions)
+
+    def positions(self, filters=None, age_range=None, date_range=None):
+        # Returns the positional row indices (in row order) matching the
+        # query. `filters` maps a category column to the selected values;
+        # None means "no restriction" and an empty selection matches nothing.
+        lo, hi = self._date_slice(date_range)
+        if hi <= lo:
+            return np.empty(0, dtype=np.int64)
+        byte_lo, byte_hi = lo // 8, (hi + 7) // 8
+        mask = np.full(byte_hi - byte_lo, 0xFF, dtype=np.uint8)
+        restricted = False
+
+        for column, selected in (filters or {}).items():
+            if selected is None:
+                continue
+            bitmaps = self.bitmaps[column]
+            selected = list(selected)
+            chosen = {key for key in selected if key in bitmaps and key is not MISSING}
+            if MISSING in bitmaps and any(pd.isna(key) for key in selected):
+                chosen.add(MISSING)
+            if not self._restrict(mask, bitmaps, chosen, byte_lo, byte_hi):
+                return np.empty(0, dtype=np.int64)
+            restricted = restricted or len(chosen) < len(bitmaps)
+
+        if age_range is not None:
+            chosen = {age for age in self.age_buckets if age is not MISSING and age_range[0] <= age <= age_range[1]}
+            if not self._restrict(mask, self.age_buckets, chosen, byte_lo, byte_hi):
+                return np.empty(0, dtype=np.int64)
+            restricted = restricted or len(chosen) < len(self.age_buckets)
+
+        if not restricted:
+            return self._result(self.order[lo:hi])
+        bits = np.unpackbits(mask, count=hi - byte_lo * 8)[lo - byte_lo * 8:]
+        return self._result(self.order[lo + np.flatnonzero(bits)])
+
+    def query(self, filters=None, age_range=None, date_range=None):
+        return self.frame.take(self.positions(filters, age_range, date_range))
+
+
+_indexes = {}
+_lock = threading.Lock()
+
+
+def index_for(frame, **kwargs):
+    # Returns the FilterIndex for a frame, building it on first use. The index
+    # only holds a weak reference to the frame and is dropped with it.
+    key = id(frame)
+    with _lock:
+        index = _indexes.get(key)
+        if index is None or index.frame is not frame:
+            index = FilterIndex(frame, **kwargs)
+            _indexes[key] = index
+            weakref.finalize(frame, _indexes.pop, key, None)
+        return index
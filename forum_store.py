@@ -0,0 +1,184 @@
+import datetime
+import os
+import sqlite3
+import threading
+
+# Persistent, shared store for community forum posts.
+#
+# Posts live in a SQLite database in WAL mode, so every session and process
+# sees the same posts and readers never block the (append-only) writer.
+# Posts are indexed by (timestamp, id) and "Recent Posts" pages with a
+# keyset cursor instead of OFFSET, so each page costs the same at any depth.
+#
+# Each post also stores its sentiment polarity, filled in by id the first
+# time it is needed (engine.sentiment) through a partial index over the
+# unscored posts, so the sentiment trend is one aggregate query and old posts
+# are never scored again.
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+DB_PATH = os.environ.get('MH_FORUM_DB', os.path.join(BASE_DIR, 'forum.db'))
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS posts (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    username TEXT NOT NULL,
+    content TEXT NOT NULL,
+    timestamp TEXT NOT NULL,
+    sentiment REAL
+);
+CREATE INDEX IF NOT EXISTS posts_timestamp ON posts (timestamp, id);
+"""
+
+# Run after adding the sentiment column to databases created before it
+INDEXES = """
+CREATE INDEX IF NOT EXISTS posts_unscored ON posts (id) WHERE sentiment IS NULL;
+"""
+
+_local = threading.local()
+_init_lock = threading.Lock()
+_initialized = set()
+
+
+def _connect(path):
+    conn = sqlite3.connect(path, timeout=30)
+    conn.row_factory = sqlite3.Row
+    conn.execute('PRAGMA journal_mode=WAL')
+    conn.execute('PRAGMA synchronous=NORMAL')
+    conn.execute('PRAGMA busy_timeout=30000')
+    with _init_lock:
+        if path not in _initialized:
+            conn.executescript(SCHEMA)
+            columns = {row['name'] for row in conn.execute('PRAGMA table_info(posts)')}
+            if 'sentiment' not in columns:
+                conn.execute('ALTER TABLE posts ADD COLUMN sentiment REAL')
+            conn.executescript(INDEXES)
+            _initialized.add(path)
+    return conn
+
+
+def connection(path=None):
+    # One connection per thread and database; sqlite3 connections are not
+    # shared across threads
+    path = path or DB_PATH
+    connections = getattr(_local, 'connections', None)
+    if connections is None:
+        connections = _local.connections = {}
+    if path not in connections:
+        connections[path] = _connect(path)
+    return connections[path]
+
+
+def _post(row):
+    return {'id': row['id'], 'username': row['username'], 'content': row['content'], 'timestamp': row['timestamp']}
+
+
+def add_post(username, content, timestamp=None, path=None):
+    timestamp = timestamp or datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    conn = connection(path)
+    with conn:
+        cursor = conn.execute(
+            'INSERT INTO posts (username, content, timestamp) VALUES (?, ?, ?)',
+            (username, content, timestamp),
+        )
+    return {'id': cursor.lastrowid, 'username': username, 'content': content, 'timestamp': timestamp}
+
+
+def add_posts(posts, path=None):
+    # Bulk append, e.g. when importing a forum export
+    conn = connection(path)
+    with conn:
+        conn.executemany(
+            'INSERT INTO posts (username, content, timestamp) VALUES (?, ?, ?)',
+            ((p['username'], p['content'], p['timestamp']) for p in posts),
+        )
+
+
+def recent_posts(limit=10, cursor=None, path=None):
+    # Returns (posts newest first, cursor for the next older page or None).
+    # The cursor is the (timestamp, id) of the last post on this page.
+    conn = connection(path)
+    if cursor is None:
+        rows = conn.execute(
+            'SELECT * FROM posts ORDER BY timestamp DESC, id DESC LIMIT ?', (limit + 1,)
+        ).fetchall()
+    else:
+        rows = conn.execute(
+            'SELECT * FROM posts WHERE (timestamp, id) < (?, ?) ORDER BY timestamp DESC, id DESC LIMIT ?',
+            (cursor[0], cursor[1], limit + 1),
+        ).fetchall()
+    posts = [_post(row) for row in rows[:limit]]
+    next_cursor = (posts[-1]['timestamp'], posts[-1]['id']) if len(rows) > limit else None
+    return posts, next_cursor
+
+
+def iter_posts(batch_size=10000, since=None, path=None):
+    # Streams posts oldest first in keyset-paged batches
+    conn = connection(path)
+    last = (since or '', 0)
+    while True:
+        rows = conn.execute(
+            'SELECT * FROM posts WHERE (timestamp, id) > (?, ?) ORDER BY timestamp, id LIMIT ?',
+            (last[0], last[1], batch_size),
+        ).fetchall()
+        if not rows:
+            return
+        for row in rows:
+            yield _post(row)
+        last = (rows[-1]['timestamp'], rows[-1]['id'])
+
+
+def count_posts(path=None):
+    return connection(path).execute('SELECT COUNT(*) FROM posts').fetchone()[0]
+
+
+def iter_new_posts(after_id=0, batch_size=10000, path=None):
+    # Streams posts in insertion order with id > after_id; used by consumers
+    # that keep incremental state over the append-only log
+    conn = connection(path)
+    while True:
+        rows = conn.execute(
+            'SELECT * FROM posts WHERE id > ? ORDER BY id LIMIT ?', (after_id, batch_size)
+        ).fetchall()
+        if not rows:
+            return
+        for row in rows:
+            yield _post(row)
+        after_id = rows[-1]['id']
+
+
+def unscored_posts(limit=10000, path=None):
+    # [(id, content)] of the oldest posts without a stored polarity
+    rows = connection(path).execute(
+        'SELECT id, content FROM posts WHERE sentiment IS NULL ORDER BY id LIMIT ?', (limit,)
+    ).fetchall()
+    return [(row['id'], row['content']) for row in rows]
+
+
+def set_sentiments(scores, path=None):
+    # scores: iterable of (post id, polarity)
+    conn = connection(path)
+    with conn:
+        conn.executemany('UPDATE posts SET sentiment = ? WHERE id = ?', ((float(s), i) for i, s in scores))
+
+
+def sentiment_trend(max_points=1000, path=None):
+    # [(timestamp, polarity)] oldest first over the scored posts: every post
+    # when there are at most max_points, otherwise the mean polarity per
+    # equal-width time bucket (timestamp of the bucket's first post)
+    conn = connection(path)
+    count, first, last = conn.execute(
+        'SELECT COUNT(*), MIN(timestamp), MAX(timestamp) FROM posts WHERE sentiment IS NOT NULL'
+    ).fetchone()
+    if count <= max_points:
+        rows = conn.execute(
+            'SELECT timestamp, sentiment FROM posts WHERE sentiment IS NOT NULL ORDER BY timestamp, id'
+        ).fetchall()
+    else:
+        span = conn.execute('SELECT julianday(?) - julianday(?)', (last, first)).fetchone()[0] or 0.0
+        scale = (max_points - 1) / span if span > 0 else 0.0
+        rows = conn.execute(
+            'SELECT MIN(timestamp), AVG(sentiment) FROM posts WHERE sentiment IS NOT NULL '
+            'GROUP BY CAST((julianday(timestamp) - julianday(?)) * ? AS INTEGER) ORDER BY 1',
+            (first, scale),
+        ).fetchall()
+    return [(row[0], row[1]) for row in rows]
@@ -0,0 +1,332 @@
+import json
+import os
+import re
+import threading
+
+import numpy as np
+import plotly.express as px
+
+# Rwanda administrative boundaries for the dashboard maps.
+#
+# Full-resolution province (ADM1) GeoJSON is fetched once with
+# tools/fetch_boundaries.py into geo/source/ (not committed). build()
+# simplifies the boundaries at each zoom tolerance, rounds coordinates and
+# writes the compact files bundled with the app:
+#     geo/rwanda_<level>_<zoom>.geojson
+# The bundled files are the schematic shapes from fetch_boundaries.py
+# --schematic (features carry source='schematic') until they are rebuilt
+# from geoBoundaries.
+#
+# Simplification is topology-aware, as in TopoJSON: rings are cut into arcs
+# wherever the set of rings sharing a vertex changes, each distinct arc is
+# simplified once with Douglas-Peucker (endpoints fixed), and the rings are
+# reassembled from the simplified arcs. A border shared by two provinces is
+# therefore simplified identically for both, with no gaps or overlaps.
+# Each feature's id is the canonical province name used by the datasets
+# ('Eastern', 'Kigali', ...), so aggregates join on it directly via
+# featureidkey='id'. Loaded shapes are kept in memory per process.
+#
+# When the shapes are missing the map falls back to markers at the province
+# centroids instead of rendering an empty figure.
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+GEO_DIR = os.environ.get('MH_GEO_DIR', os.path.join(BASE_DIR, 'geo'))
+SOURCE_DIR = os.path.join(GEO_DIR, 'source')
+
+LEVELS = {'province': 'ADM1'}
+
+# Douglas-Peucker tolerance (degrees) and coordinate precision per zoom level
+ZOOMS = {
+    'low': (0.01, 3),
+    'medium': (0.002, 4),
+    'high': (0.0005, 5),
+}
+DEFAULT_ZOOM = 'medium'
+
+PROVINCE_NAMES = {
+    'kigali': 'Kigali', 'kigali city': 'Kigali', 'city of kigali': 'Kigali', 'umujyi wa kigali': 'Kigali',
+    'eastern': 'Eastern', 'iburasirazuba': 'Eastern',
+    'northern': 'Northern', 'amajyaruguru': 'Northern',
+    'southern': 'Southern', 'amajyepfo': 'Southern',
+    'western': 'Western', 'iburengerazuba': 'Western',
+}
+
+# Approximate province centroids (lat, lon) for the fallback map
+PROVINCE_CENTROIDS = {
+    'Kigali': (-1.95, 30.09),
+    'Northern': (-1.62, 29.95),
+    'Southern': (-2.45, 29.70),
+    'Eastern': (-1.90, 30.50),
+    'Western': (-2.10, 29.35),
+}
+RWANDA_BOUNDS = ([-2.9, -1.0], [28.8, 31.0])
+
+_shapes = {}
+_lock = threading.Lock()
+
+
+def canonical_name(name):
+    # 'Eastern Province', 'Iburasirazuba' -> 'Eastern'
+    text = re.sub(r'\s+', ' ', str(name)).strip()
+    key = re.sub(r'\s+province$', '', text.lower())
+    return PROVINCE_NAMES.get(key, text)
+
+
+def _point_segment_distances(points, start, end):
+    segment = end - start
+    length = np.dot(segment, segment)
+    if length == 0:
+        return np.hypot(*(points - start).T)
+    t = np.clip(((points - start) @ segment) / length, 0.0, 1.0)
+    projection = start + t[:, None] * segment
+    return np.hypot(*(points - projection).T)
+
+
+def douglas_peucker(points, tolerance):
+    # Returns the kept subset of an (n, 2) coordinate array
+    points = np.asarray(points, dtype=np.float64)
+    if len(points) < 3:
+        return points
+    keep = np.zeros(len(points), dtype=bool)
+    keep[0] = keep[-1] = True
+    stack = [(0, len(points) - 1)]
+    while stack:
+        first, last = stack.pop()
+        if last - first < 2:
+            continue
+        distances = _point_segment_distances(points[first + 1:last], points[first], points[last])
+        i = int(np.argmax(distances))
+        if distances[i] > tolerance:
+            split = first + 1 + i
+            keep[split] = True
+            stack.append((first, split))
+            stack.append((split, last))
+    return points[keep]
+
+
+def simplify_ring(ring, tolerance, precision):
+    # Closed rings are split at their farthest point so the first/last vertex
+    # does not anchor a zero-length segment. Returns None if the ring
+    # collapses below a triangle.
+    points = np.asarray(ring, dtype=np.float64)[:, :2]
+    if len(points) < 4:
+        return None
+    far = int(np.argmax(np.hypot(*(points - points[0]).T)))
+    first = douglas_peucker(points[:far + 1], tolerance)
+    second = douglas_peucker(points[far:], tolerance)
+    simplified = np.round(np.vstack([first, second[1:]]), precision)
+    simplified = simplified[np.r_[True, np.any(np.diff(simplified, axis=0) != 0, axis=1)]]
+    if len(simplified) < 4:
+        return None
+    return simplified.tolist()
+
+
+def _open_ring(ring):
+    points = [tuple(point[:2]) for point in ring]
+    if len(points) > 1 and points[0] == points[-1]:
+        points = points[:-1]
+    return points
+
+
+def _finish_ring(points, precision):
+    # Rounds, drops repeated vertices and closes; None below a triangle
+    simplified = np.round(np.asarray(points, dtype=np.float64), precision)
+    simplified = simplified[np.r_[True, np.any(np.diff(simplified, axis=0) != 0, axis=1)]]
+    if len(simplified) and np.array_equal(simplified[0], simplified[-1]):
+        simplified = simplified[:-1]
+    if len(simplified) < 3:
+        return None
+    return np.vstack([simplified, simplified[:1]]).tolist()
+
+
+def _canonical_ring(points):
+    # Rotation and direction shared by every copy of a closed ring, so an
+    # enclave's outline and the matching hole simplify the same way.
+    # Returns (canonical points, whether the ring was reversed)
+    start = min(range(len(points)), key=points.__getitem__)
+    forward = points[start:] + points[:start]
+    backward = [forward[0]] + forward[:0:-1]
+    return (backward, True) if backward[1] < forward[1] else (forward, False)
+
+
+def simplify_rings(rings, tolerance, precision):
+    # Simplifies GeoJSON rings that may share borders; returns the rings in
+    # the same order, None for rings that collapse below a triangle
+    rings = [_open_ring(ring) for ring in rings]
+    owners = {}
+    for index, ring in enumerate(rings):
+        for point in ring:
+            owners.setdefault(point, set()).add(index)
+
+    arcs = {}
+
+    def simplify_arc(arc):
+        key = tuple(arc)
+        if key not in arcs:
+            reverse = key[::-1]
+            if reverse in arcs:
+                return arcs[reverse][::-1]
+            arcs[key] = douglas_peucker(arc, tolerance)
+        return arcs[key]
+
+    closed = {}
+    result = []
+    for ring in rings:
+        n = len(ring)
+        if n < 3:
+            result.append(None)
+            continue
+        cuts = [i for i in range(n)
+                if owners[ring[i]] != owners[ring[i - 1]] or owners[ring[i]] != owners[ring[(i + 1) % n]]]
+        if not cuts:
+            # No shared border endpoints: simplify the whole ring as one arc
+            canonical, reversed_ = _canonical_ring(ring)
+            key = tuple(canonical)
+            if key not in closed:
+                closed[key] = simplify_ring(canonical + canonical[:1], tolerance, precision)
+            simplified = closed[key]
+            if simplified is not None and reversed_:
+                simplified = simplified[::-1]
+            result.append(simplified)
+            continue
+        points = []
+        for a, b in zip(cuts, cuts[1:] + [cuts[0] + n]):
+            arc = [ring[i % n] for i in range(a, b + 1)]
+            points.extend(simplify_arc(arc)[:-1].tolist())
+        result.append(_finish_ring(points, precision))
+    return result
+
+
+def _polygons(geometry):
+    if geometry['type'] == 'Polygon':
+        return [geometry['coordinates']]
+    if geometry['type'] == 'MultiPolygon':
+        return geometry['coordinates']
+    return None
+
+
+def _assemble(polygons, simplified_polygons, precision):
+    simplified = []
+    for rings in simplified_polygons:
+        if rings[0] is None:
+            continue
+        simplified.append([rings[0]] + [ring for ring in rings[1:] if ring is not None])
+    if not simplified:
+        # Keep the largest polygon at full resolution rather than drop the feature
+        largest = max(polygons, key=lambda polygon: len(polygon[0]))
+        simplified = [[np.round(np.asarray(ring)[:, :2], precision).tolist() for ring in largest]]
+    if len(simplified) == 1:
+        return {'type': 'Polygon', 'coordinates': simplified[0]}
+    return {'type': 'MultiPolygon', 'coordinates': simplified}
+
+
+def simplify_geometry(geometry, tolerance, precision):
+    # One geometry on its own; borders are only shared within it
+    polygons = _polygons(geometry)
+    if polygons is None:
+        return geometry
+    rings = iter(simplify_rings([ring for polygon in polygons for ring in polygon], tolerance, precision))
+    return _assemble(polygons, [[next(rings) for _ in polygon] for polygon in polygons], precision)
+
+
+def simplify_geojson(geojson, tolerance, precision):
+    # Simplifies all features together so shared borders stay shared
+    geometries = [_polygons(feature['geometry']) for feature in geojson['features']]
+    rings = iter(simplify_rings(
+        [ring for polygons in geometries if polygons for polygon in polygons for ring in polygon], tolerance, precision))
+    features = []
+    for feature, polygons in zip(geojson['features'], geometries):
+        properties = feature.get('properties') or {}
+        name = properties.get('shapeName') or properties.get('name') or properties.get('NAME_1') or feature.get('id')
+        feature_id = canonical_name(name)
+        if polygons is None:
+            geometry = feature['geometry']
+        else:
+            geometry = _assemble(polygons, [[next(rings) for _ in polygon] for polygon in polygons], precision)
+        output_properties = {'name': feature_id, 'source_name': name}
+        if 'source' in properties:
+            output_properties['source'] = properties['source']
+        features.append({
+            'type': 'Feature',
+            'id': feature_id,
+            'properties': output_properties,
+            'geometry': geometry,
+        })
+    return {'type': 'FeatureCollection', 'features': features}
+
+
+def source_path(level):
+    return os.path.join(SOURCE_DIR, f'rwanda_{LEVELS[level].lower()}.geojson')
+
+
+def shape_path(level, zoom):
+    return os.path.join(GEO_DIR, f'rwanda_{level}_{zoom}.geojson')
+
+
+def build(levels=LEVELS, zooms=ZOOMS):
+    # Writes the simplified shapes for every level with a source file
+    written = []
+    for level in levels:
+        path = source_path(level)
+        if not os.path.exists(path):
+            continue
+        with open(path) as f:
+            geojson = json.load(f)
+        for zoom in zooms:
+            tolerance, precision = ZOOMS[zoom]
+            simplified = simplify_geojson(geojson, tolerance, precision)
+            target = shape_path(level, zoom)
+            tmp_path = f'{target}.{os.getpid()}.tmp'
+            with open(tmp_path, 'w') as f:
+                json.dump(simplified, f, separators=(',', ':'))
+            os.replace(tmp_path, target)
+            written.append(target)
+    with _lock:
+        _shapes.clear()
+    return written
+
+
+def available(level='province'):
+    # True when simplified shapes have been built for the level
+    return any(os.path.exists(shape_path(level, zoom)) for zoom in ZOOMS)
+
+
+def load_shapes(level='province', zoom=DEFAULT_ZOOM):
+    # Returns the simplified FeatureCollection, or None when not bundled
+    key = (level, zoom)
+    with _lock:
+        if key in _shapes:
+            return _shapes[key]
+    try:
+        with open(shape_path(level, zoom)) as f:
+            shapes = json.load(f)
+    except (OSError, ValueError):
+        shapes = None
+    with _lock:
+        _shapes[key] = shapes
+    return shapes
+
+
+def choropleth(frame, locations, color, level='province', zoom=DEFAULT_ZOOM, **kwargs):
+    # Choropleth of per-region aggregates joined to the shapes by feature id
+    frame = frame.copy()
+    frame[locations] = frame[locations].map(canonical_name)
+    shapes = load_shapes(level, zoom)
+    if shapes is not None:
+        fig = px.choropleth(frame, geojson=shapes, locations=locations, featureidkey='id', color=color, **kwargs)
+        fig.update_geos(fitbounds='locations', visible=False)
+        return fig
+
+    frame = frame[frame[locations].isin(list(PROVINCE_CENTROIDS))]
+    frame['lat'] = frame[locations].map(lambda name: PROVINCE_CENTROIDS[name][0])
+    frame['lon'] = frame[locations].map(lambda name: PROVINCE_CENTROIDS[name][1])
+    size = frame[color] - frame[color].min() + 1 if len(frame) else None
+    fig = px.scatter_geo(frame, lat='lat', lon='lon', color=color, size=size, hover_name=locations,
+                         **{k: v for k, v in kwargs.items() if k in ('color_continuous_scale', 'labels', 'title')})
+    fig.update_geos(lataxis_range=RWANDA_BOUNDS[0], lonaxis_range=RWANDA_BOUNDS[1], showcountries=True, countrycolor='#888888')
+    return fig
+
+
+if __name__ == '__main__':
+    for path in build():
+        print(f"{path}: {os.path.getsize(path)} bytes")
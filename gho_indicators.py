@@ -0,0 +1,198 @@
+import os
+import re
+import threading
+
+import numpy as np
+import pandas as pd
+
+import data_store
+
+# WHO Global Health Observatory indicators for Rwanda.
+#
+# GHO exports carry an HXL tag row ('#indicator+code,...') under the header
+# and a display Value such as '4.8 [2.8-7.8]' whose Numeric/Low/High columns
+# are sometimes left empty. The exports are parsed once into a compact
+# columnar table (data_store format, memory-mapped) sorted by
+# (code, dimension, year), and IndicatorStore keeps two dict indexes over it:
+#     (code, year, dimension) -> row
+#     (code, dimension)       -> slice of rows, i.e. a ready time series
+# so every chart lookup is a dict hit plus a slice, with no parsing per
+# request. Rows without a dimension (e.g. policy indicators) use TOTAL.
+#
+# Some exports hold several rows per (code, year, dimension) for a breakdown
+# that is not in the file: SDGSUICIDE 2019 has twelve rows per sex, one per
+# age group plus the all-ages rate, with no age column. The build keeps one
+# row per key, preferring the row with an uncertainty interval (the all-ages
+# estimate, as in every other year), and records the dropped rows per key
+# in the store meta ('duplicates').
+
+SOURCES = ['who_mental_health', 'who_dementia']
+STORE_NAME = 'gho_indicators'
+STORE_FORMAT = 2
+KEY = ['Code', 'Year', 'Dimension']
+TOTAL = 'TOTAL'
+
+COLUMNS = {
+    'GHO (CODE)': 'Code',
+    'GHO (DISPLAY)': 'Indicator',
+    'YEAR (DISPLAY)': 'Year',
+    'DIMENSION (TYPE)': 'Dimension_Type',
+    'DIMENSION (CODE)': 'Dimension',
+    'DIMENSION (NAME)': 'Dimension_Name',
+    'Numeric': 'Numeric',
+    'Value': 'Value',
+    'Low': 'Low',
+    'High': 'High',
+}
+
+_VALUE = re.compile(r'^\s*(-?[\d.]+)\s*(?:\[\s*(-?[\d.]+)\s*-\s*(-?[\d.]+)\s*\])?\s*$')
+
+
+def parse_value(value):
+    # '4.8 [2.8-7.8]' -> (4.8, 2.8, 7.8); '5.8' -> (5.8, nan, nan);
+    # text values such as 'Yes' -> (nan, nan, nan)
+    match = _VALUE.match(str(value)) if pd.notna(value) else None
+    if match is None:
+        return np.nan, np.nan, np.nan
+    numeric, low, high = match.groups()
+    return float(numeric), float(low) if low else np.nan, float(high) if high else np.nan
+
+
+def parse_source(name):
+    # Reads one GHO export (HXL row skipped by data_store.read_source) into
+    # the normalized indicator layout
+    raw = data_store.read_source(name)
+    frame = raw[list(COLUMNS)].rename(columns=COLUMNS)
+    parsed = np.array([parse_value(v) for v in frame['Value']], dtype=np.float64).reshape(-1, 3)
+    for i, column in enumerate(['Numeric', 'Low', 'High']):
+        values = pd.to_numeric(frame[column], errors='coerce').to_numpy(dtype=np.float64)
+        frame[column] = np.where(np.isnan(values), parsed[:, i], values)
+    for column in ['Dimension_Type', 'Dimension', 'Dimension_Name']:
+        frame[column] = frame[column].astype(object).where(frame[column].notna(), None)
+    frame['Dimension'] = frame['Dimension'].fillna(TOTAL)
+    frame['Dimension_Name'] = frame['Dimension_Name'].fillna('Total')
+    frame['Dimension_Type'] = frame['Dimension_Type'].fillna(TOTAL)
+    frame['Value'] = frame['Value'].astype(str)
+    frame['Year'] = frame['Year'].astype(np.int32)
+    frame['Source'] = name
+    return frame
+
+
+def drop_duplicate_keys(frame):
+    # Returns (frame sorted by code, dimension and year with one row per
+    # KEY, {'code/year/dimension': rows dropped})
+    no_interval = (frame['Low'].isna() | frame['High'].isna()).to_numpy()
+    frame = frame.assign(_rank=no_interval).sort_values(['Code', 'Dimension', 'Year', '_rank'], kind='stable')
+    duplicated = frame.duplicated(KEY, keep='first')
+    dropped = frame[duplicated].groupby(KEY, sort=True).size()
+    report = {f'{code}/{year}/{dimension}': int(count) for (code, year, dimension), count in dropped.items()}
+    return frame[~duplicated].drop(columns='_rank').reset_index(drop=True), report
+
+
+def build(sources=SOURCES, force=False):
+    # Writes the merged, sorted indicator table unless it is up to date
+    available = [name for name in sources if data_store.dataset_available(name)]
+    signature = _source_versions(available)
+    store_dir = os.path.join(data_store.STORE_DIR, STORE_NAME)
+    meta = data_store.read_meta(store_dir)
+    if force or meta is None or meta.get('sources') != signature or meta.get('format') != STORE_FORMAT:
+        frames = [parse_source(name) for name in available]
+        frame = pd.concat(frames, ignore_index=True) if frames else pd.DataFrame(columns=list(COLUMNS.values()) + ['Source'])
+        frame, duplicates = drop_duplicate_keys(frame)
+        for column in ['Code', 'Indicator', 'Dimension_Type', 'Dimension', 'Dimension_Name', 'Source']:
+            frame[column] = frame[column].astype('category')
+        data_store.write_frame(frame, store_dir, {'sources': signature, 'format': STORE_FORMAT, 'duplicates': duplicates})
+    return store_dir
+
+
+class IndicatorStore:
+    def __init__(self, frame, duplicates=None):
+        self.frame = frame
+        self.duplicates = dict(duplicates or {})   # key -> rows dropped at build time
+        codes = frame['Code'].astype(str).to_numpy()
+        dimensions = frame['Dimension'].astype(str).to_numpy()
+        years = frame['Year'].to_numpy()
+        self._rows = {}
+        self._series = {}
+        self._names = {}
+        for row, (code, dimension, year) in enumerate(zip(codes, dimensions, years)):
+            self._rows[(code, int(year), dimension)] = row
+            start, _ = self._series.get((code, dimension), (row, row))
+            self._series[(code, dimension)] = (start, row + 1)
+        indicators = frame['Indicator'].astype(str).to_numpy()
+        for code, name in zip(codes, indicators):
+            self._names.setdefault(code, name)
+        numeric = frame['Numeric'].notna().to_numpy()
+        self._numeric = set(codes[numeric])
+
+    def codes(self):
+        return dict(self._names)
+
+    def is_numeric(self, code):
+        # False for text-only indicators such as policy Yes/No values
+        return code in self._numeric
+
+    def dimensions(self, code):
+        return [dimension for c, dimension in self._series if c == code]
+
+    def lookup(self, code, year, dimension=TOTAL):
+        # Returns the indicator row as a dict, or None
+        row = self._rows.get((code, int(year), dimension))
+        if row is None:
+            return None
+        return {column: _scalar(self.frame[column].iloc[row]) for column in self.frame.columns}
+
+    def series(self, code, dimension=TOTAL):
+        # Year-ordered rows of one indicator and dimension
+        bounds = self._series.get((code, dimension))
+        if bounds is None:
+            return self.frame.iloc[0:0]
+        return self.frame.iloc[bounds[0]:bounds[1]]
+
+    def indicator_frame(self, code, dimensions=None):
+        # Concatenated series for charting, one line per dimension
+        dimensions = dimensions if dimensions is not None else self.dimensions(code)
+        parts = [self.series(code, dimension) for dimension in dimensions]
+        parts = [part for part in parts if len(part)]
+        if not parts:
+            return self.frame.iloc[0:0]
+        frame = pd.concat(parts, ignore_index=True)
+        for column in ['Code', 'Indicator', 'Dimension', 'Dimension_Name', 'Dimension_Type', 'Source']:
+            frame[column] = frame[column].astype(str)
+        return frame
+
+
+def _scalar(value):
+    return value.item() if isinstance(value, np.generic) else value
+
+
+_loaded = (None, None)   # (source versions, IndicatorStore)
+_lock = threading.Lock()
+
+
+def _source_versions(sources=SOURCES):
+    return {name: data_store.dataset_version(name) for name in sources if data_store.dataset_available(name)}
+
+
+def load_store():
+    # Process-wide IndicatorStore; rebuilt only when a source file changes.
+    # An unchanged store costs one stat per source and no lock
+    global _loaded
+    version, store = _loaded
+    if store is not None and version == _source_versions():
+        return store
+    with _lock:
+        store_dir = build()
+        meta = data_store.read_meta(store_dir)
+        if _loaded[1] is None or meta.get('sources') != _loaded[0]:
+            _loaded = (meta.get('sources'), IndicatorStore(data_store.open_frame(store_dir), meta.get('duplicates')))
+        return _loaded[1]
+
+
+if __name__ == '__main__':
+    store_dir = build(force=True)
+    store = load_store()
+    for code, name in store.codes().items():
+        print(f"{code}: {name} ({', '.join(store.dimensions(code))})")
+    for key, count in store.duplicates.items():
+        print(f"dropped {count} duplicate rows for {key}")
@@ -0,0 +1,111 @@
+import hashlib
+import json
+import os
+import threading
+import weakref
+
+import numpy as np
+import pandas as pd
+import plotly.express as px
+
+import aggregate_cube
+import data_store
+import result_cache
+
+# Precomputed Home page content.
+#
+# The sunburst figure (as Plotly JSON), the summary statistics table and the
+# KPI values are built once per dataset version and served from memory;
+# they are also written next to the columnar store so new worker processes
+# skip the pandas work too. Entries are keyed by a content hash of the data,
+# so any change to the rows invalidates them. In memory they live in the
+# shared result cache, which bounds them and hands each caller a copy.
+
+ASSET_DIR = os.path.join(data_store.STORE_DIR, 'home_assets')
+ASSET_VERSION = 1
+
+SUMMARY_COLUMNS = ['mean', 'median', 'std', 'min', 'max']
+
+_hashes = {}
+_lock = threading.Lock()
+
+
+def content_hash(frame):
+    # Hash of every row (index excluded); computed once per frame object
+    key = id(frame)
+    with _lock:
+        if key in _hashes:
+            return _hashes[key]
+    row_hashes = pd.util.hash_pandas_object(frame, index=False).to_numpy()
+    digest = hashlib.sha256(row_hashes.tobytes())
+    digest.update(json.dumps([str(c) for c in frame.columns]).encode())
+    value = f'{ASSET_VERSION}-{digest.hexdigest()[:32]}'
+    with _lock:
+        _hashes[key] = value
+        weakref.finalize(frame, _hashes.pop, key, None)
+    return value
+
+
+def _build(data):
+    cube = aggregate_cube.cube_for(data)
+    demographic_counts = cube.counts(['Age', 'Region', 'Gender'])
+    fig = px.sunburst(demographic_counts, path=['Region', 'Age', 'Gender'], values='Counts', color='Gender',
+                      color_discrete_map={'Male': '#636EFA', 'Female': '#EF553B'})
+
+    summary = data.describe(include='number').T
+    summary['median'] = data.median(numeric_only=True)
+    summary = summary[SUMMARY_COLUMNS].round(2)
+
+    kpis = cube.kpis()
+    return {
+        'sunburst': json.loads(fig.to_json()),
+        'summary': {'index': list(summary.index), 'columns': SUMMARY_COLUMNS, 'data': summary.to_numpy().tolist()},
+        'kpis': {
+            'count': kpis['count'],
+            **{metric: float(kpis[metric]['mean']) for metric in cube.metrics},
+        },
+    }
+
+
+def _asset_path(digest):
+    return os.path.join(ASSET_DIR, f'{digest}.json')
+
+
+def _read(digest):
+    try:
+        with open(_asset_path(digest)) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _write(digest, assets):
+    os.makedirs(ASSET_DIR, exist_ok=True)
+    path = _asset_path(digest)
+    tmp_path = f'{path}.{os.getpid()}.tmp'
+    with open(tmp_path, 'w') as f:
+        json.dump(assets, f)
+    os.replace(tmp_path, path)
+
+
+def _load(data, digest):
+    stored = _read(digest)
+    if stored is None:
+        stored = _build(data)
+        try:
+            _write(digest, stored)
+        except OSError:
+            pass
+    summary = stored['summary']
+    return {
+        'sunburst': stored['sunburst'],
+        'summary': pd.DataFrame(np.array(summary['data'], dtype=np.float64), index=summary['index'], columns=summary['columns']),
+        'kpis': stored['kpis'],
+    }
+
+
+def home_assets(data):
+    # Returns {'sunburst': figure dict, 'summary': DataFrame, 'kpis': dict},
+    # a copy the caller may modify
+    digest = content_hash(data)
+    return result_cache.results.get_or_compute(('home_assets', digest), lambda: _load(data, digest))
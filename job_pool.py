@@ -0,0 +1,338 @@
+import collections
+import multiprocessing
+import multiprocessing.connection
+import os
+import threading
+import time
+
+import result_cache
+
+# Shared pool of worker processes for heavy dashboard computations
+# (scatter matrices, trellis fits, word clouds).
+#
+# submit(fn, *args) queues fn(*args) for a worker process and returns a Job.
+# fn must be a module-level function and its arguments small and picklable:
+# jobs pass dataset names and FilterSpecs, and workers load the
+# memory-mapped data themselves. Work runs outside the GIL of the Streamlit
+# process, one job per worker, so throughput scales with MH_POOL_WORKERS
+# (default: CPU count).
+#
+# Identical jobs (same function and normalized arguments) submitted while
+# one is queued or running share that job; each caller holds a
+# subscription and calls release() when done or no longer interested. A job
+# nobody is subscribed to any more is cancelled: dropped from the queue, or
+# its worker is terminated and replaced if it is already running. Jobs that
+# exceed their timeout are stopped the same way and fail with TimeoutError.
+# A worker found dead when a job is handed to it is dropped, and the job
+# goes back to the front of the queue for a fresh worker.
+#
+# Workers are started with MH_POOL_CONTEXT ('forkserver' by default, so they
+# never fork the threaded server process). MH_POOL_WORKERS=0 runs jobs
+# inline in the calling thread.
+
+WORKERS = int(os.environ.get('MH_POOL_WORKERS') or os.cpu_count() or 1)
+MAX_ATTEMPTS = 2   # sends to a worker that turned out to be dead
+CONTEXT = os.environ.get('MH_POOL_CONTEXT', 'forkserver')
+DEFAULT_TIMEOUT = float(os.environ.get('MH_JOB_TIMEOUT', 120))
+
+
+class JobCancelled(Exception):
+    pass
+
+
+class Job:
+    def __init__(self, key, fn, args, kwargs, timeout):
+        self.key = key
+        self.fn = fn
+        self.args = args
+        self.kwargs = kwargs
+        self.timeout = timeout
+        self.subscribers = 1
+        self.cancelled = False
+        self.submitted = time.monotonic()
+        self.started = None
+        self.attempts = 0
+        self._pool = None
+        self._done = threading.Event()
+        self._result = None
+        self._error = None
+
+    @property
+    def elapsed(self):
+        return time.monotonic() - self.submitted
+
+    def done(self):
+        return self._done.is_set()
+
+    def wait(self, timeout=None):
+        return self._done.wait(timeout)
+
+    def result(self, timeout=None):
+        if not self._done.wait(timeout):
+            raise TimeoutError(f"job {self.fn.__name__} still running")
+        if self._error is not None:
+            raise self._error
+        return self._result
+
+    def release(self):
+        if self._pool is not None:
+            self._pool._release(self)
+
+    def _finish(self, result=None, error=None):
+        self._result = result
+        self._error = error
+        self._done.set()
+
+
+def _worker_main(conn):
+    while True:
+        try:
+            fn, args, kwargs = conn.recv()
+        except EOFError:
+            return
+        try:
+            message = ('ok', fn(*args, **kwargs))
+        except Exception as exc:
+            message = ('error', exc)
+        try:
+            conn.send(message)
+        except Exception as exc:
+            # Unpicklable result or exception
+            conn.send(('error', RuntimeError(f"{fn.__name__}: {exc!r}")))
+
+
+class _Worker:
+    def __init__(self, context):
+        self.conn, child = context.Pipe()
+        self.process = context.Process(target=_worker_main, args=(child,), daemon=True)
+        self.process.start()
+        child.close()
+        self.job = None
+
+    def stop(self):
+        self.process.terminate()
+        self.process.join(timeout=5)
+        self.conn.close()
+
+
+class JobPool:
+    def __init__(self, workers=WORKERS, context=CONTEXT, timeout=DEFAULT_TIMEOUT):
+        self.workers = workers
+        self.timeout = timeout
+        self._context = multiprocessing.get_context(context) if workers else None
+        self._lock = threading.Lock()
+        self._jobs = {}                         # key -> queued or running Job
+        self._queue = collections.deque()
+        self._idle = []
+        self._busy = []
+        self._counters = collections.Counter()
+        self._wake_r, self._wake_w = multiprocessing.Pipe(duplex=False)
+        self._dispatcher = None
+        self._closed = False
+
+    def submit(self, fn, *args, timeout=None, **kwargs):
+        key = (fn.__module__, fn.__qualname__, result_cache.make_key(args, kwargs))
+        with self._lock:
+            job = self._jobs.get(key)
+            if job is not None and not job.cancelled:
+                job.subscribers += 1
+                self._counters['deduplicated'] += 1
+                return job
+            job = Job(key, fn, args, kwargs, self.timeout if timeout is None else timeout)
+            job._pool = self
+            self._counters['submitted'] += 1
+            self._jobs[key] = job
+            if self.workers:
+                self._queue.append(job)
+                if self._dispatcher is None:
+                    self._dispatcher = threading.Thread(target=self._dispatch, name='job-pool', daemon=True)
+                    self._dispatcher.start()
+        if not self.workers:
+            return self._run_inline(job)
+        self._wake_w.send_bytes(b'')
+        return job
+
+    def _run_inline(self, job):
+        # No timeout or cancellation: the caller's thread does the work
+        job.started = time.monotonic()
+        try:
+            result, error, outcome = job.fn(*job.args, **job.kwargs), None, 'completed'
+        except Exception as exc:
+            result, error, outcome = None, exc, 'failed'
+        with self._lock:
+            self._complete(job, result, error, outcome)
+        return job
+
+    def _release(self, job):
+        with self._lock:
+            job.subscribers -= 1
+            if job.subscribers > 0 or job.done():
+                return
+            job.cancelled = True
+            if self._jobs.get(job.key) is job:
+                del self._jobs[job.key]
+            if job in self._queue:
+                self._queue.remove(job)
+                self._complete(job, error=JobCancelled(job.fn.__name__), outcome='cancelled')
+                return
+        # Running jobs are stopped by the dispatcher
+        self._wake_w.send_bytes(b'')
+
+    def _complete(self, job, result=None, error=None, outcome='completed'):
+        # Called with the lock held
+        if self._jobs.get(job.key) is job:
+            del self._jobs[job.key]
+        self._counters[outcome] += 1
+        job._finish(result, error)
+
+    # Only the dispatcher thread changes the worker lists. It holds the lock
+    # just to move jobs and workers between lists; starting, sending to and
+    # stopping worker processes happen outside it, so submit() and
+    # release() never wait on a process.
+
+    def _next_worker(self):
+        # An idle worker, or a new one if below the limit; None if all busy
+        while True:
+            with self._lock:
+                if not self._queue:
+                    return None
+                if self._idle:
+                    worker = self._idle.pop()
+                elif len(self._busy) < self.workers:
+                    worker = None
+                else:
+                    return None
+            if worker is None:
+                try:
+                    worker = _Worker(self._context)
+                except Exception as exc:
+                    with self._lock:
+                        if self._queue:
+                            job = self._queue.popleft()
+                            self._complete(job, error=RuntimeError(f"could not start a worker: {exc!r}"), outcome='failed')
+                    continue
+                self._counters['started'] += 1
+                return worker
+            if worker.process.is_alive():
+                return worker
+            worker.stop()
+
+    def _assign(self):
+        while True:
+            worker = self._next_worker()
+            if worker is None:
+                return
+            with self._lock:
+                if not self._queue:
+                    self._idle.append(worker)
+                    return
+                job = self._queue.popleft()
+                job.started = time.monotonic()
+                job.attempts += 1
+                worker.job = job
+                self._busy.append(worker)
+            try:
+                worker.conn.send((job.fn, job.args, job.kwargs))
+            except Exception as exc:
+                alive = worker.process.is_alive()
+                with self._lock:
+                    worker.job = None
+                    self._busy.remove(worker)
+                    if alive:
+                        # The arguments could not be pickled; nothing was
+                        # written, so the worker is still usable
+                        self._idle.append(worker)
+                        self._complete(job, error=exc, outcome='failed')
+                    elif job.cancelled:
+                        self._complete(job, error=JobCancelled(job.fn.__name__), outcome='cancelled')
+                    elif job.attempts < MAX_ATTEMPTS:
+                        self._queue.appendleft(job)
+                    else:
+                        self._complete(job, error=RuntimeError(f"no live worker for {job.fn.__name__}: {exc!r}"),
+                                       outcome='failed')
+                if not alive:
+                    self._counters['replaced'] += 1
+                    worker.stop()
+
+    def _dispatch(self):
+        while not self._closed:
+            self._assign()
+            with self._lock:
+                busy = list(self._busy)
+            ready = multiprocessing.connection.wait([self._wake_r] + [w.conn for w in busy], timeout=0.5)
+            if self._wake_r in ready:
+                while self._wake_r.poll():
+                    self._wake_r.recv_bytes()
+            now = time.monotonic()
+            stopped = []
+            for worker in busy:
+                job = worker.job
+                if worker.conn in ready:
+                    try:
+                        status, value = worker.conn.recv()
+                    except (EOFError, OSError):
+                        stopped.append(worker)
+                        with self._lock:
+                            self._busy.remove(worker)
+                            self._complete(job, error=RuntimeError(f"worker exited running {job.fn.__name__}"),
+                                           outcome='failed')
+                        continue
+                    with self._lock:
+                        worker.job = None
+                        self._busy.remove(worker)
+                        self._idle.append(worker)
+                        if job.cancelled:
+                            self._counters['cancelled'] += 1
+                        elif status == 'ok':
+                            self._complete(job, result=value)
+                        else:
+                            self._complete(job, error=value, outcome='failed')
+                elif job.cancelled or (job.timeout and now - job.started > job.timeout):
+                    # A fresh worker is started when needed
+                    stopped.append(worker)
+                    with self._lock:
+                        self._busy.remove(worker)
+                        if job.cancelled:
+                            self._complete(job, error=JobCancelled(job.fn.__name__), outcome='cancelled')
+                        else:
+                            self._complete(job, error=TimeoutError(f"{job.fn.__name__} exceeded {job.timeout:g}s"),
+                                           outcome='timed_out')
+            for worker in stopped:
+                worker.stop()
+
+    def stats(self):
+        with self._lock:
+            return {
+                'workers': len(self._idle) + len(self._busy),
+                'busy': len(self._busy),
+                'queued': len(self._queue),
+                **self._counters,
+            }
+
+    def close(self):
+        self._closed = True
+        self._wake_w.send_bytes(b'')
+        if self._dispatcher is not None:
+            self._dispatcher.join(timeout=5)
+        with self._lock:
+            workers = self._idle + self._busy
+            self._idle, self._busy = [], []
+        for worker in workers:
+            worker.stop()
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_pool():
+    # The process-wide pool; workers start on the first submitted job
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = JobPool()
+        return _pool
+
+
+def pool_stats():
+    return _pool.stats() if _pool is not None else None
@@ -0,0 +1,41 @@
+import importlib
+import os
+import threading
+
+# Deferred imports for heavy dependencies.
+#
+# lazy_import() returns a stand-in whose module is imported on first
+# attribute access, so pages pay for scikit-learn, TextBlob, WordCloud or NLTK
+# only when they are actually visited. The stand-in is not registered in
+# sys.modules (importlib's LazyLoader is), because Streamlit's file watcher
+# walks sys.modules and would trigger every deferred import on the first
+# rerun. Set MH_LAZY_IMPORTS=0 to import eagerly (e.g. to pre-warm a worker
+# before it takes traffic).
+
+LAZY = os.environ.get('MH_LAZY_IMPORTS', '1') != '0'
+
+
+class LazyModule:
+    def __init__(self, name):
+        self._name = name
+        self._module = None
+        self._lock = threading.Lock()
+
+    def _load(self):
+        with self._lock:
+            if self._module is None:
+                self._module = importlib.import_module(self._name)
+        return self._module
+
+    def __getattr__(self, attr):
+        return getattr(self._module or self._load(), attr)
+
+    def __repr__(self):
+        state = 'loaded' if self._module is not None else 'not loaded'
+        return f"<lazy module '{self._name}' ({state})>"
+
+
+def lazy_import(name):
+    if not LAZY:
+        return importlib.import_module(name)
+    return LazyModule(name)
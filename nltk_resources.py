@@ -0,0 +1,57 @@
+import os
+import threading
+
+# NLTK data used by the TextBlob-based features, resolved once per process.
+#
+# Resources are looked up in the repo-local nltk_data/ directory first (then
+# NLTK's default search path). The app never downloads at runtime: missing
+# resources are only reported, and TextBlob polarity works without them.
+# Download them once as a setup step (the dev container does this):
+#
+#     python nltk_resources.py
+#
+# MH_NLTK_OFFLINE=0 lets the app download missing resources itself.
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+NLTK_DATA_DIR = os.environ.get('MH_NLTK_DATA', os.path.join(BASE_DIR, 'nltk_data'))
+OFFLINE = os.environ.get('MH_NLTK_OFFLINE', '1') != '0'
+
+RESOURCES = {
+    'punkt': 'tokenizers/punkt',
+    'averaged_perceptron_tagger': 'taggers/averaged_perceptron_tagger',
+}
+
+_checked = False
+_missing = []
+_lock = threading.Lock()
+
+
+def ensure(download=None):
+    # Returns the list of resources that could not be found or downloaded.
+    # download defaults to not OFFLINE.
+    global _checked
+    if download is None:
+        download = not OFFLINE
+    with _lock:
+        if _checked and not (download and _missing):
+            return list(_missing)
+        _missing.clear()
+        import nltk
+        if NLTK_DATA_DIR not in nltk.data.path:
+            nltk.data.path.insert(0, NLTK_DATA_DIR)
+        for name, resource in RESOURCES.items():
+            try:
+                nltk.data.find(resource)
+            except LookupError:
+                if not download or not nltk.download(name, download_dir=NLTK_DATA_DIR, quiet=True):
+                    _missing.append(name)
+        _checked = True
+        return list(_missing)
+
+
+if __name__ == '__main__':
+    import sys
+
+    missing = ensure(download=True)
+    print(f"NLTK data in {NLTK_DATA_DIR}: " + (f"missing {', '.join(missing)}" if missing else "complete"))
+    sys.exit(1 if missing else 0)
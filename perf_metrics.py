@@ -0,0 +1,284 @@
+import contextlib
+import contextvars
+import cProfile
+import io
+import json
+import math
+import os
+import pstats
+import random
+import sys
+import threading
+import time
+
+# Per-page and per-stage instrumentation for the dashboard.
+#
+# Pages run inside page(name); code inside a page wraps its work in
+# stage('load' | 'filter' | 'aggregate' | 'figure' | 'serialize' | ...).
+# Durations go into process-wide histograms keyed by (page, stage), payload
+# sizes sent to the browser are recorded per page and kind, and cache
+# counters are collected from the registered caches when a snapshot is
+# taken. snapshot() returns plain data; prometheus_text() and json_text()
+# export it. The current page is a context variable, so concurrent sessions
+# (one script thread each) never mix their stages.
+#
+# profile() wraps a rerun in cProfile for sessions that opt in.
+#
+# Measuring a figure's payload means serializing it a second time, so only
+# a sample of figures (MH_METRICS_PAYLOAD_SAMPLE) is measured, plus every
+# figure drawn while the session is profiling.
+
+ENABLED = os.environ.get('MH_METRICS', '1') != '0'
+MEASURE_PAYLOAD = os.environ.get('MH_METRICS_PAYLOAD', '1') != '0'
+PAYLOAD_SAMPLE = float(os.environ.get('MH_METRICS_PAYLOAD_SAMPLE', 0.02))
+
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, math.inf)
+PAGE_STAGE = 'total'
+
+_current_page = contextvars.ContextVar('mh_page', default='none')
+_profiling = contextvars.ContextVar('mh_profiling', default=False)
+_sampler = random.Random()
+
+
+class Histogram:
+    def __init__(self, buckets=BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    def observe(self, value):
+        self.count += 1
+        self.sum += value
+        self.max = max(self.max, value)
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[i] += 1
+                break
+
+    def quantile(self, q):
+        # Upper bucket bound containing the q-th observation
+        if not self.count:
+            return 0.0
+        target = q * self.count
+        seen = 0
+        for bound, count in zip(self.buckets, self.counts):
+            seen += count
+            if seen >= target:
+                return self.max if math.isinf(bound) else bound
+        return self.max
+
+    def to_dict(self):
+        return {
+            'count': self.count,
+            'sum': self.sum,
+            'mean': self.sum / self.count if self.count else 0.0,
+            'max': self.max,
+            'p50': self.quantile(0.5),
+            'p95': self.quantile(0.95),
+        }
+
+
+class Registry:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._timings = {}      # (page, stage) -> Histogram
+        self._payloads = {}     # (page, kind) -> [count, bytes, max]
+        self._caches = {}       # name -> callable returning a stats dict
+        self.started = time.time()
+
+    def observe(self, page, stage, seconds):
+        with self._lock:
+            histogram = self._timings.get((page, stage))
+            if histogram is None:
+                histogram = self._timings[(page, stage)] = Histogram()
+            histogram.observe(seconds)
+
+    def record_payload(self, page, kind, nbytes):
+        with self._lock:
+            entry = self._payloads.setdefault((page, kind), [0, 0, 0])
+            entry[0] += 1
+            entry[1] += nbytes
+            entry[2] = max(entry[2], nbytes)
+
+    def register_cache(self, name, stats_fn):
+        with self._lock:
+            self._caches[name] = stats_fn
+
+    def reset(self):
+        with self._lock:
+            self._timings.clear()
+            self._payloads.clear()
+            self.started = time.time()
+
+    def snapshot(self):
+        with self._lock:
+            timings = [
+                {'page': page, 'stage': stage, **histogram.to_dict(), 'buckets': list(zip(histogram.buckets, histogram.counts))}
+                for (page, stage), histogram in sorted(self._timings.items())
+            ]
+            payloads = [
+                {'page': page, 'kind': kind, 'count': count, 'bytes': total, 'max_bytes': largest}
+                for (page, kind), (count, total, largest) in sorted(self._payloads.items())
+            ]
+            caches = dict(self._caches)
+        cache_stats = {}
+        for name, stats_fn in caches.items():
+            try:
+                stats = stats_fn()
+            except Exception:
+                continue
+            if stats is not None:
+                cache_stats[name] = stats
+        return {'uptime_seconds': time.time() - self.started, 'timings': timings, 'payloads': payloads, 'caches': cache_stats,
+                'payload_sample': PAYLOAD_SAMPLE if MEASURE_PAYLOAD else 0.0}
+
+
+registry = Registry()
+
+
+def current_page():
+    return _current_page.get()
+
+
+@contextlib.contextmanager
+def page(name):
+    # Marks the current script thread as rendering `name` and times it
+    token = _current_page.set(name)
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        if ENABLED:
+            registry.observe(name, PAGE_STAGE, time.perf_counter() - start)
+        _current_page.reset(token)
+
+
+@contextlib.contextmanager
+def stage(name):
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        if ENABLED:
+            registry.observe(current_page(), name, time.perf_counter() - start)
+
+
+def record_payload(kind, nbytes):
+    if ENABLED:
+        registry.record_payload(current_page(), kind, int(nbytes))
+
+
+def figure_payload(fig):
+    # Serializes a figure (or figure dict) the way it is sent to the browser
+    # and records its size; returns the byte count, or 0 when the figure is
+    # not sampled
+    if not (ENABLED and MEASURE_PAYLOAD):
+        return 0
+    if not _profiling.get() and _sampler.random() >= PAYLOAD_SAMPLE:
+        return 0
+    with stage('serialize'):
+        if isinstance(fig, dict):
+            spec = json.dumps(fig, default=str)
+        else:
+            spec = fig.to_json()
+    nbytes = len(spec.encode('utf-8'))
+    record_payload('figure', nbytes)
+    return nbytes
+
+
+def register_cache(name, stats_fn):
+    registry.register_cache(name, stats_fn)
+
+
+def module_cache(module_name, attribute='cache_info'):
+    # Stats callable for a module's cache that does not import the module;
+    # lazily imported modules report nothing until a page has loaded them
+    def stats():
+        module = sys.modules.get(module_name)
+        return getattr(module, attribute)() if module is not None else None
+    return stats
+
+
+def snapshot():
+    return registry.snapshot()
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _labels(**labels):
+    return ','.join(f'{key}="{_escape(value)}"' for key, value in labels.items())
+
+
+def prometheus_text(data=None):
+    # Prometheus text exposition format (version 0.0.4)
+    data = data or snapshot()
+    lines = [
+        '# HELP mh_stage_seconds Time spent per dashboard page and stage.',
+        '# TYPE mh_stage_seconds histogram',
+    ]
+    for row in data['timings']:
+        cumulative = 0
+        for bound, count in row['buckets']:
+            cumulative += count
+            le = '+Inf' if math.isinf(bound) else repr(bound)
+            lines.append(f"mh_stage_seconds_bucket{{{_labels(page=row['page'], stage=row['stage'], le=le)}}} {cumulative}")
+        lines.append(f"mh_stage_seconds_sum{{{_labels(page=row['page'], stage=row['stage'])}}} {row['sum']}")
+        lines.append(f"mh_stage_seconds_count{{{_labels(page=row['page'], stage=row['stage'])}}} {row['count']}")
+
+    lines += ['# HELP mh_payload_bytes_total Bytes sent to the browser per page and element kind.', '# TYPE mh_payload_bytes_total counter']
+    lines += [f"mh_payload_bytes_total{{{_labels(page=row['page'], kind=row['kind'])}}} {row['bytes']}" for row in data['payloads']]
+    lines += ['# HELP mh_payload_elements_total Elements sent to the browser per page and kind.', '# TYPE mh_payload_elements_total counter']
+    lines += [f"mh_payload_elements_total{{{_labels(page=row['page'], kind=row['kind'])}}} {row['count']}" for row in data['payloads']]
+    lines += ['# HELP mh_payload_max_bytes Largest single element sent per page and kind.', '# TYPE mh_payload_max_bytes gauge']
+    lines += [f"mh_payload_max_bytes{{{_labels(page=row['page'], kind=row['kind'])}}} {row['max_bytes']}" for row in data['payloads']]
+
+    lines += ['# HELP mh_cache_stat Cache counters and sizes by cache and field.', '# TYPE mh_cache_stat gauge']
+    for name, stats in sorted(data['caches'].items()):
+        for field, value in sorted(stats.items()):
+            if isinstance(value, (int, float)) and not isinstance(value, bool):
+                lines.append(f"mh_cache_stat{{{_labels(cache=name, field=field)}}} {value}")
+    lines += ['# HELP mh_uptime_seconds Seconds since metrics were last reset.', '# TYPE mh_uptime_seconds gauge']
+    lines.append(f"mh_uptime_seconds {data['uptime_seconds']}")
+    return '\n'.join(lines) + '\n'
+
+
+def json_text(data=None):
+    data = data or snapshot()
+    timings = [
+        {**row, 'buckets': [['+Inf' if math.isinf(bound) else bound, count] for bound, count in row['buckets']]}
+        for row in data['timings']
+    ]
+    return json.dumps({**data, 'timings': timings}, indent=2, default=str)
+
+
+@contextlib.contextmanager
+def profile(enabled=True, sort='cumulative', limit=40):
+    # Profiles the block when enabled; the yielded dict receives 'text'
+    # (pstats report) and 'seconds' on exit
+    result = {}
+    if not enabled:
+        yield result
+        return
+    profiler = cProfile.Profile()
+    start = time.perf_counter()
+    try:
+        profiler.enable()
+    except ValueError:
+        # Another profiler is active in this process (one at a time)
+        result['error'] = 'profiler busy'
+        yield result
+        return
+    token = _profiling.set(True)
+    try:
+        yield result
+    finally:
+        _profiling.reset(token)
+        profiler.disable()
+        result['seconds'] = time.perf_counter() - start
+        buffer = io.StringIO()
+        pstats.Stats(profiler, stream=buffer).sort_stats(sort).print_stats(limit)
+        result['text'] = buffer.getvalue()
@@ -0,0 +1,421 @@
+import argparse
+import asyncio
+import collections
+import json
+import math
+import numbers
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+import depression_model
+
+# Local HTTP endpoint for the depression-score model, for partner clinics'
+# intake systems.
+#
+# Concurrent requests are coalesced by a MicroBatcher: the first queued
+# request opens a batch, which is flushed when it reaches max_batch_size or
+# max_wait_ms has passed, and scored with a single predict_batch call. The
+# server is plain asyncio (no extra dependencies).
+#
+# Records are validated before they join a batch, so a bad record only fails
+# its own request (400). If a batch still fails to score, its requests are
+# rescored one at a time so only the failing one gets the error. Bodies over
+# max_body_bytes are refused (413), as are requests that cannot be parsed
+# (400), and once max_queue requests are waiting new ones are turned away
+# (503) instead of queueing without bound.
+#
+#     python prediction_service.py serve --port 8502 --max-batch-size 64 --max-wait-ms 5 --max-queue 1024
+#     python prediction_service.py loadtest --requests 2000 --concurrency 64
+#
+# Endpoints:
+#     POST /predict   {"records": [{...}, ...]} or a single record -> {"scores": [...]}
+#     GET  /stats     latency percentiles, throughput and batch sizes
+#     GET  /health
+
+DEFAULT_MAX_BATCH_SIZE = 64
+DEFAULT_MAX_WAIT_MS = 5
+DEFAULT_MAX_QUEUE = 1024            # requests waiting for a batch
+DEFAULT_MAX_BODY_BYTES = 1 << 20
+MAX_RECORDS = 1000                  # per request
+
+
+class Overloaded(Exception):
+    pass
+
+
+class BadRequest(Exception):
+    # A request that cannot be read; the connection is closed after the reply
+    status = 400
+
+
+class RequestTooLarge(BadRequest):
+    status = 413
+
+
+def clean_record(record):
+    # Returns the record's model features, or raises ValueError. Numeric
+    # features must be finite numbers, categorical ones strings; either may be
+    # missing or null (treated as unknown by the model).
+    if not isinstance(record, dict):
+        raise ValueError('record must be an object')
+    cleaned = {}
+    for column in depression_model.NUMERIC_FEATURES:
+        value = record.get(column)
+        if value is None:
+            cleaned[column] = math.nan
+        elif isinstance(value, bool) or not isinstance(value, numbers.Real) or not math.isfinite(value):
+            raise ValueError(f'{column} must be a finite number')
+        else:
+            cleaned[column] = float(value)
+    for column in depression_model.CATEGORICAL_FEATURES:
+        value = record.get(column)
+        if value is not None and not isinstance(value, str):
+            raise ValueError(f'{column} must be a string')
+        cleaned[column] = value
+    return cleaned
+
+
+class LatencyStats:
+    # Rolling latency window plus lifetime counters
+    def __init__(self, window=10000):
+        self.latencies = collections.deque(maxlen=window)
+        self.batch_sizes = collections.deque(maxlen=window)
+        self.completed = 0
+        self.started = time.perf_counter()
+
+    def record(self, latency):
+        self.latencies.append(latency)
+        self.completed += 1
+
+    def record_batch(self, size):
+        self.batch_sizes.append(size)
+
+    def reset(self):
+        self.latencies.clear()
+        self.batch_sizes.clear()
+        self.completed = 0
+        self.started = time.perf_counter()
+
+    def snapshot(self):
+        elapsed = time.perf_counter() - self.started
+        latencies = np.array(self.latencies) * 1000 if self.latencies else np.array([np.nan])
+        return {
+            'completed': self.completed,
+            'throughput_rps': self.completed / elapsed if elapsed > 0 else 0.0,
+            'p50_ms': float(np.percentile(latencies, 50)),
+            'p99_ms': float(np.percentile(latencies, 99)),
+            'mean_batch_size': float(np.mean(self.batch_sizes)) if self.batch_sizes else 0.0,
+        }
+
+
+class MicroBatcher:
+    def __init__(self, predict_fn, max_batch_size=DEFAULT_MAX_BATCH_SIZE, max_wait_ms=DEFAULT_MAX_WAIT_MS,
+                 max_queue=DEFAULT_MAX_QUEUE):
+        self.predict_fn = predict_fn
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000
+        self.max_queue = max_queue
+        self.stats = LatencyStats()
+        self._queue = None
+        self._worker = None
+
+    def start(self):
+        self._queue = asyncio.Queue(maxsize=self.max_queue)
+        self._worker = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self):
+        if self._worker is not None:
+            self._worker.cancel()
+            try:
+                await self._worker
+            except asyncio.CancelledError:
+                pass
+
+    async def submit(self, records):
+        # Queues a request's records and waits for their scores. Raises
+        # Overloaded when the queue is full.
+        future = asyncio.get_running_loop().create_future()
+        try:
+            self._queue.put_nowait((records, future, time.perf_counter()))
+        except asyncio.QueueFull:
+            raise Overloaded(f'{self.max_queue} requests already waiting') from None
+        return await future
+
+    async def _collect(self):
+        batch = [await self._queue.get()]
+        size = len(batch[0][0])
+        deadline = time.perf_counter() + self.max_wait
+        while size < self.max_batch_size:
+            timeout = deadline - time.perf_counter()
+            if timeout <= 0:
+                break
+            try:
+                item = await asyncio.wait_for(self._queue.get(), timeout)
+            except asyncio.TimeoutError:
+                break
+            batch.append(item)
+            size += len(item[0])
+        return batch
+
+    async def _score(self, records):
+        # Scoring runs in a thread so the event loop keeps accepting requests
+        loop = asyncio.get_running_loop()
+        scores = await loop.run_in_executor(None, self.predict_fn, pd.DataFrame.from_records(records))
+        return [float(s) for s in scores]
+
+    async def _run(self):
+        while True:
+            batch = await self._collect()
+            records = [record for request, _, _ in batch for record in request]
+            try:
+                scores = await self._score(records)
+                results = []
+                offset = 0
+                for request, _, _ in batch:
+                    results.append(scores[offset:offset + len(request)])
+                    offset += len(request)
+            except Exception as exc:
+                if len(batch) == 1:
+                    results = [exc]
+                else:
+                    # One request may have poisoned the batch: score each alone
+                    results = []
+                    for request, _, _ in batch:
+                        try:
+                            results.append(await self._score(request))
+                        except Exception as request_exc:
+                            results.append(request_exc)
+            self.stats.record_batch(len(records))
+            now = time.perf_counter()
+            for (_, future, queued_at), result in zip(batch, results):
+                if future.done():
+                    continue
+                if isinstance(result, Exception):
+                    future.set_exception(result)
+                else:
+                    future.set_result(result)
+                    self.stats.record(now - queued_at)
+
+
+REASONS = {200: 'OK', 400: 'Bad Request', 404: 'Not Found', 405: 'Method Not Allowed', 413: 'Payload Too Large',
+           500: 'Internal Server Error', 503: 'Service Unavailable'}
+
+
+async def _read_request(reader, max_body_bytes=DEFAULT_MAX_BODY_BYTES):
+    request_line = await reader.readline()
+    if not request_line:
+        return None
+    parts = request_line.decode('latin-1').split()
+    if len(parts) != 3 or not parts[2].startswith('HTTP/'):
+        raise BadRequest('malformed request line')
+    method, path, _ = parts
+    headers = {}
+    while True:
+        line = await reader.readline()
+        if line in (b'\r\n', b'\n', b''):
+            break
+        name, _, value = line.decode('latin-1').partition(':')
+        headers[name.strip().lower()] = value.strip()
+    try:
+        length = int(headers.get('content-length', 0))
+    except ValueError:
+        raise BadRequest('invalid Content-Length') from None
+    if length < 0:
+        raise BadRequest('invalid Content-Length')
+    if length > max_body_bytes:
+        raise RequestTooLarge(f'body exceeds {max_body_bytes} bytes')
+    body = await reader.readexactly(length) if length else b''
+    return method, path, headers, body
+
+
+def _response(status, payload, keep_alive=True):
+    body = json.dumps(payload).encode()
+    head = (
+        f"HTTP/1.1 {status} {REASONS[status]}\r\n"
+        f"Content-Type: application/json\r\n"
+        f"Content-Length: {len(body)}\r\n"
+        f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n"
+    )
+    return head.encode() + body
+
+
+class PredictionServer:
+    def __init__(self, batcher, max_body_bytes=DEFAULT_MAX_BODY_BYTES):
+        self.batcher = batcher
+        self.max_body_bytes = max_body_bytes
+        self.server = None
+
+    async def handle(self, method, path, body):
+        if path == '/health':
+            return 200, {'status': 'ok'}
+        if path == '/stats':
+            return 200, self.batcher.stats.snapshot()
+        if path != '/predict':
+            return 404, {'error': 'not found'}
+        if method != 'POST':
+            return 405, {'error': 'use POST'}
+        try:
+            payload = json.loads(body or b'{}')
+        except ValueError:
+            return 400, {'error': 'invalid JSON'}
+        records = payload.get('records', [payload]) if isinstance(payload, dict) else payload
+        if not isinstance(records, list) or not records:
+            return 400, {'error': 'expected a record or {"records": [...]}'}
+        if len(records) > MAX_RECORDS:
+            return 400, {'error': f'at most {MAX_RECORDS} records per request'}
+        try:
+            records = [clean_record(record) for record in records]
+        except ValueError as exc:
+            return 400, {'error': str(exc)}
+        try:
+            scores = await self.batcher.submit(records)
+        except Overloaded as exc:
+            return 503, {'error': str(exc)}
+        except Exception as exc:
+            return 500, {'error': str(exc)}
+        return 200, {'scores': scores}
+
+    async def _connection(self, reader, writer):
+        try:
+            while True:
+                try:
+                    request = await _read_request(reader, self.max_body_bytes)
+                except BadRequest as exc:
+                    # The unread rest of the request makes the connection unusable
+                    writer.write(_response(exc.status, {'error': str(exc)}, keep_alive=False))
+                    await writer.drain()
+                    break
+                if request is None:
+                    break
+                method, path, headers, body = request
+                status, payload = await self.handle(method, path, body)
+                keep_alive = headers.get('connection', '').lower() != 'close'
+                writer.write(_response(status, payload, keep_alive))
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError, ValueError):
+            pass
+        finally:
+            writer.close()
+
+    async def start(self, host='127.0.0.1', port=8502):
+        self.batcher.start()
+        self.server = await asyncio.start_server(self._connection, host, port)
+        return self.server.sockets[0].getsockname()[1]
+
+    async def stop(self):
+        self.server.close()
+        await self.server.wait_closed()
+        await self.batcher.stop()
+
+
+async def serve(host, port, max_batch_size, max_wait_ms, max_queue=DEFAULT_MAX_QUEUE,
+                max_body_bytes=DEFAULT_MAX_BODY_BYTES):
+    model = depression_model.load_model()
+    server = PredictionServer(MicroBatcher(model.predict_batch, max_batch_size, max_wait_ms, max_queue), max_body_bytes)
+    port = await server.start(host, port)
+    print(f"Serving depression model v{model.version} on http://{host}:{port}")
+    async with server.server:
+        await server.server.serve_forever()
+
+
+class Client:
+    # Minimal keep-alive HTTP client used by the load test
+    def __init__(self, host, port):
+        self.host, self.port = host, port
+        self.reader = self.writer = None
+
+    async def post(self, path, payload):
+        if self.writer is None:
+            self.reader, self.writer = await asyncio.open_connection(self.host, self.port)
+        body = json.dumps(payload).encode()
+        self.writer.write(
+            f"POST {path} HTTP/1.1\r\nHost: {self.host}\r\nContent-Type: application/json\r\n"
+            f"Content-Length: {len(body)}\r\n\r\n".encode() + body
+        )
+        await self.writer.drain()
+        status_line = await self.reader.readline()
+        length = 0
+        while True:
+            line = await self.reader.readline()
+            if line in (b'\r\n', b''):
+                break
+            name, _, value = line.decode('latin-1').partition(':')
+            if name.strip().lower() == 'content-length':
+                length = int(value)
+        body = await self.reader.readexactly(length)
+        return int(status_line.split()[1]), json.loads(body)
+
+    def close(self):
+        if self.writer is not None:
+            self.writer.close()
+
+
+async def _load(predict_fn, requests, concurrency, max_batch_size, max_wait_ms):
+    server = PredictionServer(MicroBatcher(predict_fn, max_batch_size, max_wait_ms))
+    port = await server.start('127.0.0.1', 0)
+    rng = np.random.default_rng(0)
+    records = [{
+        'Age': int(rng.integers(15, 25)),
+        'Social_Media_Usage': int(rng.integers(0, 12)),
+        'Physical_Activity': int(rng.integers(0, 14)),
+        'Sleep_Duration': float(rng.normal(7, 1.5)),
+    } for _ in range(requests)]
+    pending = collections.deque(records)
+
+    async def worker():
+        client = Client('127.0.0.1', port)
+        try:
+            while pending:
+                status, _ = await client.post('/predict', pending.popleft())
+                assert status == 200
+        finally:
+            client.close()
+
+    server.batcher.stats.reset()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    stats = server.batcher.stats.snapshot()
+    await server.stop()
+    return stats
+
+
+def loadtest(requests, concurrency, max_batch_size, max_wait_ms):
+    # Compares one prediction per request against micro-batched serving
+    model = depression_model.load_model()
+    results = {}
+    for label, batch_size, wait in (('unbatched', 1, 0), ('micro-batched', max_batch_size, max_wait_ms)):
+        results[label] = asyncio.run(_load(model.predict_batch, requests, concurrency, batch_size, wait))
+        stats = results[label]
+        print(f"{label:>14}: {stats['throughput_rps']:8.1f} req/s  p50 {stats['p50_ms']:7.2f} ms  "
+              f"p99 {stats['p99_ms']:7.2f} ms  mean batch {stats['mean_batch_size']:.1f}")
+    gain = results['micro-batched']['throughput_rps'] / results['unbatched']['throughput_rps']
+    print(f"throughput gain: {gain:.1f}x")
+    return results
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Depression-score prediction service')
+    parser.add_argument('command', choices=['serve', 'loadtest'])
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8502)
+    parser.add_argument('--max-batch-size', type=int, default=DEFAULT_MAX_BATCH_SIZE)
+    parser.add_argument('--max-wait-ms', type=float, default=DEFAULT_MAX_WAIT_MS)
+    parser.add_argument('--max-queue', type=int, default=DEFAULT_MAX_QUEUE)
+    parser.add_argument('--max-body-bytes', type=int, default=DEFAULT_MAX_BODY_BYTES)
+    parser.add_argument('--requests', type=int, default=2000)
+    parser.add_argument('--concurrency', type=int, default=64)
+    args = parser.parse_args()
+
+    try:
+        depression_model.load_model()
+    except depression_model.ModelUnavailable as error:
+        sys.exit(str(error))
+    if args.command == 'serve':
+        asyncio.run(serve(args.host, args.port, args.max_batch_size, args.max_wait_ms, args.max_queue,
+                          args.max_body_bytes))
+    else:
+        loadtest(args.requests, args.concurrency, args.max_batch_size, args.max_wait_ms)
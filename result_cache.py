@@ -0,0 +1,332 @@
+import collections
+import copy
+import datetime
+import hashlib
+import os
+import pickle
+import sys
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+
+# Bounded cache for per-query results (filtered frames, chart specs).
+#
+# Shared read-only resources (datasets, models, aggregate cubes) are held
+# once per process by their own modules and are never evicted. Per-query
+# results go through a ResultCache instead: entries are keyed by a
+# normalized filter tuple, the memory tier is an LRU bounded by an estimate
+# of entry size in bytes, every entry expires after a TTL, and an optional
+# on-disk tier keeps evicted entries across restarts and worker processes.
+# Hit/miss/eviction counters are kept per tier. Concurrent misses on a key
+# share one computation, and callers get copies of stored values, never the
+# shared objects themselves.
+
+DEFAULT_MAX_BYTES = int(os.environ.get('MH_RESULT_CACHE_MAX_BYTES', 256 * 1024 * 1024))
+DEFAULT_TTL = float(os.environ.get('MH_RESULT_CACHE_TTL', 600))
+DEFAULT_DISK_DIR = os.environ.get('MH_RESULT_CACHE_DIR') or None
+DEFAULT_DISK_MAX_BYTES = int(os.environ.get('MH_RESULT_CACHE_DISK_MAX_BYTES', 2 * 1024 * 1024 * 1024))
+
+
+def normalize(value):
+    # Canonical, hashable form of a filter value: selections become sorted
+    # tuples, dates ISO strings and NumPy scalars plain Python values
+    if isinstance(value, (list, tuple)):
+        return tuple(normalize(v) for v in value)
+    if isinstance(value, (set, frozenset)):
+        return tuple(sorted((normalize(v) for v in value), key=repr))
+    if isinstance(value, dict):
+        return tuple(sorted((str(k), normalize(v)) for k, v in value.items()))
+    if isinstance(value, (pd.Timestamp, datetime.datetime, datetime.date, np.datetime64)):
+        return pd.Timestamp(value).isoformat()
+    if isinstance(value, np.generic):
+        return value.item()
+    if isinstance(value, (pd.Index, pd.Series, np.ndarray, pd.Categorical)):
+        return tuple(normalize(v) for v in list(value))
+    return value
+
+
+def make_key(*parts):
+    return normalize(parts)
+
+
+def selection(values):
+    # Multiselect choices are order-insensitive
+    return tuple(sorted((normalize(v) for v in values), key=repr))
+
+
+def estimate_size(value):
+    if isinstance(value, pd.DataFrame):
+        return int(value.memory_usage(index=True, deep=False).sum())
+    if isinstance(value, pd.Series):
+        return int(value.memory_usage(index=True, deep=False))
+    if isinstance(value, np.ndarray):
+        return int(value.nbytes)
+    if isinstance(value, (bytes, bytearray, str)):
+        return len(value)
+    try:
+        return len(pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL))
+    except Exception:
+        return sys.getsizeof(value)
+
+
+class _FigureSpec:
+    # A Plotly figure stored as its validated dict. Rebuilding a figure from
+    # it skips validation, which makes a copy far cheaper than deepcopy.
+    __slots__ = ('spec',)
+
+    def __init__(self, figure):
+        self.spec = figure.to_dict()
+
+    def figure(self):
+        import plotly.graph_objects as go
+        return go.Figure(self.spec, _validate=False)
+
+
+def _is_figure(value):
+    return type(value).__module__.startswith('plotly.') and hasattr(value, 'to_dict')
+
+
+def freeze(value):
+    # Stored form of a value: figures become specs, everything else a copy
+    if _is_figure(value):
+        return _FigureSpec(value)
+    return copy_value(value)
+
+
+def copy_value(value):
+    # Entries are shared by every session, so callers get their own copy of
+    # mutable values. pandas objects are copied shallowly: with copy-on-write
+    # a change to either side copies the data first.
+    if isinstance(value, _FigureSpec):
+        return value.figure()
+    if value is None or isinstance(value, (str, bytes, int, float, bool, complex, frozenset)):
+        return value
+    if isinstance(value, (pd.DataFrame, pd.Series, pd.Index)):
+        return value.copy(deep=False)
+    if isinstance(value, np.ndarray):
+        return value.copy()
+    if isinstance(value, tuple) and all(isinstance(v, (str, bytes, int, float, bool, type(None))) for v in value):
+        return value
+    return copy.deepcopy(value)
+
+
+class _InFlight:
+    # A computation other callers of get_or_compute wait for
+    __slots__ = ('event', 'done', 'value')
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.done = False
+        self.value = None
+
+
+class ResultCache:
+    def __init__(self, max_bytes=DEFAULT_MAX_BYTES, ttl=DEFAULT_TTL, disk_dir=DEFAULT_DISK_DIR,
+                 disk_max_bytes=DEFAULT_DISK_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.disk_dir = disk_dir
+        self.disk_max_bytes = disk_max_bytes
+        self._entries = collections.OrderedDict()  # key -> (value, size, expires_at)
+        self._bytes = 0
+        self._pending = {}  # key -> _InFlight
+        # Guards the memory tier and counters only; pickling and disk I/O run
+        # outside it
+        self._lock = threading.Lock()
+        self.counters = collections.Counter()
+        if disk_dir:
+            os.makedirs(disk_dir, exist_ok=True)
+
+    def _count(self, name):
+        with self._lock:
+            self.counters[name] += 1
+
+    def _disk_path(self, key):
+        digest = hashlib.sha256(repr(key).encode('utf-8')).hexdigest()
+        return os.path.join(self.disk_dir, f'{digest}.pkl')
+
+    def _evict(self):
+        # Called with the lock held; returns the entries to spill to disk
+        spilled = []
+        while self._bytes > self.max_bytes and self._entries:
+            key, (value, size, expires_at) = self._entries.popitem(last=False)
+            self._bytes -= size
+            self.counters['memory_evictions'] += 1
+            if self.disk_dir and expires_at > time.time():
+                spilled.append((key, value, expires_at))
+        return spilled
+
+    def _spill(self, spilled):
+        # Called without the lock
+        for key, value, expires_at in spilled:
+            self._write_disk(key, value, expires_at)
+        if spilled:
+            self._trim_disk()
+
+    def _write_disk(self, key, value, expires_at):
+        path = self._disk_path(key)
+        tmp_path = f'{path}.{os.getpid()}.{threading.get_ident()}.tmp'
+        try:
+            with open(tmp_path, 'wb') as f:
+                pickle.dump((key, expires_at, value), f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_path, path)
+            self._count('disk_writes')
+        except Exception:
+            self._count('disk_errors')
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+    def _trim_disk(self):
+        # Oldest files go first once the disk tier exceeds its budget
+        entries = []
+        for name in os.listdir(self.disk_dir):
+            if name.endswith('.pkl'):
+                path = os.path.join(self.disk_dir, name)
+                try:
+                    st = os.stat(path)
+                except OSError:
+                    continue
+                entries.append((st.st_mtime, st.st_size, path))
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.disk_max_bytes:
+                break
+            try:
+                os.remove(path)
+                self._count('disk_evictions')
+            except OSError:
+                pass
+            total -= size
+
+    def _read_disk(self, key):
+        path = self._disk_path(key)
+        try:
+            with open(path, 'rb') as f:
+                stored_key, expires_at, value = pickle.load(f)
+        except FileNotFoundError:
+            return None
+        except Exception:
+            self._count('disk_errors')
+            return None
+        if stored_key != key or expires_at <= time.time():
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+            return None
+        return value, expires_at
+
+    def _put(self, key, value, size, expires_at):
+        # Called with the lock held; returns the entries to spill to disk
+        if size > self.max_bytes:
+            # Too large for the memory tier; keep it on disk only
+            return [(key, value, expires_at)] if self.disk_dir else []
+        old = self._entries.pop(key, None)
+        if old is not None:
+            self._bytes -= old[1]
+        self._entries[key] = (value, size, expires_at)
+        self._bytes += size
+        return self._evict()
+
+    def _memory_get(self, key, missing):
+        # Called with the lock held
+        entry = self._entries.get(key)
+        if entry is not None:
+            if entry[2] > time.time():
+                self._entries.move_to_end(key)
+                self.counters['memory_hits'] += 1
+                return entry[0]
+            del self._entries[key]
+            self._bytes -= entry[1]
+            self.counters['expirations'] += 1
+        self.counters['memory_misses'] += 1
+        return missing
+
+    def _get(self, key, missing):
+        # Stored value (not a copy) or `missing`
+        with self._lock:
+            value = self._memory_get(key, missing)
+        if value is not missing or not self.disk_dir:
+            return value
+        found = self._read_disk(key)
+        if found is None:
+            self._count('disk_misses')
+            return missing
+        size = estimate_size(found[0])
+        with self._lock:
+            self.counters['disk_hits'] += 1
+            spilled = self._put(key, found[0], size, found[1])
+        if size <= self.max_bytes:
+            # Otherwise the entry is already on disk and stays there only
+            self._spill(spilled)
+        return found[0]
+
+    def get(self, key, default=None):
+        missing = object()
+        value = self._get(key, missing)
+        return default if value is missing else copy_value(value)
+
+    def _set(self, key, value, ttl):
+        expires_at = time.time() + (self.ttl if ttl is None else ttl)
+        size = estimate_size(value)
+        with self._lock:
+            spilled = self._put(key, value, size, expires_at)
+        self._spill(spilled)
+
+    def set(self, key, value, ttl=None):
+        self._set(key, freeze(value), ttl)
+
+    def get_or_compute(self, key, compute, ttl=None):
+        # Concurrent misses on one key run `compute` once; the other callers
+        # wait for its result. If it raises, the next waiter computes instead.
+        missing = object()
+        while True:
+            value = self._get(key, missing)
+            if value is not missing:
+                return copy_value(value)
+            with self._lock:
+                flight = self._pending.get(key)
+                owner = flight is None
+                if owner:
+                    flight = self._pending[key] = _InFlight()
+            if not owner:
+                self._count('inflight_waits')
+                flight.event.wait()
+                if flight.done:
+                    return copy_value(flight.value)
+                continue
+            try:
+                value = freeze(compute())
+                self._set(key, value, ttl)
+                flight.value, flight.done = value, True
+                return copy_value(value)
+            finally:
+                with self._lock:
+                    self._pending.pop(key, None)
+                flight.event.set()
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self):
+        with self._lock:
+            counters = dict(self.counters)
+            lookups = counters.get('memory_hits', 0) + counters.get('memory_misses', 0)
+            hits = counters.get('memory_hits', 0) + counters.get('disk_hits', 0)
+            return {
+                'entries': len(self._entries),
+                'bytes': self._bytes,
+                'max_bytes': self.max_bytes,
+                'ttl': self.ttl,
+                'disk_dir': self.disk_dir,
+                'in_flight': len(self._pending),
+                'hit_rate': hits / lookups if lookups else 0.0,
+                **counters,
+            }
+
+
+results = ResultCache()
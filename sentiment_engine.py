@@ -0,0 +1,163 @@
+import collections
+import hashlib
+import os
+import re
+import threading
+import xml.etree.ElementTree as ET
+
+import job_pool
+import nltk_resources
+
+# Cached, batched sentiment scoring for forum posts and chatbot messages.
+#
+# Polarity (-1.0 to +1.0) is cached by a hash of (scorer, text), so each post
+# is scored once per process no matter how often the page is viewed. Large
+# backlogs of unscored texts are de-duplicated and split across the shared
+# worker pool (job_pool). Scorers are pluggable: 'textblob' is the reference
+# TextBlob polarity, 'lexicon' is a faster scorer over the same adjective
+# lexicon without TextBlob's per-text object construction.
+
+CACHE_SIZE = 1_000_000
+POOL_THRESHOLD = 20_000
+POOL_CHUNK_SIZE = 2_000
+
+_cache = collections.OrderedDict()
+_lock = threading.Lock()
+_counters = collections.Counter()   # per-text hits, misses and evictions
+_textblob = None
+
+
+def textblob_polarity(text):
+    global _textblob
+    if _textblob is None:
+        nltk_resources.ensure()
+        from textblob import TextBlob
+        _textblob = TextBlob
+    return _textblob(text).sentiment.polarity
+
+
+_TOKEN = re.compile(r"[a-z][a-z'\-]*|[!?]")
+_NEGATIONS = {'not', 'never', 'no', "n't", "isn't", "don't", "doesn't", "didn't", "wasn't", "can't", "won't", "cannot"}
+_lexicon = None
+
+
+def _load_lexicon():
+    # Averages polarity/intensity over the senses of each word in TextBlob's
+    # bundled en-sentiment.xml; adverbs (pos RB) act as intensifiers
+    global _lexicon
+    if _lexicon is None:
+        import textblob
+        path = os.path.join(os.path.dirname(textblob.__file__), 'en', 'en-sentiment.xml')
+        senses = collections.defaultdict(list)
+        for word in ET.parse(path).getroot().iter('word'):
+            senses[word.get('form').lower()].append(
+                (float(word.get('polarity', 0)), float(word.get('intensity', 1)), word.get('pos') == 'RB')
+            )
+        _lexicon = {
+            form: (
+                sum(p for p, _, _ in values) / len(values),
+                sum(i for _, i, _ in values) / len(values),
+                any(adverb for _, _, adverb in values),
+            )
+            for form, values in senses.items()
+        }
+    return _lexicon
+
+
+def lexicon_polarity(text):
+    # Mean polarity of lexicon words; intensifiers ("very") scale the next
+    # word and negations flip it by -0.5, as in the pattern algorithm
+    lexicon = _load_lexicon()
+    scores = []
+    modifier = 1.0
+    for token in _TOKEN.findall(text.lower()):
+        if token in _NEGATIONS:
+            modifier *= -0.5
+            continue
+        entry = lexicon.get(token)
+        if entry is None:
+            continue
+        polarity, intensity, adverb = entry
+        if adverb:
+            modifier *= intensity
+            continue
+        scores.append(max(-1.0, min(1.0, polarity * modifier)))
+        modifier = 1.0
+    return sum(scores) / len(scores) if scores else 0.0
+
+
+SCORERS = {
+    'textblob': textblob_polarity,
+    'lexicon': lexicon_polarity,
+}
+DEFAULT_SCORER = os.environ.get('MH_SENTIMENT_SCORER', 'textblob')
+
+
+def register_scorer(name, fn):
+    # fn(text) -> polarity. Pool workers receive fn itself, so it must be a
+    # module-level function for large backlogs to be scored there
+    SCORERS[name] = fn
+
+
+def _key(scorer, text):
+    return hashlib.blake2b(f'{scorer}\0{text}'.encode('utf-8'), digest_size=16).digest()
+
+
+def _score_chunk(fn, texts):
+    return [fn(text) for text in texts]
+
+
+def _score_uncached(texts, scorer, processes):
+    fn = SCORERS[scorer]
+    pool = job_pool.get_pool()
+    if processes != 1 and pool.workers and len(texts) >= POOL_THRESHOLD:
+        jobs = [pool.submit(_score_chunk, fn, texts[i:i + POOL_CHUNK_SIZE])
+                for i in range(0, len(texts), POOL_CHUNK_SIZE)]
+        try:
+            return [score for job in jobs for score in job.result()]
+        finally:
+            for job in jobs:
+                job.release()
+    return _score_chunk(fn, texts)
+
+
+def score_texts(texts, scorer=None, processes=None):
+    # Returns polarities for `texts`, scoring only texts not seen before
+    scorer = scorer or DEFAULT_SCORER
+    keys = [_key(scorer, text) for text in texts]
+    results = [None] * len(texts)
+    missing = {}
+    with _lock:
+        for i, key in enumerate(keys):
+            if key in _cache:
+                _cache.move_to_end(key)
+                results[i] = _cache[key]
+            else:
+                missing.setdefault(key, texts[i])
+        hits = sum(result is not None for result in results)
+        _counters['hits'] += hits
+        _counters['misses'] += len(texts) - hits
+
+    if missing:
+        scores = _score_uncached(list(missing.values()), scorer, processes)
+        fresh = dict(zip(missing, scores))
+        with _lock:
+            _cache.update(fresh)
+            while len(_cache) > CACHE_SIZE:
+                _cache.popitem(last=False)
+                _counters['evictions'] += 1
+        for i, key in enumerate(keys):
+            if results[i] is None:
+                results[i] = fresh[key]
+    return results
+
+
+def score(text, scorer=None):
+    return score_texts([text], scorer)[0]
+
+
+def cache_info():
+    with _lock:
+        lookups = _counters['hits'] + _counters['misses']
+        return {'entries': len(_cache), 'max_entries': CACHE_SIZE, **_counters,
+                'hit_rate': _counters['hits'] / lookups if lookups else 0.0}
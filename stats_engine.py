@@ -0,0 +1,236 @@
+import os
+
+import numpy as np
+import pandas as pd
+
+# Correlation statistics from streaming co-moments.
+#
+# CoMoments holds, for every pair of columns, the pairwise-complete row count
+# and the sums, sums of squares and cross products of the shifted values
+# (x - shift). The sums add across chunks and processes, so a correlation
+# matrix over millions of rows is one vectorized pass per chunk plus a k x k
+# merge, and it matches DataFrame.corr()'s pairwise NaN handling. Shifting
+# by a per-column reference value keeps the sums well conditioned.
+#
+# Bootstrap intervals resample blocks rather than rows: rows are assigned to
+# BOOTSTRAP_BLOCKS random blocks, per-block co-moments are computed in one
+# pass (split into row ranges that a caller-supplied runner may send to worker
+# processes, see engine.aggregation), and each replicate
+# reweights the blocks with multinomial counts. A replicate then costs
+# O(blocks * k^2) instead of O(rows * k).
+
+CHUNK_SIZE = 250_000
+POOL_THRESHOLD = 1_000_000
+BOOTSTRAP_BLOCKS = 256
+BOOTSTRAP_REPLICATES = 1000
+
+
+class CoMoments:
+    def __init__(self, columns, shift=None):
+        self.columns = list(columns)
+        k = len(self.columns)
+        self.shift = None if shift is None else np.asarray(shift, dtype=np.float64)
+        self.n = np.zeros((k, k))
+        self.s = np.zeros((k, k))   # s[i, j]: sum of x_i over rows where i and j are both valid
+        self.q = np.zeros((k, k))   # q[i, j]: sum of x_i^2 over the same rows
+        self.c = np.zeros((k, k))   # c[i, j]: sum of x_i * x_j
+
+    def update(self, values):
+        # values: (rows, k) float array, NaN for missing
+        values = np.asarray(values, dtype=np.float64)
+        if len(values) == 0:
+            return self
+        if self.shift is None:
+            shift = np.nanmean(values, axis=0)
+            self.shift = np.where(np.isnan(shift), 0.0, shift)
+        valid = ~np.isnan(values)
+        x = np.where(valid, values - self.shift, 0.0)
+        m = valid.astype(np.float64)
+        self.n += m.T @ m
+        self.s += x.T @ m
+        self.q += (x * x).T @ m
+        self.c += x.T @ x
+        return self
+
+    def update_frame(self, frame, chunksize=CHUNK_SIZE):
+        for start in range(0, len(frame), chunksize):
+            self.update(frame[self.columns].iloc[start:start + chunksize].to_numpy(dtype=np.float64))
+        return self
+
+    def _rebased(self, shift):
+        # The same moments expressed around another shift vector
+        d = self.shift - shift
+        other = CoMoments(self.columns, shift)
+        other.n = self.n.copy()
+        other.s = self.s + self.n * d[:, None]
+        other.q = self.q + 2 * d[:, None] * self.s + self.n * (d * d)[:, None]
+        other.c = self.c + self.s * d[None, :] + self.s.T * d[:, None] + self.n * np.outer(d, d)
+        return other
+
+    def merge(self, other):
+        if other.shift is None:
+            return self
+        if self.shift is None:
+            self.shift = other.shift.copy()
+        if not np.array_equal(other.shift, self.shift):
+            other = other._rebased(self.shift)
+        self.n += other.n
+        self.s += other.s
+        self.q += other.q
+        self.c += other.c
+        return self
+
+    def covariance(self):
+        return pd.DataFrame(_covariance(self.n, self.s, self.c), index=self.columns, columns=self.columns)
+
+    def correlation(self):
+        return pd.DataFrame(_correlation(self.n, self.s, self.q, self.c), index=self.columns, columns=self.columns)
+
+    def partial_correlation(self):
+        # Correlation of each pair controlling for all other columns
+        return pd.DataFrame(_partial(_correlation(self.n, self.s, self.q, self.c)), index=self.columns, columns=self.columns)
+
+
+def _t(a):
+    return np.swapaxes(a, -1, -2)
+
+
+def _covariance(n, s, c):
+    with np.errstate(invalid='ignore', divide='ignore'):
+        cov = (c - s * _t(s) / n) / (n - 1)
+    return np.where(n > 1, cov, np.nan)
+
+
+def _correlation(n, s, q, c):
+    # Works on single (k, k) moments and on stacked (r, k, k) replicates
+    with np.errstate(invalid='ignore', divide='ignore'):
+        cov = c - s * _t(s) / n
+        var = q - s * s / n
+        corr = cov / np.sqrt(var * _t(var))
+    corr = np.clip(np.where(n > 1, corr, np.nan), -1.0, 1.0)
+    k = corr.shape[-1]
+    diagonal = np.diagonal(n, axis1=-2, axis2=-1) > 1
+    corr[..., np.arange(k), np.arange(k)] = np.where(diagonal, 1.0, np.nan)
+    return corr
+
+
+def _partial(corr):
+    # Columns with undefined correlations (zero variance, too few values)
+    # are dropped before the inversion, one at a time starting with the
+    # most affected, and get NaN partials; the others are still estimated
+    missing = np.isnan(corr)
+    keep = np.ones(len(corr), dtype=bool)
+    while missing[np.ix_(keep, keep)].any():
+        counts = np.where(keep, missing[:, keep].sum(axis=1), -1)
+        keep[np.argmax(counts)] = False
+    partial = np.full_like(corr, np.nan)
+    if keep.any():
+        precision = np.linalg.pinv(corr[np.ix_(keep, keep)])
+        d = np.sqrt(np.abs(np.diagonal(precision)))
+        block = -precision / (d[:, None] * d[None, :])
+        np.fill_diagonal(block, 1.0)
+        partial[np.ix_(keep, keep)] = np.clip(block, -1.0, 1.0)
+    return partial
+
+
+def numeric_columns(frame, columns=None):
+    columns = columns if columns is not None else frame.columns
+    return [c for c in columns if pd.api.types.is_numeric_dtype(frame[c]) and not pd.api.types.is_bool_dtype(frame[c])]
+
+
+def comoments(frame, columns=None, chunksize=CHUNK_SIZE):
+    columns = numeric_columns(frame, columns)
+    return CoMoments(columns).update_frame(frame, chunksize)
+
+
+def range_moments(frame, start, stop, columns, shift, blocks, seed):
+    # Per-block (n, s, q, c) for rows [start, stop) of frame
+    k = len(columns)
+    n = np.zeros((blocks, k, k))
+    s = np.zeros((blocks, k, k))
+    q = np.zeros((blocks, k, k))
+    c = np.zeros((blocks, k, k))
+    rng = np.random.default_rng(seed)
+    for chunk_start in range(start, stop, CHUNK_SIZE):
+        chunk_stop = min(chunk_start + CHUNK_SIZE, stop)
+        values = frame[columns].iloc[chunk_start:chunk_stop].to_numpy(dtype=np.float64)
+        block = rng.integers(0, blocks, len(values))
+        valid = ~np.isnan(values)
+        x = np.where(valid, values - shift, 0.0)
+        m = valid.astype(np.float64)
+        order = np.argsort(block, kind='stable')
+        bounds = np.searchsorted(block[order], np.arange(blocks + 1))
+        x, m = x[order], m[order]
+        for b in range(blocks):
+            xb, mb = x[bounds[b]:bounds[b + 1]], m[bounds[b]:bounds[b + 1]]
+            if len(xb):
+                n[b] += mb.T @ mb
+                s[b] += xb.T @ mb
+                q[b] += (xb * xb).T @ mb
+                c[b] += xb.T @ xb
+    return n, s, q, c
+
+
+def block_moments(frame, columns, shift, blocks=BOOTSTRAP_BLOCKS, seed=0, processes=None, run=None):
+    # Returns per-block (n, s, q, c) arrays of shape (blocks, k, k).
+    # Large frames are split into `processes` row ranges, each a task
+    # (start, stop, columns, shift, blocks, seed) for range_moments; run(tasks)
+    # computes them elsewhere (e.g. in worker processes that load the frame
+    # themselves) and returns the parts in order. Without run the ranges are
+    # computed here.
+    rows = len(frame)
+    processes = processes or os.cpu_count() or 1
+    if run is None or processes == 1 or rows < POOL_THRESHOLD:
+        ranges = [(0, rows)]
+    else:
+        step = -(-rows // processes)
+        ranges = [(start, min(start + step, rows)) for start in range(0, rows, step)]
+    seeds = np.random.SeedSequence(seed).spawn(len(ranges))
+    tasks = [(start, stop, columns, shift, blocks, child) for (start, stop), child in zip(ranges, seeds)]
+    if len(tasks) == 1:
+        parts = [range_moments(frame, *tasks[0])]
+    else:
+        parts = run(tasks)
+    return tuple(sum(part[i] for part in parts) for i in range(4))
+
+
+def bootstrap(frame, columns=None, replicates=BOOTSTRAP_REPLICATES, confidence=0.95, blocks=BOOTSTRAP_BLOCKS,
+              seed=0, processes=None, run=None):
+    # Percentile confidence intervals for every pairwise correlation and
+    # partial correlation. Returns {'correlation': {...}, 'partial': {...}}
+    # with 'estimate', 'low' and 'high' DataFrames each, plus 'rows'.
+    columns = numeric_columns(frame, columns)
+    total = comoments(frame, columns)
+    n, s, q, c = block_moments(frame, columns, total.shift, blocks, seed, processes, run)
+
+    rng = np.random.default_rng(seed)
+    weights = rng.multinomial(blocks, np.full(blocks, 1.0 / blocks), size=replicates).astype(np.float64)
+    corr = _correlation(*(np.einsum('rb,bij->rij', weights, moments) for moments in (n, s, q, c)))
+    partial = np.stack([_partial(replicate) for replicate in corr])
+
+    alpha = (1.0 - confidence) / 2
+    as_frame = lambda values: pd.DataFrame(values, index=columns, columns=columns)
+
+    def interval(estimate, samples):
+        return {
+            'estimate': estimate,
+            'low': as_frame(np.nanquantile(samples, alpha, axis=0)),
+            'high': as_frame(np.nanquantile(samples, 1.0 - alpha, axis=0)),
+        }
+
+    return {
+        'rows': int(np.diag(total.n).max()) if columns else 0,
+        'correlation': interval(total.correlation(), corr),
+        'partial': interval(total.partial_correlation(), partial),
+    }
+
+
+def pairs(result):
+    # Long table of the upper triangle: one row per column pair
+    estimate, low, high = result['estimate'], result['low'], result['high']
+    rows = []
+    columns = list(estimate.columns)
+    for i, a in enumerate(columns):
+        for b in columns[i + 1:]:
+            rows.append({'Variable 1': a, 'Variable 2': b, 'r': estimate.at[a, b], 'CI Low': low.at[a, b], 'CI High': high.at[a, b]})
+    return pd.DataFrame(rows, columns=['Variable 1', 'Variable 2', 'r', 'CI Low', 'CI High'])
@@ -1,18 +1,31 @@
 import streamlit as st
 from streamlit_option_menu import option_menu
 import pandas as pd
-import numpy as np
 import plotly.express as px
 import plotly.graph_objects as go
-import datetime
-from textblob import TextBlob
-import nltk
-from wordcloud import WordCloud
-import matplotlib.pyplot as plt
-
-# Download NLTK data (if not already downloaded)
-nltk.download('punkt')
-nltk.download('averaged_perceptron_tagger')
+import html
+import binned_charts
+import chat_service
+import conversation_store
+import data_export
+import forum_store
+import result_cache
+import geo_shapes
+import job_pool
+import perf_metrics
+import translations
+import engine
+
+# Data loading, filtering, aggregation, prediction and scoring live in the
+# headless engine package; the pages below collect widget values, call it and
+# render the results. Heavy dependencies (scikit-learn, TextBlob/NLTK,
+# WordCloud) still load on first use by the page that needs them
+
+# Stage timings, payload sizes and cache hit rates are collected per page
+perf_metrics.register_cache('results', result_cache.results.stats)
+perf_metrics.register_cache('sentiment', perf_metrics.module_cache('sentiment_engine'))
+perf_metrics.register_cache('chat', chat_service.service_stats)
+perf_metrics.register_cache('jobs', job_pool.pool_stats)
 
 # Set page configuration
 st.set_page_config(
@@ -124,156 +137,49 @@ h1, h2, h3, h4 {
 def set_language():
     if 'language' not in st.session_state:
         st.session_state['language'] = 'English'
-    lang = st.sidebar.selectbox("Choose Language / Hitamo Ururimi", ["English", "Kinyarwanda"], index=0)
+    lang = st.sidebar.selectbox("Choose Language / Hitamo Ururimi", translations.languages(), index=0)
     st.session_state['language'] = lang
 
 def _(text):
-    translations = {
-        "Welcome to the Mental Health Dashboard": "Murakaza neza kuri Dashboard y'Ubuzima bwo mu Mutwe",
-        "This dashboard provides insights into the mental health of Rwandan youth. Explore data visualizations, predictive modeling, and engage with our interactive chatbot.":
-            "Iyi dashboard itanga ishusho y'ubuzima bwo mu mutwe bw'urubyiruko rw'u Rwanda. Reba ibigaragara mu mibare, gutekereza ku byashoboka, no gukoresha chatbot yacu.",
-        "Navigate through the sidebar to explore different sections of the dashboard.":
-            "Koresha urutonde ruri ku ruhande kugira ngo urebe ibice bitandukanye bya dashboard.",
-        "Gender Distribution": "Igitsina",
-        "Age Distribution": "Ikigereranyo cy'Imyaka",
-        "Regional Distribution": "Ikigereranyo cy'Intara",
-        "Mental Health Metrics Over Time": "Ibipimo by'Ubuzima bwo mu Mutwe mu Gihe",
-        "Select metrics to display:": "Hitamo ibipimo ushaka kwerekana:",
-        "Correlation Matrix": "Imbonerahamwe y'Isano",
-        "Scatter Plot Matrix": "Ishusho y'Imbonerahamwe",
-        "Predicting Depression Scores": "Gutekereza ku Manota y'Agahinda",
-        "Adjust the input parameters to predict the depression score.":
-            "Hindura ibipimo by'inyongera kugira ngo uteganye amanota y'agahinda.",
-        "Feature Importance": "Iby'Ingenzi mu Bipimo",
-        "Model Performance": "Imikorere y'Icyitegererezo",
-        "Make a Prediction": "Kora Iteganyizo",
-        "Age": "Imyaka",
-        "Social Media Usage (hours/day)": "Gukoresha Imbuga Nkoranyambaga (amasaha/umunsi)",
-        "Physical Activity (hours/week)": "Imyitozo ngororamubiri (amasaha/icyumweru)",
-        "Sleep Duration (hours/night)": "Igihe cyo Kuryama (amasaha/ijoro)",
-        "Predict": "Teganya",
-        "Predicted Depression Score": "Amanota y'Agahinda yateganyijwe",
-        "Note: Higher scores indicate higher levels of depression.":
-            "Icyitonderwa: Amanota menshi agaragaza urwego rwo hejuru rw'agahinda.",
-        "Mental Health Chatbot": "Chatbot y'Ubuzima bwo mu Mutwe",
-        "Hello! I'm **Menti**, your mental health assistant. How can I help you today?":
-            "Muraho! Ndi **Menti**, umufasha wawe mu buzima bwo mu mutwe. Nigute nakugira inama uyu munsi?",
-        "You": "Wowe",
-        "Tip": "Inama",
-        "Main Menu": "Menyu Nyamukuru",
-        "Home": "Ahabanza",
-        "Data Visualization": "Kwerekana Imibare",
-        "Predictive Modeling": "Gukora Icyitegererezo",
-        "Chatbot": "Chatbot",
-        "Community Forum": "Urubuga rw'Abaturage",
-        "Contact Professionals": "Guhamagara Ababigize umwuga",
-        "Chat with Professional": "Vugana n'Umuhanga",
-        "Login/SignUp": "Injira/Iyandikishe",
-        "Login": "Injira",
-        "SignUp": "Iyandikishe",
-        "Menu": "Menyu",
-        "Email": "Imeli",
-        "Password": "Ijambo ry'Ibanga",
-        "Create a New Account": "Fungura Konti Nshya",
-        "Logged in as": "Winjiye nka",
-        "Logout": "Sohoka",
-        "Invalid credentials or user does not exist.": "Amakuru winjije si yo cyangwa umukoreshwa ntabaho.",
-        "Account created successfully! Please login.": "Konti yawe yashyizweho neza! Nyamuneka injira.",
-        "Error creating account": "Ikosa mu gushyiraho konti",
-        "Please login to access more features.": "Nyamuneka injira kugira ngo ubone ibindi bikorwa.",
-        "Username (anonymous)": "Izina (hatabayeho kumenyekana)",
-        "Share your thoughts or experiences": "Sangiza ibitekerezo cyangwa ubunararibonye bwawe",
-        "Post": "Ohereza",
-        "Your post has been shared!": "Ubutumwa bwawe bwashyizweho!",
-        "Recent Posts": "Ubutumwa Bwanyuma",
-        "at": "ku",
-        "Connect with others anonymously to share experiences and support each other.": "Hura n'abandi mu ibanga kugira ngo musangire ubunararibonye no gufashanya.",
-        "Chatting with": "Uri kuvugana na",
-        "Choose a professional to chat with": "Hitamo umuhanga wo kuganira na we",
-        "Please login to access the chat feature.": "Nyamuneka injira kugira ngo ubone igikorwa cyo kuganira.",
-        "Type your message here...": "Andika ubutumwa bwawe hano...",
-        "Send": "Ohereza",
-        "Contact a Professional": "Vugana n'Umuhanga",
-        "Here you can find contact information for mental health professionals and hospitals in Rwanda.": "Hano ushobora kubona amakuru yo kuvugana n'abahanga mu buzima bwo mu mutwe n'amavuriro mu Rwanda.",
-        "Location": "Aho aherereye",
-        "Phone Number": "Numero ya Telefone",
-        "Call": "Hamagara",
-        "Dialing": "Hamagara",
-        "Email": "Imeli",
-        "Opening email client for": "Ufunguye porogaramu ya imeli kuri",
-        "Sentiment Analysis": "Isesengura ry'Umubabaro",
-        "Sentiment Over Time": "Umubabaro mu Gihe",
-        "Word Cloud": "Ishusho y'Amagambo",
-        "Depression Trends": "Ibigenda Byerekeye Depression",
-        "Anxiety Trends": "Ibigenda Byerekeye Anxiety",
-        "Stress Trends": "Ibigenda Byerekeye Stress",
-        "Heatmap by Region": "Heatmap mu Ntara",
-        "Word Frequency in Posts": "Frequency y'Amagambo mu Butumwa",
-        "Interactive Charts": "Ishusho Zikora",
-        "Hierarchical Demographic Analysis": "Isesengura ry'Ubwoko bw'Abaturage",
-        "Mental Health Trends Over Time": "Ibigenda mu buzima bwo mu mutwe mu gihe",
-        "Stress Level Distribution": "Ikigero cy'Ibibazo by'Umuhangayiko",
-        "Predict your Depression Score": "Teganya Amanota yawe y'Agahinda",
-        "Your Prediction": "Iteganyabikorwa cyawe",
-        "User Login": "Injira y'Umukoresha",
-        "User Signup": "Iyandikishe y'Umukoresha",
-        "Dashboard": "Dashboard",
-        "Analytics": "Igenzura",
-        "Settings": "Imiterere",
-        "Geographical Distribution": "Ikigereranyo cy'Aho aherereye",
-        "Key Performance Indicators": "Ibipimo by'Ingenzi by'Imikorere",
-        "User Demographics": "Demographics z'Abakoresha",
-        "Data Filters": "Guhitamo Data",
-        "Apply Filters": "Shyira mu bikorwa Guhitamo",
-        "Reset Filters": "Subiza Guhitamo",
-        "Total Users": "Abakoresha bose",
-        "Average Depression Score": "Amanota y'Agahinda Akarerwa",
-        "Average Anxiety Score": "Amanota y'Agahinda Akarerwa",
-        "Average Stress Level": "Ikigero cy'Umuhangayiko Akarerwa",
-        "Average Social Media Usage": "Gukoresha Imbuga Nkoranyambaga Akarerwa",
-        "Average Physical Activity": "Imyitozo ngororamubiri Akarerwa",
-        "Average Sleep Duration": "Igihe cyo Kuryama Akarerwa",
-        "Hotline": "Hotline",
-        "Resources to Read": "Ibikoresho byo Gusoma",
-        "Rwanda Biomedical Center (RBC)": "Rwanda Biomedical Center (RBC)",
-        "Ambulance Service": "Ambulance Service",
-        "Mental Health Resources": "Ibikoresho by'Ubuzima bwo mu Mutwe",
-        "Visit our resources page for more information.": "Suzuma urupapuro rw'ibikoresho byacu kugira ngo ubone amakuru menshi.",
-        "Resources": "Ibikoresho",
-    }
-    if st.session_state.get('language') == "Kinyarwanda":
-        return translations.get(text, text)
-    else:
-        return text
-
-# Simulate data function for visualization
-@st.cache(allow_output_mutation=True)
-def simulate_data():
-    np.random.seed(42)
-    num_samples = 1000
-    data = pd.DataFrame({
-        'Age': np.random.randint(15, 25, num_samples),
-        'Gender': np.random.choice(['Male', 'Female'], num_samples),
-        'Depression_Score': np.random.normal(50, 15, num_samples),
-        'Anxiety_Score': np.random.normal(50, 15, num_samples),
-        'Stress_Level': np.random.normal(50, 15, num_samples),
-        'Social_Media_Usage': np.random.randint(0, 12, num_samples),  # Hours per day
-        'Physical_Activity': np.random.randint(0, 14, num_samples),    # Hours per week
-        'Sleep_Duration': np.random.normal(7, 1.5, num_samples),      # Hours per night
-        'Region': np.random.choice(['Kigali', 'Northern', 'Southern', 'Eastern', 'Western'], num_samples),
-        'Date': pd.date_range(start='2022-01-01', periods=num_samples, freq='D').tolist()
-    })
-    # Ensure scores are within 0-100
-    for score in ['Depression_Score', 'Anxiety_Score', 'Stress_Level']:
-        data[score] = data[score].clip(0, 100)
-    # Ensure no missing values in 'Region'
-    data['Region'] = data['Region'].fillna('Unknown')
-    return data
+    # Catalogs are loaded once per process; see translations.py
+    return translations.gettext(text, st.session_state.get('language'))
+
+# Browser payload is measured for every chart, table and image sent
+def plotly_chart(fig, **kwargs):
+    perf_metrics.figure_payload(fig)
+    st.plotly_chart(fig, **kwargs)
+
+def dataframe(frame, **kwargs):
+    perf_metrics.record_payload('table', frame.memory_usage(index=True, deep=True).sum())
+    st.dataframe(frame, **kwargs)
+
+def image(png, **kwargs):
+    perf_metrics.record_payload('image', len(png))
+    st.image(png, **kwargs)
+
+# Heavy computations run in the shared worker pool (job_pool.py). Waiting
+# updates a placeholder, which is where Streamlit interrupts the script when
+# a widget changes; the job is released either way, and a job no other
+# session is waiting for is cancelled. Raises TimeoutError past
+# MH_JOB_TIMEOUT
+def pooled(fn, *args, **kwargs):
+    job = job_pool.get_pool().submit(fn, *args, **kwargs)
+    status = st.empty()
+    try:
+        while not job.wait(0.2):
+            status.caption(f"{_('Computing')}… {job.elapsed:.0f}s")
+        return job.result()
+    finally:
+        job.release()
+        status.empty()
 
 # Predictive Modeling Function
 def predictive_modeling():
     st.header("🤖 " + _("Predictive Modeling"))
-    st.markdown(_("### Predict your Depression Score"))
+    st.markdown("### " + _("Predict your Depression Score"))
+    if not engine.prediction.available():
+        st.warning(_("The prediction model is not available yet. It is trained offline with `python depression_model.py train`."))
+        return
 
     # User input form
     with st.form(key='prediction_form'):
@@ -289,242 +195,346 @@ def predictive_modeling():
         submit_button = st.form_submit_button(label=_('Predict'))
 
     if submit_button:
-        # Simple model for prediction (linear approximation)
-        depression_score = (age * 0.3) + (social_media * 0.5) - (physical_activity * 0.2) + (sleep_duration * 0.4)
-        depression_score = np.clip(depression_score, 0, 100)  # Ensures the score stays within 0-100 range
-        st.success(f"{_('Predicted Depression Score')}: **{depression_score:.2f}**")
+        # Score with the trained model (loaded once per process)
+        with perf_metrics.stage('predict'):
+            prediction = engine.prediction.predict(engine.PredictionInput(
+                age=age, social_media_usage=social_media, physical_activity=physical_activity, sleep_duration=sleep_duration,
+            ))
+        st.success(f"{_('Predicted Depression Score')}: **{prediction.depression_score:.2f}**")
         st.info(_("Note: Higher scores indicate higher levels of depression."))
+        st.caption(f"{_('Model Performance')}: v{prediction.model_version}, MAE {prediction.mae:.2f}, R² {prediction.r2:.2f}")
 
 # Home page design with Hierarchical Demographic Analysis chart
-def home(data):
+def home(dataset):
     st.title("🧠 " + _("Mental Health Dashboard for Rwandan Youth"))
     st.markdown("### " + _("Welcome to the Mental Health Dashboard"))
     st.markdown(_("This dashboard provides insights into the mental health of Rwandan youth. Explore data visualizations, predictive modeling, and engage with our interactive chatbot."))
 
+    # Figures, tables and KPIs are precomputed once per dataset version
+    with perf_metrics.stage('aggregate'):
+        assets = engine.aggregation.home_summary(dataset)
+
     # Hierarchical Demographic Analysis Chart
     st.subheader(_("Hierarchical Demographic Analysis"))
-    demographic_counts = data.groupby(['Age', 'Region', 'Gender']).size().reset_index(name='Counts')
-    fig = px.sunburst(demographic_counts, path=['Region', 'Age', 'Gender'], values='Counts', color='Gender', 
-                      color_discrete_map={'Male': '#636EFA', 'Female': '#EF553B'})
-    st.plotly_chart(fig, use_container_width=True)
+    plotly_chart(assets.sunburst, use_container_width=True)
 
     # Add a Summary Statistics Section
     st.subheader("📈 " + _("Summary Statistics"))
     st.markdown("Display key statistics about the dataset to provide a quick overview.")
-    summary = data.describe().T
-    summary['median'] = data.median()
-    st.dataframe(summary[['mean', 'median', 'std', 'min', 'max']].round(2))
+    dataframe(assets.summary)
 
     # Key Performance Indicators (KPIs)
     st.subheader("🚀 " + _("Key Performance Indicators"))
     col1, col2, col3, col4, col5, col6 = st.columns(6)
+    kpis = assets.kpis
     with col1:
-        st.metric(label=_("Total Users"), value=len(data))
+        st.metric(label=_("Total Users"), value=kpis['count'])
     with col2:
-        avg_dep = data['Depression_Score'].mean().round(2)
+        avg_dep = round(kpis['Depression_Score'], 2)
         st.metric(label=_("Average Depression Score"), value=avg_dep)
     with col3:
-        avg_anx = data['Anxiety_Score'].mean().round(2)
+        avg_anx = round(kpis['Anxiety_Score'], 2)
         st.metric(label=_("Average Anxiety Score"), value=avg_anx)
     with col4:
-        avg_str = data['Stress_Level'].mean().round(2)
+        avg_str = round(kpis['Stress_Level'], 2)
         st.metric(label=_("Average Stress Level"), value=avg_str)
     with col5:
-        avg_sm = data['Social_Media_Usage'].mean().round(2)
+        avg_sm = round(kpis['Social_Media_Usage'], 2)
         st.metric(label=_("Average Social Media Usage"), value=f"{avg_sm} hrs/day")
     with col6:
-        avg_pa = data['Physical_Activity'].mean().round(2)
+        avg_pa = round(kpis['Physical_Activity'], 2)
         st.metric(label=_("Average Physical Activity"), value=f"{avg_pa} hrs/week")
 
 # Data visualization function with more charts and dashboard-like layout
-def data_visualization(data):
+def data_visualization(dataset):
     st.header("📊 " + _("Data Visualization"))
 
     # Apply Filters
     st.sidebar.header(_("Data Filters"))
-    selected_region = st.sidebar.multiselect(_("Select Region(s)"), options=data['Region'].unique(), default=data['Region'].unique())
-    selected_gender = st.sidebar.multiselect(_("Select Gender(s)"), options=data['Gender'].unique(), default=data['Gender'].unique())
+    options = engine.data.filter_options(dataset)
+    selected_region = st.sidebar.multiselect(_("Select Region(s)"), options=options.regions, default=options.regions)
+    selected_gender = st.sidebar.multiselect(_("Select Gender(s)"), options=options.genders, default=options.genders)
     age_range = st.sidebar.slider(_("Select Age Range"), min_value=15, max_value=25, value=(15,25))
-    date_range = st.sidebar.date_input(_("Select Date Range"), [data['Date'].min(), data['Date'].max()])
-
-    # Filter data based on selections
-    filtered_data = data[
-        (data['Region'].isin(selected_region)) &
-        (data['Gender'].isin(selected_gender)) &
-        (data['Age'] >= age_range[0]) & (data['Age'] <= age_range[1]) &
-        (data['Date'] >= pd.to_datetime(date_range[0])) & (data['Date'] <= pd.to_datetime(date_range[1]))
-    ]
+    date_range = st.sidebar.date_input(_("Select Date Range"), [options.date_min, options.date_max])
+
+    # Filter data based on selections using the precomputed bitmap index;
+    # results are shared across sessions by filter spec
+    spec = engine.FilterSpec.create(selected_region, selected_gender, age_range, date_range)
+    filter_key = engine.filtering.filter_key(dataset, spec)
+    with perf_metrics.stage('filter'):
+        filtered_data = engine.filtering.filter_rows(dataset, spec)
 
     st.markdown(f"**{len(filtered_data)}** records found based on the selected filters.")
 
+    # Export the filtered rows or an aggregate view; the file is encoded
+    # chunk by chunk only when the download is clicked
+    with st.expander(_("Export Data")):
+        views = {
+            'rows': _("Filtered rows"),
+            'region_gender': _("By region and gender"),
+            'age': _("By age"),
+            'daily': _("By day"),
+        }
+        col1, col2, col3, col4 = st.columns(4)
+        with col1:
+            view = st.selectbox(_("Data"), options=list(views), format_func=views.get)
+        with col2:
+            export_format = st.selectbox(_("Format"), options=list(data_export.FORMATS), format_func=str.upper)
+        with col3:
+            compression = st.selectbox(_("Compression"), options=data_export.COMPRESSION[export_format])
+        with col4:
+            max_rows = engine.export.max_rows(dataset, export_format, compression, view)
+            row_limit = st.number_input(_("Row limit"), min_value=1, max_value=max_rows,
+                                        value=max(1, min(len(filtered_data), max_rows)))
+        export_options = engine.ExportOptions(format=export_format, view=view, compression=compression, row_limit=int(row_limit))
+        st.download_button(
+            _("Download"),
+            data=lambda: engine.export.export_file(dataset, spec, export_options),
+            file_name=engine.export.file_name(dataset, export_options),
+            mime=engine.export.mime_type(export_options),
+            on_click='ignore',
+        )
+
     # Tabs for organizing visualizations
     tabs = st.tabs(["Overview", "Demographics", "Mental Health Metrics", "Advanced Analysis"])
 
     # Overview Tab
     with tabs[0]:
         st.subheader(_("Key Metrics Overview"))
+        with perf_metrics.stage('aggregate'):
+            overview = engine.aggregation.overview(dataset, spec)
         col1, col2, col3 = st.columns(3)
         with col1:
-            avg_dep = filtered_data['Depression_Score'].mean().round(2)
+            avg_dep = round(overview.kpis.means['Depression_Score'], 2)
             st.metric(label=_("Average Depression Score"), value=avg_dep)
         with col2:
-            avg_anx = filtered_data['Anxiety_Score'].mean().round(2)
+            avg_anx = round(overview.kpis.means['Anxiety_Score'], 2)
             st.metric(label=_("Average Anxiety Score"), value=avg_anx)
         with col3:
-            avg_str = filtered_data['Stress_Level'].mean().round(2)
+            avg_str = round(overview.kpis.means['Stress_Level'], 2)
             st.metric(label=_("Average Stress Level"), value=avg_str)
 
         # Geographical Map
         st.subheader(_("Geographical Distribution of Depression Scores"))
-        region_metrics = filtered_data.groupby('Region')['Depression_Score'].mean().reset_index()
-        fig = px.choropleth(
-            region_metrics,
-            locations='Region',
-            locationmode='USA-states',  # Adjust as per your map requirements
-            color='Depression_Score',
-            color_continuous_scale='Viridis',
-            scope='africa',
-            labels={'Depression_Score': 'Avg Depression Score'},
-            title='Average Depression Score by Region'
-        )
-        st.plotly_chart(fig, use_container_width=True)
+        # Without generated boundaries the map shows centroid markers, which
+        # have no detail levels
+        map_detail = geo_shapes.DEFAULT_ZOOM
+        if geo_shapes.available('province'):
+            map_detail = st.radio(_("Map Detail"), options=list(geo_shapes.ZOOMS), index=list(geo_shapes.ZOOMS).index(geo_shapes.DEFAULT_ZOOM), horizontal=True)
+        with perf_metrics.stage('figure'):
+            fig = geo_shapes.choropleth(
+                overview.region_means,
+                locations='Region',
+                color='Depression_Score',
+                level='province',
+                zoom=map_detail,
+                color_continuous_scale='Viridis',
+                labels={'Depression_Score': 'Avg Depression Score'},
+                title='Average Depression Score by Region'
+            )
+        plotly_chart(fig, use_container_width=True)
 
     # Demographics Tab
     with tabs[1]:
         st.subheader(_("User Demographics"))
 
+        with perf_metrics.stage('aggregate'):
+            demographics = engine.aggregation.demographics(filtered_data)
+
         # Age Distribution
         col1, col2 = st.columns(2)
         with col1:
-            st.markdown(_("**Age Distribution**"))
-            fig = px.histogram(filtered_data, x='Age', nbins=10, color='Gender', barmode='overlay', opacity=0.7)
-            st.plotly_chart(fig, use_container_width=True)
+            st.markdown("**" + _("Age Distribution") + "**")
+            with perf_metrics.stage('figure'):
+                fig = binned_charts.histogram(filtered_data, 'Age', nbins=10, color='Gender', opacity=0.7)
+            plotly_chart(fig, use_container_width=True)
         with col2:
-            st.markdown(_("**Gender Distribution**"))
-            fig = px.pie(filtered_data, names='Gender', title='Gender Distribution', color_discrete_map={'Male': '#636EFA', 'Female': '#EF553B'})
-            st.plotly_chart(fig, use_container_width=True)
+            st.markdown("**" + _("Gender Distribution") + "**")
+            with perf_metrics.stage('figure'):
+                fig = px.pie(demographics.gender_counts, names='Gender', values='Counts', title='Gender Distribution', color_discrete_map={'Male': '#636EFA', 'Female': '#EF553B'})
+            plotly_chart(fig, use_container_width=True)
 
         # Treemap
-        st.markdown(_("**User Distribution by Region and Gender**"))
-        fig = px.treemap(filtered_data, path=['Region', 'Gender'], title='User Distribution', color='Gender',
-                         color_discrete_map={'Male': '#636EFA', 'Female': '#EF553B'})
-        st.plotly_chart(fig, use_container_width=True)
+        st.markdown("**" + _("User Distribution by Region and Gender") + "**")
+        with perf_metrics.stage('figure'):
+            fig = px.treemap(demographics.region_gender_counts, path=['Region', 'Gender'], values='Counts', title='User Distribution', color='Gender',
+                             color_discrete_map={'Male': '#636EFA', 'Female': '#EF553B'})
+        plotly_chart(fig, use_container_width=True)
 
     # Mental Health Metrics Tab
     with tabs[2]:
         st.subheader(_("Mental Health Metrics"))
 
         # Mental Health Trends over Time (Depression, Anxiety, Stress)
-        st.markdown(_("**Mental Health Trends Over Time**"))
-        metrics = ['Depression_Score', 'Anxiety_Score', 'Stress_Level']
+        st.markdown("**" + _("Mental Health Trends Over Time") + "**")
+        metrics = engine.aggregation.TREND_METRICS
         selected_metrics = st.multiselect(_("Select metrics to display:"), metrics, default=metrics)
         if selected_metrics:
-            fig = px.line(
-                filtered_data, x='Date', y=selected_metrics,
-                labels={'value': _('Score'), 'variable': _('Metric')},
-                color_discrete_sequence=px.colors.qualitative.G10
-            )
-            st.plotly_chart(fig, use_container_width=True)
+            x_range = None
+            bounds = engine.aggregation.date_bounds(filtered_data)
+            if bounds is not None:
+                x_range = st.slider(_("Zoom to date range"), min_value=bounds[0], max_value=bounds[1], value=bounds)
+            with perf_metrics.stage('aggregate'):
+                trend_data = engine.aggregation.trend(filtered_data, selected_metrics, x_range=x_range)
+            with perf_metrics.stage('figure'):
+                fig = px.line(
+                    trend_data, x='Date', y=selected_metrics,
+                    labels={'value': _('Score'), 'variable': _('Metric')},
+                    color_discrete_sequence=px.colors.qualitative.G10
+                )
+            plotly_chart(fig, use_container_width=True)
 
         # Distribution Plots
-        st.markdown(_("**Distribution of Mental Health Scores**"))
+        st.markdown("**" + _("Distribution of Mental Health Scores") + "**")
         col1, col2, col3 = st.columns(3)
         with col1:
-            fig = px.histogram(filtered_data, x='Depression_Score', nbins=20, title='Depression Score Distribution', color='Gender', barmode='overlay', opacity=0.7)
-            st.plotly_chart(fig, use_container_width=True)
+            with perf_metrics.stage('figure'):
+                fig = binned_charts.histogram(filtered_data, 'Depression_Score', nbins=20, title='Depression Score Distribution', color='Gender', opacity=0.7)
+            plotly_chart(fig, use_container_width=True)
         with col2:
-            fig = px.histogram(filtered_data, x='Anxiety_Score', nbins=20, title='Anxiety Score Distribution', color='Gender', barmode='overlay', opacity=0.7)
-            st.plotly_chart(fig, use_container_width=True)
+            with perf_metrics.stage('figure'):
+                fig = binned_charts.histogram(filtered_data, 'Anxiety_Score', nbins=20, title='Anxiety Score Distribution', color='Gender', opacity=0.7)
+            plotly_chart(fig, use_container_width=True)
         with col3:
-            fig = px.histogram(filtered_data, x='Stress_Level', nbins=20, title='Stress Level Distribution', color='Gender', barmode='overlay', opacity=0.7)
-            st.plotly_chart(fig, use_container_width=True)
+            with perf_metrics.stage('figure'):
+                fig = binned_charts.histogram(filtered_data, 'Stress_Level', nbins=20, title='Stress Level Distribution', color='Gender', opacity=0.7)
+            plotly_chart(fig, use_container_width=True)
 
     # Advanced Analysis Tab
     with tabs[3]:
         st.subheader(_("Advanced Analysis"))
 
         # Correlation Matrix
-        st.markdown(_("**Correlation Matrix**"))
-        corr = filtered_data[['Depression_Score', 'Anxiety_Score', 'Stress_Level', 'Social_Media_Usage', 
-                            'Physical_Activity', 'Sleep_Duration', 'Age']].corr()
-        fig = px.imshow(corr, text_auto=True, aspect="auto", color_continuous_scale='RdBu_r')
-        fig.update_layout(title_text=_("Correlation Matrix of Mental Health Metrics"))
-        st.plotly_chart(fig, use_container_width=True)
+        st.markdown("**" + _("Correlation Matrix") + "**")
+        with perf_metrics.stage('aggregate'):
+            corr = engine.aggregation.correlation(dataset, spec, filtered_data)
+        with perf_metrics.stage('figure'):
+            fig = px.imshow(corr, text_auto=True, aspect="auto", color_continuous_scale='RdBu_r')
+            fig.update_layout(title_text=_("Correlation Matrix of Mental Health Metrics"))
+        plotly_chart(fig, use_container_width=True)
+
+        # Bootstrap intervals and partial correlations for the filtered
+        # rows, cached per filter spec
+        with perf_metrics.stage('aggregate'):
+            stats = engine.aggregation.correlation_stats(dataset, spec)
+        kind = st.radio(_("Correlation Type"), options=['correlation', 'partial'], horizontal=True,
+                        format_func=lambda k: _("Pearson") if k == 'correlation' else _("Partial"))
+        st.markdown(f"95% bootstrap confidence intervals over **{stats.rows}** rows")
+        dataframe(stats.intervals[kind].round(3), use_container_width=True, hide_index=True)
 
         # Scatter Plot Matrix
-        st.markdown(_("**Scatter Plot Matrix**"))
-        fig = px.scatter_matrix(
-            filtered_data,
-            dimensions=['Depression_Score', 'Anxiety_Score', 'Stress_Level', 'Social_Media_Usage', 'Physical_Activity', 'Sleep_Duration'],
-            color='Gender',
-            title=_("Scatter Plot Matrix of Mental Health Metrics"),
-            color_discrete_map={'Male': '#636EFA', 'Female': '#EF553B'}
-        )
-        st.plotly_chart(fig, use_container_width=True)
+        st.markdown("**" + _("Scatter Plot Matrix") + "**")
+        try:
+            with perf_metrics.stage('figure'):
+                fig = result_cache.results.get_or_compute(('scatter_matrix', st.session_state.get('language')) + filter_key, lambda: pooled(
+                    engine.charts.scatter_matrix,
+                    dataset.name,
+                    dataset.version,
+                    spec,
+                    dimensions=('Depression_Score', 'Anxiety_Score', 'Stress_Level', 'Social_Media_Usage', 'Physical_Activity', 'Sleep_Duration'),
+                    color='Gender',
+                    title=_("Scatter Plot Matrix of Mental Health Metrics"),
+                    color_discrete_map={'Male': '#636EFA', 'Female': '#EF553B'}
+                ))
+            plotly_chart(fig, use_container_width=True)
+        except TimeoutError:
+            st.warning(_("This chart took too long to compute. Try narrowing the filters."))
 
         # Trellis Plot (Faceted Scatter)
-        st.markdown(_("**Trellis Plot: Depression vs. Anxiety by Gender**"))
-        fig = px.scatter(
-            filtered_data,
-            x='Depression_Score',
-            y='Anxiety_Score',
-            color='Gender',
-            facet_col='Gender',
-            trendline='ols',
-            title='Depression vs. Anxiety Scores by Gender'
-        )
-        st.plotly_chart(fig, use_container_width=True)
+        st.markdown("**" + _("Trellis Plot: Depression vs. Anxiety by Gender") + "**")
+        try:
+            with perf_metrics.stage('figure'):
+                fig = result_cache.results.get_or_compute(('trellis',) + filter_key, lambda: pooled(
+                    engine.charts.trellis,
+                    dataset.name,
+                    dataset.version,
+                    spec,
+                    x='Depression_Score',
+                    y='Anxiety_Score',
+                    facet='Gender',
+                    title='Depression vs. Anxiety Scores by Gender',
+                    color_discrete_map=binned_charts.GENDER_COLORS
+                ))
+            plotly_chart(fig, use_container_width=True)
+        except TimeoutError:
+            st.warning(_("This chart took too long to compute. Try narrowing the filters."))
 
 # Chatbot Interface
+def chat_bubble(role, content):
+    if role == 'user':
+        return f"<div class='chat-message user-message'><strong>{_('You')}:</strong> {html.escape(content)}</div>"
+    return f"<div class='chat-message assistant-message'><strong>Menti:</strong> {html.escape(content)}</div>"
+
 def chatbot_interface():
     st.header("🧠 " + _("Mental Health Chatbot"))
 
     st.write(_("Hello! I'm **Menti**, your mental health assistant. How can I help you today?"))
 
-    if 'history' not in st.session_state:
-        st.session_state['history'] = []
-
-    # Chat interface
-    user_input = st.text_input(_("You") + ":", "", key="input")
+    # History is kept in the conversation store, not in session state
+    if 'conversation_id' not in st.session_state:
+        st.session_state['conversation_id'] = conversation_store.new_conversation_id()
+        st.session_state['chat_cursors'] = [None]
+    if 'chat_tokens' not in st.session_state:
+        st.session_state['chat_tokens'] = engine.text.conversation_counter()
+    conversation = st.session_state['conversation_id']
+    cursors = st.session_state['chat_cursors']
+
+    # Display a window of the conversation as a single element; older
+    # windows are fetched with a keyset cursor
+    with perf_metrics.stage('load'):
+        messages, older_cursor = conversation_store.window(conversation, limit=20, before=cursors[-1])
+    col1, col2 = st.columns(2)
+    with col1:
+        if older_cursor is not None and st.button(_("Earlier messages")):
+            cursors.append(older_cursor)
+            st.rerun()
+    with col2:
+        if len(cursors) > 1 and st.button(_("Latest messages")):
+            cursors[:] = [None]
+            st.rerun()
+    st.markdown("<div class='chat-container'>" + "".join(chat_bubble(m['role'], m['content']) for m in messages) + "</div>",
+                unsafe_allow_html=True)
+
+    # Chat interface; the reply streams in from the shared chat service
+    user_input = st.chat_input(_("Type your message here..."))
     if user_input:
-        # Simulate chatbot response using TextBlob for sentiment analysis
-        blob = TextBlob(user_input)
-        sentiment = blob.sentiment.polarity
-        if sentiment > 0.1:
-            assistant_response = "That's great to hear! How can I assist you further?"
-        elif sentiment < -0.1:
-            assistant_response = "I'm sorry you're feeling this way. Please consider reaching out to a professional for support."
+        cursors[:] = [None]
+        st.markdown(chat_bubble('user', user_input), unsafe_allow_html=True)
+        engine.text.add_message(st.session_state.chat_tokens, user_input)
+        try:
+            stream = chat_service.get_service().submit(conversation, user_input)
+        except chat_service.ChatBusy:
+            st.warning(_("Menti is busy right now. Please try again in a moment."))
         else:
-            assistant_response = "I understand. Could you please provide more details or specify how I can help you?"
-
-        st.session_state.history.append({"user": user_input, "assistant": assistant_response})
-
-    # Display conversation history
-    st.markdown("<div class='chat-container'>", unsafe_allow_html=True)
-    for chat in st.session_state.history:
-        st.markdown(f"<div class='chat-message user-message'><strong>{_('You')}:</strong> {chat['user']}</div>", unsafe_allow_html=True)
-        st.markdown(f"<div class='chat-message assistant-message'><strong>Menti:</strong> {chat['assistant']}</div>", unsafe_allow_html=True)
-    st.markdown("</div>", unsafe_allow_html=True)
+            placeholder = st.empty()
+            try:
+                with perf_metrics.stage('chat'):
+                    for token in stream.tokens():
+                        placeholder.markdown(chat_bubble('assistant', stream.text), unsafe_allow_html=True)
+            except Exception:
+                stream.cancel()
+                st.error(_("Menti could not reply right now. Please try again."))
 
     # Optionally, add a Word Cloud based on user inputs
     if st.checkbox(_("Show Word Cloud of Your Conversations")):
-        all_text = ' '.join([chat['user'] for chat in st.session_state.history])
-        if all_text:
-            wordcloud = WordCloud(width=800, height=400, background_color='white').generate(all_text)
-            plt.figure(figsize=(10, 5))
-            plt.imshow(wordcloud, interpolation='bilinear')
-            plt.axis('off')
-            st.pyplot(plt)
-        else:
-            st.write(_("No conversations to display."))
+        # Rendered from the running token counts; cached until a new message arrives
+        try:
+            with perf_metrics.stage('wordcloud'):
+                png = engine.text.conversation_wordcloud(st.session_state.chat_tokens, render=pooled)
+            if png:
+                image(png, use_container_width=True)
+            else:
+                st.write(_("No conversations to display."))
+        except TimeoutError:
+            st.warning(_("The word cloud took too long to draw."))
 
 # Community Forum (Simulated Feature)
 def community_forum():
     st.header("👥 " + _("Community Forum"))
     st.markdown(_("Connect with others anonymously to share experiences and support each other."))
 
-    if 'posts' not in st.session_state:
-        st.session_state['posts'] = []
+    if 'forum_cursors' not in st.session_state:
+        st.session_state['forum_cursors'] = [None]
 
     with st.form(key='post_form'):
         username = st.text_input(_("Username (anonymous)"), "")
@@ -534,19 +544,29 @@ def community_forum():
     if submit_post:
         if username.strip() == "":
             username = "Anonymous"
-        st.session_state.posts.append({
-            "username": username,
-            "content": post_content,
-            "timestamp": datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-        })
+        forum_store.add_post(username, post_content)
+        st.session_state['forum_cursors'] = [None]
         st.success(_("Your post has been shared!"))
 
+    # Posts are shared by all users; pages are fetched with a keyset cursor
     st.subheader(_("Recent Posts"))
-    for post in reversed(st.session_state.posts[-10:]):
+    cursors = st.session_state['forum_cursors']
+    posts, next_cursor = forum_store.recent_posts(limit=10, cursor=cursors[-1])
+    for post in posts:
         st.markdown(f"**{post['username']}** { _('at') } {post['timestamp']}")
         st.markdown(f"{post['content']}")
         st.markdown("---")
 
+    col1, col2 = st.columns(2)
+    with col1:
+        if len(cursors) > 1 and st.button(_("Newer posts")):
+            cursors.pop()
+            st.rerun()
+    with col2:
+        if next_cursor is not None and st.button(_("Older posts")):
+            cursors.append(next_cursor)
+            st.rerun()
+
 # Contact Professionals (Simulated Feature)
 def contact_professionals():
     st.header("📞 " + _("Contact a Professional"))
@@ -573,41 +593,203 @@ def contact_professionals():
     col1, col2 = st.columns(2)
     with col1:
         if st.button(_("Call")):
-            st.info(_("Dialing ") + f"{prof_info['Phone Number']}...")
+            st.info(_("Dialing") + f" {prof_info['Phone Number']}...")
     with col2:
         if st.button(_("Email")):
-            st.info(_("Opening email client for ") + f"{prof_info['Email']}...")
+            st.info(_("Opening email client for") + f" {prof_info['Email']}...")
 
 # Enhanced Sentiment Analysis Feature
 def sentiment_analysis():
     st.header("📊 " + _("Sentiment Analysis"))
 
-    if 'posts' not in st.session_state or len(st.session_state.posts) == 0:
+    with perf_metrics.stage('sentiment'):
+        forum = engine.sentiment.forum_sentiment()
+    if forum.posts == 0:
         st.info(_("No posts available for sentiment analysis."))
         return
 
-    sentiments = []
-    for post in st.session_state.posts:
-        blob = TextBlob(post['content'])
-        sentiments.append(blob.sentiment.polarity)
-
-    sentiment_df = pd.DataFrame({
-        'Post': [post['content'] for post in st.session_state.posts],
-        'Sentiment': sentiments,
-        'Date': [post['timestamp'] for post in st.session_state.posts]
-    })
-
     st.subheader(_("Sentiment Over Time"))
-    fig = px.line(sentiment_df, x='Date', y='Sentiment', title='Sentiment Over Time', markers=True)
-    st.plotly_chart(fig, use_container_width=True)
+    fig = px.line(forum.trend, x='Date', y='Sentiment', title='Sentiment Over Time', markers=True)
+    plotly_chart(fig, use_container_width=True)
 
     st.subheader(_("Word Cloud of Posts"))
-    all_text = ' '.join([post['content'] for post in st.session_state.posts])
-    wordcloud = WordCloud(width=800, height=400, background_color='white').generate(all_text)
-    plt.figure(figsize=(10, 5))
-    plt.imshow(wordcloud, interpolation='bilinear')
-    plt.axis('off')
-    st.pyplot(plt)
+    try:
+        with perf_metrics.stage('wordcloud'):
+            png = engine.text.forum_wordcloud(render=pooled)
+        if png:
+            image(png, use_container_width=True)
+    except TimeoutError:
+        st.warning(_("The word cloud took too long to draw."))
+
+# National indicators (WHO GHO) alongside the survey data
+def analytics(dataset):
+    st.header("📈 " + _("Analytics"))
+
+    catalog = engine.indicators.catalog()
+    indicators = catalog.names
+    if not indicators:
+        st.info(_("No WHO indicator data available."))
+        return
+
+    # Numeric indicators are charted as time series; policy indicators
+    # (Yes/No values) are listed in a table
+    st.subheader(_("National Indicators"))
+    # With only policy indicators the selectbox would have no options
+    if not catalog.numeric:
+        st.info(_("No WHO indicator data available."))
+    else:
+        code = st.selectbox(_("Select Indicator"), options=catalog.numeric, format_func=lambda c: indicators[c])
+        dimensions = catalog.dimensions(code)
+        if len(dimensions) > 1:
+            dimensions = st.multiselect(_("Select Dimension(s)"), options=dimensions, default=dimensions,
+                                        format_func=lambda d: catalog.dimension_names[(code, d)])
+        series = engine.indicators.series(code, dimensions)
+
+        fig = go.Figure()
+        for dimension, group in series.groupby('Dimension', sort=False):
+            name = group['Dimension_Name'].iloc[0]
+            if group['Low'].notna().any():
+                fig.add_trace(go.Scatter(x=group['Year'], y=group['High'], mode='lines', line=dict(width=0), showlegend=False, hoverinfo='skip'))
+                fig.add_trace(go.Scatter(x=group['Year'], y=group['Low'], mode='lines', line=dict(width=0), fill='tonexty', showlegend=False,
+                                         hoverinfo='skip', fillcolor='rgba(99, 110, 250, 0.15)'))
+            fig.add_trace(go.Scatter(x=group['Year'], y=group['Numeric'], mode='lines+markers', name=name))
+        fig.update_layout(title=indicators[code], xaxis_title='Year', yaxis_title=indicators[code])
+        plotly_chart(fig, use_container_width=True)
+
+    if catalog.policy:
+        st.subheader(_("Mental Health Policy"))
+        dataframe(engine.indicators.policy_table(catalog.policy), use_container_width=True, hide_index=True)
+
+    # Correlations with bootstrap intervals for every loaded dataset; results
+    # are cached per dataset version
+    st.subheader(_("Correlation Analysis"))
+    datasets = {dataset.name: dataset, **engine.data.load_datasets(['rwanda_youth', 'youth_health'])}
+    name = st.selectbox(_("Select Dataset"), options=list(datasets), format_func=lambda name: name.replace('_', ' ').title())
+    with perf_metrics.stage('aggregate'):
+        stats = engine.aggregation.correlation_stats(datasets[name])
+    kind = st.radio(_("Correlation Type"), options=['correlation', 'partial'], horizontal=True,
+                    format_func=lambda k: _("Pearson") if k == 'correlation' else _("Partial"))
+    fig = px.imshow(stats.estimates[kind], text_auto='.2f', aspect="auto", color_continuous_scale='RdBu_r', zmin=-1, zmax=1)
+    plotly_chart(fig, use_container_width=True)
+    st.markdown(f"95% bootstrap confidence intervals over **{stats.rows}** rows")
+    dataframe(stats.intervals[kind].round(3), use_container_width=True, hide_index=True)
+
+    # Cohorts over the youth survey, DHS and youth health data, aligned on
+    # age band, province, gender and education. Definitions are shared by
+    # all users; comparisons are cached per dataset version
+    st.subheader(_("Cohort Comparison"))
+    key_labels = {'age_band': _("Age Band"), 'province': _("Province"), 'gender': _("Gender"), 'education': _("Education")}
+    columns = engine.cohorts.levels()
+    with st.expander(_("Define a Cohort")):
+        cohort_name = st.text_input(_("Cohort Name"))
+        conditions = {}
+        col1, col2 = st.columns(2)
+        for i, key in enumerate(engine.cohorts.KEYS):
+            with col1 if i % 2 == 0 else col2:
+                conditions[key] = st.multiselect(key_labels[key], options=columns[key], key=f'cohort_{key}')
+        attributes = [column for column in columns if column not in engine.cohorts.KEYS]
+        attribute = st.selectbox(_("Dataset Attribute"), options=[None] + attributes, format_func=lambda c: '—' if c is None else c)
+        if attribute:
+            conditions[attribute] = st.multiselect(_("Values"), options=columns[attribute])
+        if st.button(_("Save Cohort")):
+            if cohort_name.strip():
+                engine.cohorts.save(engine.Cohort.create(cohort_name.strip(), conditions))
+                st.success(_("Cohort saved."))
+            else:
+                st.warning(_("Please enter a cohort name."))
+
+    cohorts = engine.cohorts.saved()
+    names = [cohort.name for cohort in cohorts]
+    col1, col2 = st.columns(2)
+    with col1:
+        selected = st.multiselect(_("Cohorts to Compare"), options=names, default=names[:2])
+    with col2:
+        group_by = st.multiselect(_("Group By"), options=engine.cohorts.KEYS, default=['age_band'], format_func=key_labels.get)
+    if selected and group_by:
+        with perf_metrics.stage('aggregate'):
+            comparison = engine.cohorts.compare([cohort for cohort in cohorts if cohort.name in selected], group_by)
+        table = comparison.table
+        measures = [column for column in table.columns if ': ' in column and not column.endswith(': rows')]
+        if measures:
+            measure = st.selectbox(_("Measure"), options=measures)
+            chart = table.assign(Group=table[group_by].astype(str).agg(' / '.join, axis=1))
+            fig = px.bar(chart, x='Group', y=measure, color='Cohort', barmode='group', title=measure)
+            plotly_chart(fig, use_container_width=True)
+        dataframe(table.round(3), use_container_width=True, hide_index=True)
+        for cohort, name, reason in comparison.skipped:
+            st.caption(f"{name.replace('_', ' ').title()} ({cohort or _('all cohorts')}): {reason}")
+
+    with st.expander(_("Delete a Cohort")):
+        doomed = st.selectbox(_("Saved Cohort"), options=names)
+        if doomed and st.button(_("Delete Cohort")):
+            engine.cohorts.delete(doomed)
+            st.rerun()
+
+    # Survey yearly means come from the aggregate cube, not the raw rows
+    st.subheader(_("Survey Data"))
+    with perf_metrics.stage('aggregate'):
+        survey = engine.aggregation.yearly_means(dataset)
+    fig = px.bar(survey.melt(id_vars='Year', var_name='Metric', value_name='Average'), x='Year', y='Average', color='Metric',
+                 barmode='group', title='Survey Averages by Year')
+    fig.update_xaxes(type='category')
+    plotly_chart(fig, use_container_width=True)
+
+# Performance metrics and per-session profiling
+def settings():
+    st.header("⚙️ " + _("Settings"))
+    st.markdown(_("Customize your dashboard settings here."))
+
+    st.subheader(_("Performance"))
+    st.checkbox(_("Profile my page loads (cProfile)"), key='profile_reruns')
+
+    snapshot = perf_metrics.snapshot()
+    st.caption(f"{_('Collected over')} {snapshot['uptime_seconds'] / 60:.1f} {_('minutes in this worker process')}")
+
+    st.markdown("**" + _("Stage Timings (seconds)") + "**")
+    if snapshot['timings']:
+        timings = pd.DataFrame(snapshot['timings']).drop(columns=['buckets'])
+        dataframe(timings.round(4), use_container_width=True, hide_index=True)
+    else:
+        st.info(_("No timings recorded yet."))
+
+    st.markdown("**" + _("Browser Payload (bytes)") + "**")
+    if snapshot['payloads']:
+        dataframe(pd.DataFrame(snapshot['payloads']), use_container_width=True, hide_index=True)
+        st.caption(f"{_('Figure sizes are sampled')}: {snapshot['payload_sample']:.0%} {_('of figures, and every figure while profiling')}")
+    else:
+        st.info(_("No payloads recorded yet."))
+
+    st.markdown("**" + _("Caches") + "**")
+    caches = [{'cache': name, **{k: v for k, v in stats.items() if isinstance(v, (int, float))}} for name, stats in snapshot['caches'].items()]
+    if caches:
+        dataframe(pd.DataFrame(caches), use_container_width=True, hide_index=True)
+
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        st.download_button(_("Export Prometheus"), perf_metrics.prometheus_text(snapshot), file_name='metrics.prom', mime='text/plain')
+    with col2:
+        st.download_button(_("Export JSON"), perf_metrics.json_text(snapshot), file_name='metrics.json', mime='application/json')
+    with col3:
+        if st.button(_("Reset Metrics")):
+            perf_metrics.registry.reset()
+            st.rerun()
+
+    # Text shown without a catalog entry in this worker process
+    st.subheader(_("Missing Translations"))
+    missing = translations.missing()
+    if missing:
+        dataframe(pd.DataFrame(missing), use_container_width=True, hide_index=True)
+    else:
+        st.info(_("No missing translations recorded."))
+    for catalog in translations.skipped():
+        st.warning(f"{_('Translation catalog skipped')}: {catalog['file']} ({catalog['reason']})")
+
+    profiles = st.session_state.get('profiles', {})
+    if profiles:
+        st.subheader(_("Profiles"))
+        for name, profile in profiles.items():
+            with st.expander(f"{name} ({profile['seconds']:.3f}s)"):
+                st.code(profile['text'])
 
 # User Authentication (Simulated Feature)
 def user_authentication():
@@ -677,18 +859,20 @@ def sidebar_hotline_and_resources():
 def main():
     set_language()
 
-    # Sidebar navigation with additional options
-    options = [
-        _("Home"),
-        _("Data Visualization"),
-        _("Predictive Modeling"),
-        _("Chatbot"),
-        _("Community Forum"),
-        _("Contact Professionals"),
-        _("Sentiment Analysis"),
-        _("Analytics"),
-        _("Settings"),
+    # Sidebar navigation with additional options; pages are keyed by their
+    # English name for metrics
+    pages = [
+        "Home",
+        "Data Visualization",
+        "Predictive Modeling",
+        "Chatbot",
+        "Community Forum",
+        "Contact Professionals",
+        "Sentiment Analysis",
+        "Analytics",
+        "Settings",
     ]
+    options = [_(page) for page in pages]
     icons = ["house", "bar-chart", "cpu", "chat-dots", "people", "telephone", "emoji-smile", "graph-up", "gear"]
 
     selected = option_menu(
@@ -704,9 +888,18 @@ def main():
             "nav-link-selected": {"background-color": "#FF6B6B"},
         },
     )
+    page = pages[options.index(selected)] if selected in options else selected
+
+    # Reruns are profiled only for sessions that opted in on the Settings page
+    with perf_metrics.page(page), perf_metrics.profile(st.session_state.get('profile_reruns', False)) as profile:
+        render_page(page)
+    if profile.get('text'):
+        st.session_state.setdefault('profiles', {})[page] = profile
 
-    # Simulate data once to avoid regenerating it on every interaction
-    data = simulate_data()
+def render_page(page):
+    # Load the memory-mapped survey data; fall back to simulated data when the CSV is absent
+    with perf_metrics.stage('load'):
+        dataset = engine.data.load_survey()
 
     # Display user authentication sidebar
     user_authentication()
@@ -715,28 +908,24 @@ def main():
     sidebar_hotline_and_resources()
 
     # Handle navigation
-    if selected == _("Home"):
-        home(data)
-    elif selected == _("Data Visualization"):
-        data_visualization(data)
-    elif selected == _("Predictive Modeling"):
+    if page == "Home":
+        home(dataset)
+    elif page == "Data Visualization":
+        data_visualization(dataset)
+    elif page == "Predictive Modeling":
         predictive_modeling()
-    elif selected == _("Chatbot"):
+    elif page == "Chatbot":
         chatbot_interface()
-    elif selected == _("Community Forum"):
+    elif page == "Community Forum":
         community_forum()
-    elif selected == _("Contact Professionals"):
+    elif page == "Contact Professionals":
         contact_professionals()
-    elif selected == _("Sentiment Analysis"):
+    elif page == "Sentiment Analysis":
         sentiment_analysis()
-    elif selected == _("Analytics"):
-        st.header(_("Analytics"))
-        st.markdown(_("This section can include advanced analytics features such as predictive modeling insights, trend analysis, and more."))
-        # Placeholder for future analytics features
-    elif selected == _("Settings"):
-        st.header(_("Settings"))
-        st.markdown(_("Customize your dashboard settings here."))
-        # Placeholder for future settings features
+    elif page == "Analytics":
+        analytics(dataset)
+    elif page == "Settings":
+        settings()
 
 if __name__ == '__main__':
     main()
@@ -0,0 +1,32 @@
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+REGIONS = ['Eastern', 'Kigali', 'Northern', 'Southern', 'Western']
+
+
+@pytest.fixture
+def survey():
+    # Synthetic rows with the youth survey's schema: dates over three years
+    # in shuffled order and a few missing metric values
+    rng = np.random.default_rng(7)
+    rows = 3000
+    frame = pd.DataFrame({
+        'Age': rng.integers(15, 26, rows),
+        'Gender': pd.Categorical.from_codes(rng.integers(0, 2, rows), ['Female', 'Male']),
+        'Depression_Score': np.clip(rng.normal(50, 15, rows), 0, 100),
+        'Anxiety_Score': np.clip(rng.normal(50, 15, rows), 0, 100),
+        'Stress_Level': np.clip(rng.normal(50, 15, rows), 0, 100),
+        'Social_Media_Usage': rng.integers(0, 12, rows),
+        'Physical_Activity': rng.integers(0, 14, rows),
+        'Sleep_Duration': rng.normal(7, 1.5, rows),
+        'Region': pd.Categorical.from_codes(rng.integers(0, len(REGIONS), rows), REGIONS),
+        'Date': pd.Timestamp('2021-01-01') + pd.to_timedelta(rng.permutation(rows) % 1000, unit='D'),
+    })
+    frame.loc[rng.choice(rows, 60, replace=False), 'Depression_Score'] = np.nan
+    return frame
@@ -0,0 +1,123 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import aggregate_cube
+
+METRICS = aggregate_cube.METRICS
+
+
+def rows_for(frame, regions=None, genders=None, age_range=None, date_range=None):
+    mask = np.ones(len(frame), dtype=bool)
+    if regions is not None:
+        mask &= frame['Region'].isin(regions).to_numpy()
+    if genders is not None:
+        mask &= frame['Gender'].isin(genders).to_numpy()
+    if age_range is not None:
+        mask &= frame['Age'].between(*age_range).to_numpy()
+    if date_range is not None:
+        dates = frame['Date'].dt.normalize()
+        mask &= dates.between(pd.Timestamp(date_range[0]), pd.Timestamp(date_range[1])).to_numpy()
+    return frame[mask]
+
+
+FILTERS = [
+    {},
+    {'regions': ['Kigali', 'Eastern'], 'genders': ['Female']},
+    {'age_range': (17, 21)},
+    {'date_range': (pd.Timestamp('2021-03-15').date(), pd.Timestamp('2022-02-01').date())},
+    {'regions': ['Nowhere']},
+]
+
+
+@pytest.mark.parametrize('filters', FILTERS)
+def test_kpis_match_pandas(survey, filters):
+    cube = aggregate_cube.AggregateCube(survey)
+    rows = rows_for(survey, **filters)
+    kpis = cube.kpis(**filters)
+
+    assert kpis['count'] == len(rows)
+    for metric in METRICS:
+        if len(rows):
+            assert kpis[metric]['mean'] == pytest.approx(rows[metric].mean())
+            assert kpis[metric]['std'] == pytest.approx(rows[metric].std())
+        else:
+            assert np.isnan(kpis[metric]['mean'])
+
+
+@pytest.mark.parametrize('by', [['Region'], ['Region', 'Gender'], ['Age'], ['Year']])
+def test_stats_match_pandas_groupby(survey, by):
+    cube = aggregate_cube.AggregateCube(survey)
+    filters = {'genders': ['Male'], 'age_range': (16, 24)}
+    result = cube.stats(by, **filters).set_index(by)
+
+    rows = rows_for(survey, **filters).assign(Year=lambda f: f['Date'].dt.year)
+    grouped = rows.groupby(by, observed=True)
+    expected_counts = grouped.size()
+    assert result['count'].to_dict() == {key: value for key, value in expected_counts.items()}
+    for metric in ['Depression_Score', 'Sleep_Duration']:
+        np.testing.assert_allclose(result[f'{metric}_mean'].to_numpy(), grouped[metric].mean().to_numpy())
+        np.testing.assert_allclose(result[f'{metric}_std'].to_numpy(), grouped[metric].std().to_numpy())
+
+
+def test_day_rollup_matches_pandas(survey):
+    cube = aggregate_cube.AggregateCube(survey)
+    result = cube.stats(['Day'], regions=['Kigali'])
+
+    rows = rows_for(survey, regions=['Kigali'])
+    expected = rows.groupby(rows['Date'].dt.normalize().rename('Day')).size()
+    assert len(result) == len(expected)
+    np.testing.assert_array_equal(result['count'].to_numpy(), expected.to_numpy())
+
+
+def test_counts_and_means(survey):
+    cube = aggregate_cube.AggregateCube(survey)
+    counts = cube.counts(['Region', 'Gender'], age_range=(15, 20))
+    assert counts['Counts'].sum() == len(rows_for(survey, age_range=(15, 20)))
+    assert not isinstance(counts['Region'].dtype, pd.CategoricalDtype)
+
+    means = cube.means('Region', 'Depression_Score').set_index('Region')['Depression_Score']
+    expected = survey.groupby('Region', observed=True)['Depression_Score'].mean()
+    np.testing.assert_allclose(means.loc[expected.index].to_numpy(), expected.to_numpy())
+
+
+def test_variance_is_stable_for_large_offsets(survey):
+    # Naive sum-of-squares variance loses every digit at this offset
+    frame = survey.assign(Sleep_Duration=survey['Sleep_Duration'] + 1e9)
+    cube = aggregate_cube.AggregateCube(frame)
+    assert cube.kpis()['Sleep_Duration']['std'] == pytest.approx(survey['Sleep_Duration'].std(), rel=1e-6)
+
+
+def test_day_queries_do_not_need_the_frame():
+    frame = pd.DataFrame({
+        'Region': ['Kigali', 'Kigali'], 'Gender': ['Male', 'Female'], 'Age': [20, 21], 'Depression_Score': [1.0, 3.0],
+        'Date': pd.to_datetime(['2021-01-01', '2021-01-02']),
+    })
+    cube = aggregate_cube.AggregateCube(frame)
+    del frame
+    assert cube.stats(['Day'])['count'].tolist() == [1, 1]
+    assert cube.kpis(date_range=(pd.Timestamp('2021-01-02'), pd.Timestamp('2021-01-05')))['count'] == 1
+
+
+@pytest.mark.parametrize('filters', FILTERS[:4])
+def test_append_matches_a_rebuild(survey, filters):
+    # The halves share days and cells, so append has to merge them
+    first, second = survey.iloc[::2], survey.iloc[1::2]
+    cube = aggregate_cube.AggregateCube(first).append(second)
+    rebuilt = aggregate_cube.AggregateCube(survey)
+
+    assert cube.rows == len(survey)
+    assert len(cube.days) == len(rebuilt.days)
+    got, expected = cube.kpis(**filters), rebuilt.kpis(**filters)
+    assert got['count'] == expected['count']
+    for metric in METRICS:
+        assert got[metric]['mean'] == pytest.approx(expected[metric]['mean'])
+        assert got[metric]['std'] == pytest.approx(expected[metric]['std'])
+
+    by = ['Region', 'Day']
+    pd.testing.assert_frame_equal(cube.stats(by, **filters), rebuilt.stats(by, **filters), check_exact=False)
+
+
+def test_cube_for_is_cached_per_frame(survey):
+    cube = aggregate_cube.cube_for(survey)
+    assert aggregate_cube.cube_for(survey) is cube
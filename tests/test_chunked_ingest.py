@@ -0,0 +1,75 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import chunked_ingest
+
+
+@pytest.fixture
+def extract(tmp_path):
+    # A DHS-style extract: raw column names, province suffixes, missing
+    # districts and a few unparseable scores after the rows dtypes are
+    # inferred from
+    rng = np.random.default_rng(5)
+    rows = chunked_ingest.SAMPLE_ROWS + 2000
+    frame = pd.DataFrame({
+        'District': rng.choice(['Kigali City', 'Western Province', 'Eastern', 'Northern Province', None], rows),
+        'Sex': rng.choice(['female', 'MALE '], rows),
+        'Age': rng.integers(15, 30, rows),
+        'Score': rng.normal(1e8, 2.0, rows),
+        'Employed': rng.choice(['Yes', 'No'], rows),
+    })
+    frame['Score'] = frame['Score'].astype(object)
+    frame.loc[chunked_ingest.SAMPLE_ROWS::97, 'Score'] = 'n.a.'
+    path = tmp_path / 'dhs.csv'
+    frame.to_csv(path, index=False)
+    return path, frame
+
+
+def expected_frame(frame):
+    frame = chunked_ingest.normalize_schema(frame)
+    return frame.assign(Score=pd.to_numeric(frame['Score'], errors='coerce'))
+
+
+@pytest.mark.parametrize('workers', [1, 2])
+def test_partitions_keep_every_row(extract, tmp_path, workers):
+    path, frame = extract
+    chunked_ingest.ingest(str(path), 'dhs', str(tmp_path / 'out'), chunksize=2000, workers=workers)
+
+    names = chunked_ingest.partitions('dhs', str(tmp_path / 'out'))
+    assert set(names) == {'Kigali', 'Western', 'Eastern', 'Northern', chunked_ingest.MISSING_PARTITION}
+    sizes = {name: len(chunked_ingest.open_partition('dhs', name, str(tmp_path / 'out'))) for name in names}
+    assert sum(sizes.values()) == len(frame)
+    assert sizes[chunked_ingest.MISSING_PARTITION] == frame['District'].isna().sum()
+
+
+def test_aggregates_match_pandas(extract, tmp_path):
+    path, frame = extract
+    result = chunked_ingest.ingest(str(path), 'dhs', str(tmp_path / 'out'), chunksize=2000, workers=2)
+    aggregates, categories = chunked_ingest.open_aggregates('dhs', str(tmp_path / 'out'))
+
+    keys = ['Region', 'Gender', 'Age']
+    rows = expected_frame(frame)
+    rows['Region'] = rows['Region'].fillna('-')
+    expected = rows.groupby(keys)['Score'].agg(['size', 'count', 'mean', 'var'])
+    got = aggregates.astype({'Region': object}).fillna({'Region': '-'}).set_index(keys).loc[expected.index]
+    np.testing.assert_array_equal(got['count'].to_numpy(), expected['size'].to_numpy())
+    np.testing.assert_array_equal(got['Score_n'].to_numpy(), expected['count'].to_numpy())
+    np.testing.assert_allclose(got['Score_mean'].to_numpy(), expected['mean'].to_numpy())
+    # The scores sit at 1e8 with a spread of 2, which raw sums of squares
+    # cannot resolve
+    variance = got['Score_m2'].to_numpy() / (got['Score_n'].to_numpy() - 1)
+    np.testing.assert_allclose(variance, expected['var'].to_numpy(), rtol=1e-6)
+
+    assert result.coerced['Score'] == (frame['Score'] == 'n.a.').sum()
+    employed = categories[categories['Column'] == 'Employed']
+    assert employed['Count'].sum() == len(frame)
+
+
+def test_byte_ranges_split_on_line_boundaries(extract):
+    path, frame = extract
+    columns, ranges = chunked_ingest.byte_ranges(str(path), 4)
+    assert columns == list(frame.columns)
+    data = path.read_bytes()
+    assert all(data[end - 1:end] == b'\n' for _, end in ranges)
+    assert sum(data[start:end].count(b'\n') for start, end in ranges) == len(frame)
@@ -0,0 +1,113 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import cohort_engine
+
+SURVEY_SCHEMA = {
+    'keys': {'age_band': 'Age', 'province': 'Region', 'gender': 'Gender'},
+    'measures': ['Depression_Score', 'Employed'],
+    'attributes': ['Status'],
+}
+DHS_SCHEMA = {
+    'keys': {'age_band': 'Age', 'province': 'District', 'gender': 'Sex'},
+    'measures': ['Score'],
+}
+
+
+@pytest.fixture
+def tables(survey):
+    rng = np.random.default_rng(3)
+    survey = survey.assign(
+        Employed=rng.choice(['Yes', 'No'], len(survey)),
+        Status=rng.choice(['Student', 'Working', None], len(survey)),
+    )
+    dhs = pd.DataFrame({
+        'Age': rng.integers(13, 36, 500),
+        'District': rng.choice(['Kigali City', 'Northern Province', 'Southern', 'Eastern', 'Western', 'Abroad'], 500),
+        'Sex': rng.choice(['female', 'male'], 500),
+        'Score': rng.normal(10, 2, 500),
+    })
+    return survey, dhs, {'survey': cohort_engine.Harmonized(survey, SURVEY_SCHEMA),
+                         'dhs': cohort_engine.Harmonized(dhs, DHS_SCHEMA)}
+
+
+@pytest.mark.parametrize('key,label,code', [
+    ('age_band', '15-20', 1), ('age_band', '18', 1), ('age_band', '18-22', -1), ('age_band', 'adult', -1),
+    ('province', 'Kigali City', 0), ('province', 'Northern Province', 1), ('province', 'abroad', -1),
+    ('gender', 'FEMALE', 0), ('education', 'University', 3), ('education', 'Vocational', -1),
+])
+def test_key_code(key, label, code):
+    assert cohort_engine.key_code(key, label) == code
+
+
+def test_age_band_codes():
+    codes = cohort_engine.age_band_codes([12, 13, 14, 15, 20, 20.5, 25, 35, 36, np.nan])
+    assert codes.tolist() == [-1, 0, 0, 1, 1, -1, 2, 4, -1, -1]
+
+
+def test_mask_matches_pandas(tables):
+    survey, _, harmonized = tables
+    mask = harmonized['survey'].mask({'gender': ['Female'], 'province': ['Kigali', 'Eastern']})
+    expected = survey['Gender'].eq('Female') & survey['Region'].isin(['Kigali', 'Eastern'])
+    np.testing.assert_array_equal(mask, expected.to_numpy())
+    # Unknown columns leave the dataset out; empty conditions match everyone
+    assert harmonized['dhs'].mask({'Status': ['Student']}) is None
+    assert harmonized['survey'].mask({'gender': []}).all()
+
+
+def test_missing_attribute_values_are_their_own_level(tables):
+    survey, _, harmonized = tables
+    table = harmonized['survey']
+    assert cohort_engine.MISSING in table.levels['Status']
+    mask = table.mask({'Status': [cohort_engine.MISSING]})
+    np.testing.assert_array_equal(mask, survey['Status'].isna().to_numpy())
+
+
+def test_compare_matches_pandas(tables):
+    survey, dhs, harmonized = tables
+    cohorts = {'Women': {'gender': ['Female']}, 'Everyone': {}}
+    result, skipped = cohort_engine.compare(harmonized, cohorts, by=['province'])
+    assert skipped == []
+
+    women = result[result['Cohort'] == 'Women'].set_index('province')
+    rows = survey[survey['Gender'] == 'Female']
+    expected = rows.groupby(rows['Region'].astype(str))
+    assert women['survey: rows'].to_dict() == expected.size().to_dict()
+    np.testing.assert_allclose(women.loc[expected.size().index, 'survey: Depression_Score'].to_numpy(),
+                               expected['Depression_Score'].mean().to_numpy())
+    np.testing.assert_allclose(women.loc[expected.size().index, 'survey: Employed'].to_numpy(),
+                               expected['Employed'].apply(lambda s: (s == 'Yes').mean()).to_numpy())
+
+    dhs_women = dhs[dhs['Sex'] == 'female']
+    codes = dhs_women['District'].map(lambda label: cohort_engine.key_code('province', label))
+    assert women['dhs: rows'].sum() == (codes >= 0).sum()
+
+
+def test_compare_reports_skipped_datasets(tables):
+    _, _, harmonized = tables
+    result, skipped = cohort_engine.compare(harmonized, {'Students': {'Status': ['Student']}}, by=['gender'])
+    assert ('Students', 'dhs', 'cohort uses columns this dataset does not have') in skipped
+    assert 'dhs: rows' not in result.columns
+
+    _, skipped = cohort_engine.compare(harmonized, {'All': {}}, by=['education'])
+    assert {name for _, name, _ in skipped} == {'survey', 'dhs'}
+
+
+def test_inner_join_keeps_groups_every_dataset_has(tables):
+    _, _, harmonized = tables
+    outer, _ = cohort_engine.compare(harmonized, {'All': {}}, by=['age_band'])
+    inner, _ = cohort_engine.compare(harmonized, {'All': {}}, by=['age_band'], how='inner')
+    assert set(inner['age_band']) < set(outer['age_band'])
+    assert (inner['survey: rows'] > 0).all() and (inner['dhs: rows'] > 0).all()
+
+
+def test_pack_and_unpack_round_trip(tables):
+    _, _, harmonized = tables
+    table = harmonized['survey']
+    by = ['province', 'gender']
+    codes, stats = table.group_by(by)
+    labels = cohort_engine.unpack(codes, by, table.levels)
+    assert set(zip(labels['province'], labels['gender'])) <= {(p, g) for p in cohort_engine.KEYS['province']
+                                                              for g in cohort_engine.KEYS['gender']}
+    assert stats['rows'].sum() == table.rows
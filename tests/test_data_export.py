@@ -0,0 +1,98 @@
+import gzip
+import io
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+import pytest
+
+import data_export
+import filter_index
+
+FILTERS = {'regions': ['Kigali', 'Southern'], 'genders': ['Female'], 'age_range': (16, 22)}
+
+
+def expected_rows(frame):
+    mask = (frame['Region'].isin(FILTERS['regions']) & frame['Gender'].isin(FILTERS['genders'])
+            & frame['Age'].between(*FILTERS['age_range']))
+    return frame[mask.to_numpy()]
+
+
+def read(data, fmt, compression):
+    if fmt == 'csv':
+        if compression == 'gzip':
+            data = gzip.decompress(data)
+        return pd.read_csv(io.BytesIO(data), parse_dates=['Date'])
+    if fmt == 'parquet':
+        return pq.read_table(io.BytesIO(data)).to_pandas()
+    return pa.ipc.open_stream(io.BytesIO(data)).read_all().to_pandas()
+
+
+@pytest.mark.parametrize('fmt,compression', [
+    ('csv', 'none'), ('csv', 'gzip'), ('parquet', 'snappy'), ('parquet', 'none'), ('arrow', 'none'), ('arrow', 'zstd'),
+])
+def test_row_export_round_trips_in_row_order(survey, fmt, compression):
+    chunks = list(data_export.export(survey, fmt, compression=compression, chunk_rows=250, **FILTERS))
+    assert len(chunks) > 1
+    result = read(b''.join(chunks), fmt, compression)
+    expected = expected_rows(survey).reset_index(drop=True)
+
+    assert len(result) == len(expected)
+    np.testing.assert_array_equal(result['Age'].to_numpy(), expected['Age'].to_numpy())
+    np.testing.assert_allclose(result['Sleep_Duration'].to_numpy(), expected['Sleep_Duration'].to_numpy())
+    assert result['Region'].astype(str).tolist() == expected['Region'].astype(str).tolist()
+
+
+def test_row_limit(survey):
+    data = b''.join(data_export.export(survey, 'csv', row_limit=10, **FILTERS))
+    assert len(read(data, 'csv', 'none')) == 10
+
+
+def test_empty_export_still_has_a_header(survey):
+    data = b''.join(data_export.export(survey, 'csv', regions=[]))
+    result = read(data, 'csv', 'none')
+    assert len(result) == 0
+    assert list(result.columns) == list(survey.columns)
+
+
+def test_aggregate_view_matches_pandas(survey):
+    data = b''.join(data_export.export(survey, 'parquet', view='region_gender'))
+    result = read(data, 'parquet', 'snappy').set_index(['Region', 'Gender'])
+    expected = survey.groupby(['Region', 'Gender'], observed=True)['Depression_Score'].agg(['size', 'mean'])
+    expected.index = expected.index.set_levels([level.astype(str) for level in expected.index.levels])
+
+    assert result['count'].to_dict() == expected['size'].to_dict()
+    np.testing.assert_allclose(result.loc[expected.index, 'Depression_Score_mean'].to_numpy(), expected['mean'].to_numpy())
+
+
+def test_invalid_options_are_rejected(survey):
+    with pytest.raises(ValueError):
+        data_export.export(survey, 'xlsx')
+    with pytest.raises(ValueError):
+        data_export.export(survey, 'csv', view='weekly')
+    with pytest.raises(ValueError):
+        data_export.export(survey, 'arrow', compression='gzip')
+
+
+def test_max_rows_keeps_exports_under_the_byte_limit(survey):
+    per_row = data_export.row_bytes(survey, 'csv')
+    assert per_row > 0
+    limit = data_export.max_rows(survey, 'csv', max_bytes=20_000)
+    assert 1 <= limit < len(survey)
+    data = b''.join(data_export.export(survey, 'csv', row_limit=limit))
+    assert len(data) <= 20_000
+
+
+def test_spool_returns_a_rewound_file_and_enforces_the_limit():
+    file = data_export.spool(iter([b'abc', b'def']))
+    assert file.read() == b'abcdef'
+    file.close()
+    with pytest.raises(data_export.ExportTooLarge):
+        data_export.spool(iter([b'x' * 10, b'y' * 10]), max_bytes=15)
+
+
+def test_filtered_positions_use_the_index(survey):
+    positions = data_export.filtered_positions(survey, **FILTERS)
+    np.testing.assert_array_equal(positions, np.flatnonzero(survey.index.isin(expected_rows(survey).index)))
+    assert filter_index.index_for(survey) is filter_index.index_for(survey)
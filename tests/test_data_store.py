@@ -0,0 +1,99 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import data_store
+
+
+@pytest.fixture
+def store(tmp_path, monkeypatch):
+    # A dataset registry and store directory of our own
+    monkeypatch.setattr(data_store, 'BASE_DIR', str(tmp_path))
+    monkeypatch.setattr(data_store, 'STORE_DIR', str(tmp_path / 'store'))
+    monkeypatch.setattr(data_store, 'DATASETS', {'survey': 'survey.csv'})
+    monkeypatch.setattr(data_store, 'DATE_COLUMNS', {'survey': ['Date']})
+    monkeypatch.setattr(data_store, '_loaded', {})
+    return tmp_path
+
+
+def test_round_trip_keeps_values_and_dtypes(survey, tmp_path):
+    frame = survey.assign(Flag=survey['Age'] > 20, Note=np.where(survey['Age'] > 24, None, 'ok'))
+    data_store.write_frame(frame, str(tmp_path / 'survey'))
+    loaded = data_store.open_frame(str(tmp_path / 'survey'))
+
+    assert list(loaded.columns) == list(frame.columns)
+    for column in ['Age', 'Depression_Score', 'Sleep_Duration', 'Flag', 'Date']:
+        np.testing.assert_array_equal(loaded[column].to_numpy(), frame[column].to_numpy())
+    assert isinstance(loaded['Region'].dtype, pd.CategoricalDtype)
+    assert loaded['Region'].astype(str).tolist() == frame['Region'].astype(str).tolist()
+    # Missing strings stay missing
+    assert loaded['Note'].isna().tolist() == frame['Note'].isna().tolist()
+
+
+def test_columns_are_read_only_memory_maps(survey, tmp_path):
+    data_store.write_frame(survey, str(tmp_path / 'survey'))
+    loaded = data_store.open_frame(str(tmp_path / 'survey'), columns=['Age', 'Region'])
+
+    assert list(loaded.columns) == ['Age', 'Region']
+    with pytest.raises(ValueError):
+        loaded['Age'].to_numpy()[0] = 99
+
+
+def test_open_missing_store_raises(tmp_path):
+    with pytest.raises(FileNotFoundError):
+        data_store.open_frame(str(tmp_path / 'nothing'))
+
+
+def test_rewriting_replaces_the_store(survey, tmp_path):
+    target = str(tmp_path / 'survey')
+    data_store.write_frame(survey, target)
+    data_store.write_frame(survey.iloc[:10], target)
+
+    assert data_store.read_meta(target)['rows'] == 10
+    assert not [name for name in (tmp_path).iterdir() if name.name.startswith('.tmp-')]
+
+
+def test_build_dataset_reuses_fresh_store_and_rebuilds_stale(survey, store):
+    survey.to_csv(store / 'survey.csv', index=False)
+    assert data_store.dataset_available('survey')
+    assert not data_store.dataset_available('dhs')
+
+    frame = data_store.load_dataset('survey')
+    assert len(frame) == len(survey)
+    assert pd.api.types.is_datetime64_any_dtype(frame['Date'])
+    assert data_store.load_dataset('survey') is frame
+    version = data_store.dataset_version('survey')
+
+    survey.iloc[:100].to_csv(store / 'survey.csv', index=False)
+    reloaded = data_store.load_dataset('survey')
+    assert len(reloaded) == 100
+    assert data_store.dataset_version('survey') != version
+
+
+def test_loaded_dataset_is_returned_without_the_lock(survey, store, monkeypatch):
+    survey.to_csv(store / 'survey.csv', index=False)
+    frame = data_store.load_dataset('survey')
+
+    class Unavailable:
+        def __enter__(self):
+            raise AssertionError('the lock was taken for a fresh dataset')
+
+        def __exit__(self, *exc):
+            return False
+
+    monkeypatch.setattr(data_store, '_lock', Unavailable())
+    assert data_store.load_dataset('survey') is frame
+
+
+def test_mixed_type_categories_stay_distinct(tmp_path):
+    frame = pd.DataFrame({'Code': pd.Series([1, '1', 'a', 1, None], dtype=object)})
+    data_store.write_frame(frame, str(tmp_path / 'mixed'))
+    loaded = data_store.open_frame(str(tmp_path / 'mixed'))
+    assert loaded['Code'].astype(object).tolist()[:4] == [1, '1', 'a', 1]
+    assert loaded['Code'].isna().tolist() == [False, False, False, False, True]
+
+
+def test_categories_with_the_same_text_are_rejected(tmp_path):
+    frame = pd.DataFrame({'When': pd.Series([pd.Timestamp('2021-01-01'), '2021-01-01 00:00:00'], dtype=object)})
+    with pytest.raises(ValueError, match="column 'When'"):
+        data_store.write_frame(frame, str(tmp_path / 'mixed'))
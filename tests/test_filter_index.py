@@ -0,0 +1,84 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import filter_index
+
+
+def expected(frame, regions=None, genders=None, age_range=None, date_range=None):
+    # The same query as a pandas mask
+    mask = np.ones(len(frame), dtype=bool)
+    if regions is not None:
+        mask &= frame['Region'].isin(regions).to_numpy()
+    if genders is not None:
+        mask &= frame['Gender'].isin(genders).to_numpy()
+    if age_range is not None:
+        mask &= frame['Age'].between(*age_range).to_numpy()
+    if date_range is not None:
+        mask &= frame['Date'].between(*date_range).to_numpy()
+    return np.flatnonzero(mask)
+
+
+def query(index, regions=None, genders=None, age_range=None, date_range=None):
+    filters = {}
+    if regions is not None:
+        filters['Region'] = regions
+    if genders is not None:
+        filters['Gender'] = genders
+    return index.positions(filters, age_range, date_range)
+
+
+@pytest.mark.parametrize('regions', [None, [], ['Kigali'], ['Kigali', 'Eastern', 'Western', 'Northern']])
+@pytest.mark.parametrize('age_range', [None, (15, 25), (18, 21), (30, 40)])
+def test_positions_match_pandas(survey, regions, age_range):
+    index = filter_index.FilterIndex(survey)
+    date_range = (pd.Timestamp('2021-06-01'), pd.Timestamp('2022-06-30'))
+    for genders in (None, ['Female'], ['Female', 'Male']):
+        got = query(index, regions, genders, age_range, date_range)
+        np.testing.assert_array_equal(got, expected(survey, regions, genders, age_range, date_range))
+
+
+def test_positions_are_in_row_order(survey):
+    index = filter_index.FilterIndex(survey)
+    assert not index.in_order
+    np.testing.assert_array_equal(index.positions(), np.arange(len(survey)))
+    got = query(index, regions=['Kigali'])
+    assert (np.diff(got) > 0).all()
+
+
+def test_missing_ages_never_match_an_age_range(survey):
+    frame = survey.astype({'Age': float})
+    frame.loc[::10, 'Age'] = np.nan
+    index = filter_index.FilterIndex(frame)
+
+    assert filter_index.MISSING in index.age_buckets
+    # Direct path (few buckets chosen) and complement path (most chosen)
+    for age_range in [(15, 16), (15, 24), (0, 100)]:
+        np.testing.assert_array_equal(index.positions(age_range=age_range), expected(frame, age_range=age_range))
+    assert len(index.positions()) == len(frame)
+
+
+def test_missing_categories_are_consistent_on_both_paths(survey):
+    frame = survey.astype({'Region': object})
+    frame.loc[::7, 'Region'] = None
+    index = filter_index.FilterIndex(frame)
+
+    assert filter_index.MISSING not in index.categories('Region')
+    for regions in (['Kigali'], ['Kigali', 'Eastern', 'Western', 'Northern'], list(index.categories('Region'))):
+        np.testing.assert_array_equal(query(index, regions=regions), expected(frame, regions=regions))
+    # Selecting a missing value selects the rows without a region
+    with_missing = ['Kigali', np.nan]
+    got = query(index, regions=with_missing)
+    mask = frame['Region'].isin(['Kigali']) | frame['Region'].isna()
+    np.testing.assert_array_equal(got, np.flatnonzero(mask.to_numpy()))
+
+
+def test_empty_date_range_matches_nothing(survey):
+    index = filter_index.FilterIndex(survey)
+    assert len(index.positions(date_range=(pd.Timestamp('1990-01-01'), pd.Timestamp('1990-12-31')))) == 0
+
+
+def test_index_for_is_cached_per_frame(survey):
+    index = filter_index.index_for(survey)
+    assert filter_index.index_for(survey) is index
+    assert filter_index.index_for(survey.copy()) is not index
@@ -0,0 +1,31 @@
+import pytest
+
+import home_cache
+import result_cache
+
+
+@pytest.fixture(autouse=True)
+def asset_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(home_cache, 'ASSET_DIR', str(tmp_path))
+    monkeypatch.setattr(result_cache, 'results', result_cache.ResultCache())
+    return tmp_path
+
+
+def test_callers_get_their_own_copy(survey):
+    assets = home_cache.home_assets(survey)
+    assert assets['kpis']['count'] == len(survey)
+    assets['kpis']['count'] = -1
+    assets['summary'].iloc[0, 0] = -1.0
+
+    again = home_cache.home_assets(survey)
+    assert again['kpis']['count'] == len(survey)
+    assert again['summary'].iloc[0, 0] != -1.0
+
+
+def test_assets_are_stored_by_content(survey, asset_dir):
+    digest = home_cache.content_hash(survey)
+    home_cache.home_assets(survey)
+    assert (asset_dir / f'{digest}.json').exists()
+    # The same rows in a new frame share the digest; changed rows do not
+    assert home_cache.content_hash(survey.copy()) == digest
+    assert home_cache.content_hash(survey.iloc[1:]) != digest
@@ -0,0 +1,74 @@
+import operator
+import time
+
+import pytest
+
+import job_pool
+
+# Jobs are standard-library functions, so worker processes can unpickle
+# them without importing the tests.
+
+
+@pytest.fixture
+def pool():
+    pool = job_pool.JobPool(workers=2, timeout=30)
+    yield pool
+    pool.close()
+
+
+def test_runs_jobs_in_workers(pool):
+    job = pool.submit(operator.add, 2, 3)
+    assert job.result(timeout=60) == 5
+    job.release()
+    assert pool.stats()['completed'] == 1
+
+
+def test_job_errors_are_raised_to_the_caller(pool):
+    job = pool.submit(operator.truediv, 1, 0)
+    with pytest.raises(ZeroDivisionError):
+        job.result(timeout=60)
+    assert pool.stats()['failed'] == 1
+
+
+def test_identical_jobs_share_one_computation(pool):
+    first = pool.submit(time.sleep, 0.5)
+    second = pool.submit(time.sleep, 0.5)
+    assert first is second
+    assert first.subscribers == 2
+    first.result(timeout=60)
+    assert pool.stats()['deduplicated'] == 1
+
+
+def test_released_job_is_cancelled(pool):
+    job = pool.submit(time.sleep, 30)
+    deadline = time.monotonic() + 60
+    while job.started is None and time.monotonic() < deadline:
+        time.sleep(0.05)
+    job.release()
+    with pytest.raises(job_pool.JobCancelled):
+        job.result(timeout=30)
+    # The pool still works after its worker was stopped
+    assert pool.submit(operator.mul, 6, 7).result(timeout=60) == 42
+
+
+def test_shared_job_survives_one_release(pool):
+    first = pool.submit(time.sleep, 0.5)
+    pool.submit(time.sleep, 0.5)
+    first.release()
+    assert first.result(timeout=60) is None
+    assert not first.cancelled
+
+
+def test_timeout_stops_the_job(pool):
+    job = pool.submit(time.sleep, 30, timeout=0.5)
+    with pytest.raises(TimeoutError):
+        job.result(timeout=60)
+    assert pool.stats()['timed_out'] == 1
+
+
+def test_inline_pool_runs_in_the_calling_thread():
+    pool = job_pool.JobPool(workers=0)
+    job = pool.submit(operator.add, 1, 1)
+    assert job.done()
+    assert job.result() == 2
+    assert pool.stats()['workers'] == 0
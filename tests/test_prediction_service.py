@@ -0,0 +1,96 @@
+import asyncio
+import json
+
+import pytest
+
+import prediction_service
+
+
+def double_age(frame):
+    # Stand-in model: one score per record, and a record of the batch it came in
+    double_age.batches.append(len(frame))
+    if (frame['Age'] < 0).any():
+        raise ValueError('negative age')
+    return frame['Age'].to_numpy() * 2
+
+
+def run(scenario, max_batch_size=16, max_wait_ms=50):
+    double_age.batches = []
+
+    async def main():
+        server = prediction_service.PredictionServer(
+            prediction_service.MicroBatcher(double_age, max_batch_size, max_wait_ms))
+        port = await server.start('127.0.0.1', 0)
+        try:
+            return await scenario(port)
+        finally:
+            await server.stop()
+
+    return asyncio.run(main())
+
+
+async def post(port, record):
+    client = prediction_service.Client('127.0.0.1', port)
+    try:
+        return await client.post('/predict', record)
+    finally:
+        client.close()
+
+
+async def raw(port, data):
+    reader, writer = await asyncio.open_connection('127.0.0.1', port)
+    writer.write(data)
+    await writer.drain()
+    response = await reader.read()
+    writer.close()
+    head, _, body = response.partition(b'\r\n\r\n')
+    return int(head.split()[1]), json.loads(body)
+
+
+def test_concurrent_requests_are_batched():
+    async def scenario(port):
+        return await asyncio.gather(*(post(port, {'Age': age}) for age in range(15, 35)))
+
+    responses = run(scenario)
+    assert [payload['scores'] for _, payload in responses] == [[age * 2.0] for age in range(15, 35)]
+    assert all(status == 200 for status, _ in responses)
+    assert sum(double_age.batches) == 20
+    assert len(double_age.batches) < 20
+
+
+def test_failing_record_only_fails_its_request():
+    async def scenario(port):
+        return await asyncio.gather(post(port, {'Age': 20}), post(port, {'Age': -1}), post(port, {'Age': 22}))
+
+    (ok, good), (failed, error), (_, other) = run(scenario)
+    assert (ok, good['scores']) == (200, [40.0])
+    assert failed == 500 and 'negative age' in error['error']
+    assert other['scores'] == [44.0]
+
+
+@pytest.mark.parametrize('record,message', [
+    ({'Age': 'twenty'}, 'Age must be a finite number'),
+    ({'Gender': 3}, 'Gender must be a string'),
+])
+def test_invalid_records_are_rejected(record, message):
+    status, payload = run(lambda port: post(port, record))
+    assert (status, payload) == (400, {'error': message})
+    assert double_age.batches == []
+
+
+@pytest.mark.parametrize('request_bytes,message', [
+    (b'GARBAGE\r\n\r\n', 'malformed request line'),
+    (b'POST /predict HTTP/1.1\r\nContent-Length: ten\r\n\r\n', 'invalid Content-Length'),
+    (b'POST /predict HTTP/1.1\r\nContent-Length: -5\r\n\r\n', 'invalid Content-Length'),
+])
+def test_unreadable_requests_get_400(request_bytes, message):
+    status, payload = run(lambda port: raw(port, request_bytes))
+    assert (status, payload) == (400, {'error': message})
+
+
+def test_oversized_body_gets_413():
+    async def scenario(port):
+        return await raw(port, b'POST /predict HTTP/1.1\r\nContent-Length: 99999999\r\n\r\n')
+
+    status, payload = run(scenario)
+    assert status == 413 and 'exceeds' in payload['error']
@@ -0,0 +1,33 @@
+import numpy as np
+
+import stats_engine
+
+
+def test_correlation_matches_pandas(survey):
+    columns = ['Depression_Score', 'Anxiety_Score', 'Sleep_Duration', 'Age']
+    moments = stats_engine.CoMoments(columns)
+    # Chunks merged around different shifts give the single-pass result
+    for start in range(0, len(survey), 700):
+        chunk = stats_engine.comoments(survey.iloc[start:start + 700], columns)
+        moments.merge(chunk)
+    expected = survey[columns].corr()
+    np.testing.assert_allclose(moments.correlation().to_numpy(), expected.to_numpy(), atol=1e-10)
+
+
+def test_partial_correlation_skips_constant_columns(survey):
+    columns = ['Depression_Score', 'Anxiety_Score', 'Sleep_Duration']
+    frame = survey[columns].assign(Constant=1.0)
+    partial = stats_engine.comoments(frame).partial_correlation()
+    expected = stats_engine.comoments(survey[columns]).partial_correlation()
+
+    assert partial['Constant'].isna().all()
+    np.testing.assert_allclose(partial.loc[columns, columns].to_numpy(), expected.to_numpy())
+
+
+def test_bootstrap_intervals_contain_the_estimate(survey):
+    result = stats_engine.bootstrap(survey, ['Depression_Score', 'Anxiety_Score', 'Age'], replicates=200)
+    for kind in ('correlation', 'partial'):
+        table = stats_engine.pairs(result[kind])
+        assert len(table) == 3
+        assert ((table['CI Low'] <= table['r']) & (table['r'] <= table['CI High'])).all()
+    assert result['rows'] == len(survey)
@@ -0,0 +1,306 @@
+import argparse
+import datetime
+import gc
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+
+os.environ.setdefault('MH_NLTK_OFFLINE', '1')
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+import pandas as pd
+import plotly.express as px
+
+import aggregate_cube
+import binned_charts
+import cohort_engine
+import downsample
+import filter_index
+import stats_engine
+
+# Headless benchmarks for the dashboard's code paths at scaled data sizes.
+#
+# Synthetic frames use the schema of simulate_data() / mental_health_data.csv.
+# Every case runs without a Streamlit server; 'naive' cases are the plain
+# pandas/Plotly calls the pages used to make, the others the current code
+# path. Text cases (sentiment, word cloud) run on min(rows, --max-texts)
+# generated posts. Results are written as JSON keyed by commit so runs can
+# be compared:
+#
+#     python tools/benchmark.py --sizes 1k 100k 1M 10M
+#     python tools/benchmark.py --sizes 100k --compare benchmark_results/<old>.json
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_SIZES = ['1k', '100k', '1M', '10M']
+DEFAULT_OUTPUT_DIR = os.path.join(REPO_DIR, 'benchmark_results')
+NAIVE_FIGURE_LIMIT = 1_000_000
+
+METRICS = ['Depression_Score', 'Anxiety_Score', 'Stress_Level', 'Social_Media_Usage', 'Physical_Activity', 'Sleep_Duration']
+REGIONS = ['Kigali', 'Northern', 'Southern', 'Eastern', 'Western']
+FILTERS = {'Region': ['Kigali', 'Northern', 'Southern'], 'Gender': ['Female']}
+AGE_RANGE = (17, 23)
+COHORT_SCHEMA = {'keys': {'age_band': 'Age', 'province': 'Region', 'gender': 'Gender'}, 'measures': METRICS}
+COHORTS = {'Everyone': {}, 'Young women': {'gender': ['Female'], 'age_band': ['15-20']}}
+
+WORDS = {
+    'positive': ['happy', 'hopeful', 'grateful', 'calm', 'better', 'supported', 'great', 'good', 'proud', 'relaxed'],
+    'negative': ['sad', 'anxious', 'tired', 'stressed', 'lonely', 'worried', 'bad', 'hopeless', 'angry', 'afraid'],
+    'topic': ['school', 'exams', 'family', 'friends', 'sleep', 'work', 'music', 'sports', 'church', 'phone'],
+}
+
+
+def parse_size(text):
+    text = text.strip().lower()
+    scale = {'k': 1_000, 'm': 1_000_000}.get(text[-1], 1)
+    return int(float(text[:-1] if scale > 1 else text) * scale)
+
+
+def generate(rows, seed=42):
+    # Same columns and distributions as simulate_data(); dates cycle over
+    # three years so large sizes stay within the datetime64[ns] range
+    rng = np.random.default_rng(seed)
+    data = pd.DataFrame({
+        'Age': rng.integers(15, 25, rows),
+        'Gender': pd.Categorical.from_codes(rng.integers(0, 2, rows), ['Female', 'Male']),
+        'Depression_Score': np.clip(rng.normal(50, 15, rows), 0, 100),
+        'Anxiety_Score': np.clip(rng.normal(50, 15, rows), 0, 100),
+        'Stress_Level': np.clip(rng.normal(50, 15, rows), 0, 100),
+        'Social_Media_Usage': rng.integers(0, 12, rows),
+        'Physical_Activity': rng.integers(0, 14, rows),
+        'Sleep_Duration': rng.normal(7, 1.5, rows),
+        'Region': pd.Categorical.from_codes(rng.integers(0, len(REGIONS), rows), REGIONS),
+        'Date': np.datetime64('2022-01-01', 'ns') + (np.arange(rows) % 1000).astype('timedelta64[D]'),
+    })
+    return data
+
+
+def generate_texts(count, seed=42):
+    rng = np.random.default_rng(seed)
+    texts = []
+    for _ in range(count):
+        mood = WORDS['positive' if rng.random() < 0.5 else 'negative']
+        words = ['I', 'feel', 'very' if rng.random() < 0.3 else 'quite', str(rng.choice(mood)), 'about',
+                 str(rng.choice(WORDS['topic'])), 'and', str(rng.choice(WORDS['topic'])), 'today']
+        if rng.random() < 0.2:
+            words.insert(2, 'not')
+        texts.append(' '.join(words) + '.')
+    return texts
+
+
+class Context:
+    # Lazily built per-size state shared by the cases
+    def __init__(self, frame, texts):
+        self.frame = frame
+        self.texts = texts
+        self._index = None
+        self._cube = None
+        self._harmonized = None
+
+    @property
+    def index(self):
+        if self._index is None:
+            self._index = filter_index.FilterIndex(self.frame)
+        return self._index
+
+    @property
+    def cube(self):
+        if self._cube is None:
+            self._cube = aggregate_cube.AggregateCube(self.frame)
+        return self._cube
+
+    @property
+    def harmonized(self):
+        if self._harmonized is None:
+            self._harmonized = cohort_engine.Harmonized(self.frame, COHORT_SCHEMA)
+        return self._harmonized
+
+
+def naive_filter(ctx):
+    frame = ctx.frame
+    return frame[
+        frame['Region'].isin(FILTERS['Region']) & frame['Gender'].isin(FILTERS['Gender'])
+        & frame['Age'].between(*AGE_RANGE)
+    ]
+
+
+def histogram_figure(ctx):
+    return binned_charts.histogram(ctx.frame, 'Depression_Score', nbins=20, color='Gender', opacity=0.7).to_json()
+
+
+def trend_figure(ctx):
+    trend = downsample.downsample(ctx.frame, 'Date', ['Depression_Score', 'Anxiety_Score', 'Stress_Level'])
+    return px.line(trend, x='Date', y=['Depression_Score', 'Anxiety_Score', 'Stress_Level']).to_json()
+
+
+def naive_histogram_figure(ctx):
+    return px.histogram(ctx.frame, x='Depression_Score', nbins=20, color='Gender', opacity=0.7).to_json()
+
+
+def textblob_sentiment(ctx):
+    import sentiment_engine
+    return [sentiment_engine.textblob_polarity(text) for text in ctx.texts]
+
+
+def lexicon_sentiment(ctx):
+    import sentiment_engine
+    return [sentiment_engine.lexicon_polarity(text) for text in ctx.texts]
+
+
+def naive_wordcloud(ctx):
+    from wordcloud import WordCloud
+    return WordCloud(width=800, height=400, background_color='white').generate(' '.join(ctx.texts)).to_image()
+
+
+def naive_cohort_crosstab(ctx):
+    # Notebook-style: label age bands, filter each cohort, group on strings
+    frame = ctx.frame.assign(age_band=pd.cut(ctx.frame['Age'], [12, 14, 20, 25, 30, 35],
+                                             labels=list(cohort_engine.KEYS['age_band'])))
+    young_women = frame[(frame['Gender'] == 'Female') & (frame['age_band'] == '15-20')]
+    return [
+        cohort.groupby(['age_band', 'Region'], observed=True)[METRICS].agg(['size', 'mean'])
+        for cohort in (frame, young_women)
+    ]
+
+
+def counter_wordcloud(ctx):
+    import word_frequencies
+    counter = word_frequencies.TokenCounter()
+    counter.add_many(ctx.texts)
+    return word_frequencies.wordcloud_png(counter)
+
+
+# (name, function, applies(rows)); names are '<path>.<variant>'
+CASES = [
+    ('filter.naive_mask', naive_filter, None),
+    ('filter.index_build', lambda ctx: filter_index.FilterIndex(ctx.frame), None),
+    ('filter.index_query', lambda ctx: ctx.index.query(filters=FILTERS, age_range=AGE_RANGE), None),
+    ('kpi.naive_means', lambda ctx: ctx.frame[METRICS].mean(), None),
+    ('kpi.cube_build', lambda ctx: aggregate_cube.AggregateCube(ctx.frame), None),
+    ('kpi.cube_means', lambda ctx: ctx.cube.kpis(regions=FILTERS['Region'], genders=FILTERS['Gender'], age_range=AGE_RANGE), None),
+    ('sunburst.naive_groupby', lambda ctx: ctx.frame.groupby(['Age', 'Region', 'Gender'], observed=True).size(), None),
+    ('sunburst.cube_counts', lambda ctx: ctx.cube.counts(['Age', 'Region', 'Gender']), None),
+    ('corr.naive_pandas', lambda ctx: ctx.frame[METRICS + ['Age']].corr(), None),
+    ('corr.comoments', lambda ctx: stats_engine.comoments(ctx.frame, METRICS + ['Age']).correlation(), None),
+    ('histogram.naive_numpy', lambda ctx: np.histogram(ctx.frame['Depression_Score'].to_numpy(), bins=20), None),
+    ('histogram.binned_counts', lambda ctx: binned_charts.histogram_counts(ctx.frame, 'Depression_Score', 20, color='Gender'), None),
+    ('figure.naive_histogram_json', naive_histogram_figure, lambda rows: rows <= NAIVE_FIGURE_LIMIT),
+    ('figure.binned_histogram_json', histogram_figure, None),
+    ('figure.downsampled_trend_json', trend_figure, None),
+    ('sentiment.textblob', textblob_sentiment, None),
+    ('sentiment.lexicon', lexicon_sentiment, None),
+    ('cohort.naive_crosstab', naive_cohort_crosstab, None),
+    ('cohort.harmonize', lambda ctx: cohort_engine.Harmonized(ctx.frame, COHORT_SCHEMA), None),
+    ('cohort.compare', lambda ctx: cohort_engine.compare({'survey': ctx.harmonized}, COHORTS, ['age_band', 'province']), None),
+    ('wordcloud.naive_generate', naive_wordcloud, None),
+    ('wordcloud.token_counter', counter_wordcloud, None),
+]
+
+
+def run_case(fn, ctx, repeats, warmup=1):
+    # Warm-up calls absorb imports and lazily built shared state (index,
+    # cube), which have their own *_build cases
+    for _ in range(warmup):
+        fn(ctx)
+    times = []
+    for _ in range(repeats):
+        gc.collect()
+        start = time.perf_counter()
+        fn(ctx)
+        times.append(time.perf_counter() - start)
+    return times
+
+
+def git_commit():
+    try:
+        result = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=REPO_DIR, capture_output=True, text=True)
+        return result.stdout.strip() or 'unknown'
+    except OSError:
+        return 'unknown'
+
+
+def run(sizes, repeats=3, max_texts=10_000, only=None, seed=42, warmup=1):
+    results = []
+    for rows in sizes:
+        frame = generate(rows, seed)
+        texts = generate_texts(min(rows, max_texts), seed)
+        ctx = Context(frame, texts)
+        for name, fn, applies in CASES:
+            if only and not any(name.startswith(prefix) for prefix in only):
+                continue
+            if applies is not None and not applies(rows):
+                continue
+            items = len(texts) if name.startswith(('sentiment.', 'wordcloud.')) else rows
+            try:
+                times = run_case(fn, ctx, repeats, warmup)
+            except Exception as error:
+                results.append({'case': name, 'rows': rows, 'items': items, 'error': f'{type(error).__name__}: {error}'})
+                print(f"{rows:>10,}  {name:<34} ERROR {error}", flush=True)
+                continue
+            result = {
+                'case': name, 'rows': rows, 'items': items, 'repeats': repeats, 'warmup': warmup,
+                'min': min(times), 'median': statistics.median(times), 'mean': statistics.fmean(times),
+            }
+            results.append(result)
+            print(f"{rows:>10,}  {name:<34} {result['min'] * 1000:10.2f} ms  (median {result['median'] * 1000:.2f} ms)", flush=True)
+        del ctx, frame
+        gc.collect()
+    return {
+        'commit': git_commit(),
+        'timestamp': datetime.datetime.now(datetime.timezone.utc).isoformat(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+        'packages': {name: module.__version__ for name, module in (('numpy', np), ('pandas', pd))},
+        'results': results,
+    }
+
+
+def compare(current, baseline, threshold=0.2):
+    # Prints per-case ratios of min time against a baseline run; returns the
+    # number of cases slower by more than `threshold`
+    previous = {(r['case'], r['rows']): r for r in baseline['results'] if 'min' in r}
+    regressions = 0
+    print(f"\nCompared with {baseline.get('commit')} ({baseline.get('timestamp')}):")
+    for result in current['results']:
+        old = previous.get((result['case'], result['rows']))
+        if old is None or 'min' not in result:
+            continue
+        ratio = result['min'] / old['min'] if old['min'] else float('inf')
+        flag = ''
+        if ratio > 1 + threshold:
+            flag = '  REGRESSION'
+            regressions += 1
+        elif ratio < 1 - threshold:
+            flag = '  faster'
+        print(f"{result['rows']:>10,}  {result['case']:<34} {ratio:6.2f}x{flag}")
+    return regressions
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Dashboard benchmarks')
+    parser.add_argument('--sizes', nargs='+', default=DEFAULT_SIZES, help='row counts, e.g. 1k 100k 1M 10M')
+    parser.add_argument('--repeats', type=int, default=3)
+    parser.add_argument('--warmup', type=int, default=1, help='untimed calls before each case')
+    parser.add_argument('--max-texts', type=int, default=10_000, help='cap on generated posts for text cases')
+    parser.add_argument('--only', nargs='+', help='case name prefixes, e.g. filter corr')
+    parser.add_argument('--output', help='JSON path (default benchmark_results/<commit>.json)')
+    parser.add_argument('--compare', help='baseline JSON to compare against')
+    parser.add_argument('--threshold', type=float, default=0.2, help='relative slowdown reported as a regression')
+    args = parser.parse_args()
+
+    report = run([parse_size(size) for size in args.sizes], args.repeats, args.max_texts, args.only, warmup=args.warmup)
+    output = args.output or os.path.join(DEFAULT_OUTPUT_DIR, f"{report['commit']}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f"\nWrote {output}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            regressions = compare(report, json.load(f), args.threshold)
+        sys.exit(1 if regressions else 0)
@@ -0,0 +1,101 @@
+import argparse
+import json
+import os
+import sys
+import urllib.request
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import geo_shapes
+
+# Downloads full-resolution Rwanda boundaries from geoBoundaries (CC BY 4.0)
+# into geo/source/ and regenerates the simplified shapes in geo/.
+#
+#     python tools/fetch_boundaries.py
+#     python tools/fetch_boundaries.py --skip-download   # rebuild from geo/source/
+#     python tools/fetch_boundaries.py --schematic       # offline placeholder
+#
+# --schematic writes approximate province shapes without network access: a
+# coarse national outline split between the province centroids by a power
+# (weighted Voronoi) diagram, with weights chosen so each province's area is
+# close to its official area. They are only good for a dashboard overview;
+# the shapes bundled in geo/ come from this until the geoBoundaries ones
+# replace them.
+
+URL = 'https://github.com/wmgeolab/geoBoundaries/raw/main/releaseData/gbOpen/RWA/{adm}/geoBoundaries-RWA-{adm}.geojson'
+
+# Approximate national border (lon, lat), clockwise from Gisenyi on Lake Kivu
+OUTLINE = [
+    (29.25, -1.69), (29.36, -1.51), (29.45, -1.49), (29.59, -1.39), (29.71, -1.34), (29.83, -1.31),
+    (29.92, -1.47), (30.05, -1.42), (30.16, -1.34), (30.22, -1.21), (30.34, -1.13), (30.35, -1.06),
+    (30.47, -1.06), (30.56, -1.33), (30.74, -1.44), (30.82, -1.70), (30.84, -1.95), (30.89, -2.08),
+    (30.80, -2.37), (30.58, -2.40), (30.45, -2.34), (30.36, -2.43), (30.09, -2.43), (29.95, -2.33),
+    (29.90, -2.70), (29.70, -2.82), (29.36, -2.82), (29.03, -2.73), (29.00, -2.56), (28.87, -2.48),
+    (28.95, -2.30), (29.04, -2.15), (29.11, -1.96), (29.14, -1.83),
+]
+# Power diagram weights (degrees squared); larger weights grow a province
+WEIGHTS = {'Kigali': -0.13, 'Northern': -0.13, 'Southern': 0.01, 'Eastern': 0.04, 'Western': -0.03}
+
+
+def _clip(ring, normal, offset):
+    # Sutherland-Hodgman: the part of the ring where normal . x <= offset
+    clipped = []
+    for i, point in enumerate(ring):
+        p, q = np.asarray(point), np.asarray(ring[(i + 1) % len(ring)])
+        fp, fq = normal @ p - offset, normal @ q - offset
+        if fp <= 0:
+            clipped.append(tuple(p))
+        if (fp < 0 < fq) or (fq < 0 < fp):
+            clipped.append(tuple(p + fp / (fp - fq) * (q - p)))
+    return clipped
+
+
+def schematic():
+    # Writes the approximate province shapes as the ADM1 source
+    centers = {name: np.array(latlon[::-1]) for name, latlon in geo_shapes.PROVINCE_CENTROIDS.items()}
+    features = []
+    for name, center in centers.items():
+        ring = OUTLINE
+        for other, point in centers.items():
+            if other != name:
+                # |x - c|^2 - w_c <= |x - p|^2 - w_p
+                offset = point @ point - center @ center - WEIGHTS[other] + WEIGHTS[name]
+                ring = _clip(ring, 2 * (point - center), offset)
+        # Rounded so a border computed for both neighbours has equal vertices
+        ring = [[round(x, 5), round(y, 5)] for x, y in ring]
+        features.append({
+            'type': 'Feature',
+            'properties': {'shapeName': name, 'source': 'schematic'},
+            'geometry': {'type': 'Polygon', 'coordinates': [ring + ring[:1]]},
+        })
+    target = geo_shapes.source_path('province')
+    os.makedirs(os.path.dirname(target), exist_ok=True)
+    with open(target, 'w') as f:
+        json.dump({'type': 'FeatureCollection', 'features': features}, f)
+    return target
+
+
+def download(level):
+    adm = geo_shapes.LEVELS[level]
+    target = geo_shapes.source_path(level)
+    os.makedirs(os.path.dirname(target), exist_ok=True)
+    with urllib.request.urlopen(URL.format(adm=adm), timeout=60) as response, open(target, 'wb') as f:
+        f.write(response.read())
+    return target
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Fetch and simplify Rwanda boundaries')
+    parser.add_argument('--skip-download', action='store_true')
+    parser.add_argument('--schematic', action='store_true', help='write approximate shapes without network access')
+    args = parser.parse_args()
+
+    if args.schematic:
+        print(f"Wrote {schematic()}")
+    elif not args.skip_download:
+        for level in geo_shapes.LEVELS:
+            print(f"Downloaded {download(level)}")
+    for path in geo_shapes.build():
+        print(f"{path}: {os.path.getsize(path)} bytes")
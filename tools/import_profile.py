@@ -0,0 +1,60 @@
+import argparse
+import collections
+import os
+import subprocess
+import sys
+
+# Import-time profile of the dashboard's modules.
+#
+# Runs `python -X importtime` on a fresh interpreter and reports the slowest
+# imports, either per module or rolled up by top-level package.
+#
+#     python tools/import_profile.py                    # streamlit_app, by package
+#     python tools/import_profile.py depression_model --modules --top 30
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def profile(module):
+    # Returns [(module name, self us, cumulative us, depth)] in import order
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+        cwd=REPO_DIR, capture_output=True, text=True,
+        env={**os.environ, 'PYTHONPATH': REPO_DIR},
+    )
+    rows = []
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_us, cumulative_us, name = line[len('import time:'):].split('|')
+        depth = (len(name) - len(name.lstrip())) // 2
+        rows.append((name.strip(), int(self_us), int(cumulative_us), depth))
+    if result.returncode != 0:
+        errors = [line for line in result.stderr.splitlines() if not line.startswith('import time:')]
+        sys.stderr.write('\n'.join(errors[-20:]) + '\n')
+    return rows
+
+
+def by_package(rows):
+    totals = collections.Counter()
+    for name, self_us, _, _ in rows:
+        totals[name.split('.')[0]] += self_us
+    return totals
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Import-time profile')
+    parser.add_argument('module', nargs='?', default='streamlit_app')
+    parser.add_argument('--modules', action='store_true', help='list individual modules by cumulative time')
+    parser.add_argument('--top', type=int, default=20)
+    args = parser.parse_args()
+
+    rows = profile(args.module)
+    total = sum(self_us for _, self_us, _, _ in rows)
+    print(f"import {args.module}: {total / 1e6:.2f} s across {len(rows)} modules")
+    if args.modules:
+        for name, _, cumulative_us, _ in sorted(rows, key=lambda r: -r[2])[:args.top]:
+            print(f"{cumulative_us / 1000:10.1f} ms  {name}")
+    else:
+        for package, self_us in by_package(rows).most_common(args.top):
+            print(f"{self_us / 1000:10.1f} ms  {package}")
@@ -0,0 +1,121 @@
+import argparse
+import ast
+import json
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import translations
+
+# Checks the translation catalogs against the text the app passes to _(),
+# and fills the offline machine translation cache for missing entries.
+#
+#     python tools/translate_catalogs.py                    # report missing and unused entries
+#     python tools/translate_catalogs.py --strict           # exit 1 if anything is missing
+#     python tools/translate_catalogs.py --update           # mark missing entries, drop unused ones
+#     python tools/translate_catalogs.py --machine fr sw    # translate missing entries with googletrans
+#
+# --update rewrites each catalog: translations are kept in place, missing
+# text is appended with a null translation (marked for a translator) and
+# entries the app no longer uses are removed.
+#
+# Machine translations go to locales/machine/<code>.json, never into the
+# reviewed catalogs; the app reads that cache and never calls googletrans.
+
+APP = os.path.join(translations.BASE_DIR, 'streamlit_app.py')
+
+
+def source_messages(path=APP):
+    # Literal _() arguments plus the navigation page names (translated
+    # through a variable in main())
+    with open(path, encoding='utf-8') as f:
+        tree = ast.parse(f.read())
+    messages = {}
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Call) and isinstance(node.func, ast.Name) and node.func.id == '_' and node.args:
+            arg = node.args[0]
+            if isinstance(arg, ast.Constant) and isinstance(arg.value, str):
+                messages[arg.value] = None
+        elif isinstance(node, ast.Assign) and any(isinstance(t, ast.Name) and t.id == 'pages' for t in node.targets):
+            if isinstance(node.value, ast.List):
+                messages.update((e.value, None) for e in node.value.elts if isinstance(e, ast.Constant))
+    return list(messages)
+
+
+def machine_translate(texts, code):
+    # googletrans and langdetect are only needed here, not by the app
+    from googletrans import Translator
+    from langdetect import DetectorFactory, detect
+    from langdetect.lang_detect_exception import LangDetectException
+
+    DetectorFactory.seed = 0
+    translator = Translator()
+    results = {}
+    for text in texts:
+        translated = translator.translate(text, src='en', dest=code).text
+        # Skip results that came back untranslated
+        try:
+            untranslated = translated == text or (len(text.split()) > 3 and detect(translated) == 'en')
+        except LangDetectException:
+            untranslated = False
+        if not untranslated:
+            results[text] = translated
+    return results
+
+
+def update_catalog(catalog, messages):
+    # Rewrites a catalog without unused entries and with null for missing text
+    path = os.path.join(translations.LOCALE_DIR, f'{catalog.code}.json')
+    used = set(messages)
+    entries = {text: value for text, value in catalog.messages.items() if text in used}
+    entries.update((text, None) for text in messages if text not in entries)
+    data = {'language': catalog.language, 'messages': entries}
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write(json.dumps(data, ensure_ascii=False, indent=2) + '\n')
+    return path
+
+
+def update_machine_cache(catalog, texts):
+    path = translations.machine_path(catalog.code)
+    cached = dict(catalog.machine)
+    todo = [text for text in texts if text not in cached]
+    if todo:
+        cached.update(machine_translate(todo, catalog.code))
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump({'source': 'googletrans', 'messages': dict(sorted(cached.items()))}, f, ensure_ascii=False, indent=2)
+    return path, len(todo)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Check translation catalogs and fill the machine translation cache')
+    parser.add_argument('--strict', action='store_true', help='exit with status 1 when catalog entries are missing')
+    parser.add_argument('--update', action='store_true', help='mark missing entries with null and drop unused ones')
+    parser.add_argument('--machine', nargs='+', metavar='CODE', help='machine-translate missing entries for these languages')
+    args = parser.parse_args()
+
+    messages = source_messages()
+    skipped = []
+    catalogs = translations.load_catalogs(skipped=skipped)
+    for catalog in skipped:
+        print(f"skipped {catalog['file']}: {catalog['reason']}")
+    incomplete = bool(skipped)
+    for language, catalog in catalogs.items():
+        missing = [text for text in messages if catalog.messages.get(text) is None]
+        marked = [text for text in missing if text in catalog.messages]
+        unused = [text for text in catalog.messages if text not in messages]
+        print(f"{language} ({catalog.code}): {len(messages) - len(missing)}/{len(messages)} translated, "
+              f"{len(marked)} marked for translation, "
+              f"{sum(text in catalog.machine for text in missing)} machine-translated, {len(unused)} unused")
+        for text in missing:
+            print(f"  missing{' (machine)' if text in catalog.machine else ''}: {text}")
+        incomplete = incomplete or bool(missing)
+        if args.update and (unused or len(marked) < len(missing)):
+            print(f"  updated {update_catalog(catalog, messages)}")
+        if args.machine and catalog.code in args.machine and missing:
+            path, count = update_machine_cache(catalog, missing)
+            print(f"  translated {count} entries into {path}")
+
+    if args.strict and incomplete:
+        sys.exit(1)
@@ -0,0 +1,148 @@
+import collections
+import json
+import os
+import threading
+
+# Translations for the dashboard's _() helper.
+#
+# Each language is a catalog file locales/<code>.json:
+#
+#     {"language": "Français", "messages": {"<English text>": "<translation>", ...}}
+#
+# Catalogs are read once per process into one dict per language, so a
+# lookup is a single dict get; English is the source language and has no
+# catalog. Adding a language is adding a catalog file. An entry whose
+# translation is null is marked for translation and treated as missing.
+# Catalog files that cannot be read, or lack "language" or "messages", are
+# skipped and listed by skipped().
+#
+# Text without a catalog entry falls back to the machine translation cache
+# (locales/machine/<code>.json) and then to the English text, and is
+# recorded as missing for the Settings page. The machine cache is filled
+# offline by tools/translate_catalogs.py (googletrans); nothing is
+# translated while serving a request.
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+LOCALE_DIR = os.environ.get('MH_LOCALE_DIR', os.path.join(BASE_DIR, 'locales'))
+SOURCE_LANGUAGE = 'English'
+
+_lock = threading.Lock()
+_catalogs = None
+_skipped = []                      # [{'file': ..., 'reason': ...}]
+_missing = collections.Counter()   # (language, text) -> lookups
+
+
+class Catalog:
+    def __init__(self, code, language, messages, machine=None):
+        self.code = code
+        self.language = language
+        self.messages = messages
+        self.machine = machine or {}
+
+
+def _read_messages(path):
+    try:
+        with open(path, encoding='utf-8') as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+
+
+def machine_path(code, locale_dir=None):
+    return os.path.join(locale_dir or LOCALE_DIR, 'machine', f'{code}.json')
+
+
+def _check(data):
+    # Reason a catalog cannot be used, or None
+    if not isinstance(data, dict):
+        return 'not a JSON object'
+    if not isinstance(data.get('language'), str) or not data['language']:
+        return 'no "language" name'
+    if not isinstance(data.get('messages'), dict):
+        return 'no "messages" object'
+    return None
+
+
+def load_catalogs(locale_dir=None, skipped=None):
+    # {language name: Catalog} for every usable locales/<code>.json; the
+    # others are appended to `skipped` with the reason
+    locale_dir = locale_dir or LOCALE_DIR
+    catalogs = {}
+    if not os.path.isdir(locale_dir):
+        return catalogs
+    for filename in sorted(os.listdir(locale_dir)):
+        code, ext = os.path.splitext(filename)
+        if ext != '.json':
+            continue
+        try:
+            data = _read_messages(os.path.join(locale_dir, filename))
+            reason = _check(data)
+        except (OSError, ValueError) as error:
+            reason = f'unreadable: {error}'
+        if reason is None and data['language'] in catalogs:
+            reason = f'duplicate language {data["language"]!r}'
+        if reason is not None:
+            if skipped is not None:
+                skipped.append({'file': filename, 'reason': reason})
+            continue
+        try:
+            machine = _read_messages(machine_path(code, locale_dir)) or {}
+        except (OSError, ValueError):
+            machine = {}
+        catalogs[data['language']] = Catalog(code, data['language'], data['messages'], machine.get('messages'))
+    return catalogs
+
+
+def catalogs():
+    global _catalogs
+    if _catalogs is None:
+        with _lock:
+            if _catalogs is None:
+                skipped = []
+                _catalogs = load_catalogs(skipped=skipped)
+                _skipped[:] = skipped
+    return _catalogs
+
+
+def skipped():
+    # Catalog files left out by the last load, with the reason
+    catalogs()
+    return list(_skipped)
+
+
+def reload():
+    global _catalogs
+    with _lock:
+        _catalogs = None
+        _skipped.clear()
+        _missing.clear()
+
+
+def languages():
+    return [SOURCE_LANGUAGE] + sorted(catalogs())
+
+
+def gettext(text, language):
+    if language is None or language == SOURCE_LANGUAGE:
+        return text
+    catalog = catalogs().get(language)
+    if catalog is None:
+        return text
+    translated = catalog.messages.get(text)
+    if translated is not None:
+        return translated
+    with _lock:
+        _missing[(language, text)] += 1
+    return catalog.machine.get(text, text)
+
+
+def missing():
+    # Text looked up without a catalog entry since the last reload, per
+    # language, and whether the machine cache covered it
+    with _lock:
+        counts = list(_missing.items())
+    found = catalogs()
+    return [
+        {'language': language, 'text': text, 'lookups': count, 'machine': text in found[language].machine}
+        for (language, text), count in sorted(counts)
+    ]
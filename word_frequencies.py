@@ -0,0 +1,142 @@
+import collections
+import io
+import re
+import threading
+import uuid
+
+import forum_store
+
+# Streaming token counts and cached word-cloud images.
+#
+# Each message is tokenized and stopword-filtered once, when it is added to a
+# TokenCounter; the counter's version increases with every change. Word
+# clouds are drawn from the frequency table with generate_from_frequencies,
+# and the PNG is cached by (counter, version, size), so an unchanged corpus
+# never re-renders. Unlike WordCloud.generate, bigram collocations are not
+# counted.
+
+MAX_WORDS = 200
+IMAGE_CACHE_SIZE = 64
+
+_TOKEN = re.compile(r"\w[\w']+")
+_stopwords = None
+
+
+def stopwords():
+    global _stopwords
+    if _stopwords is None:
+        from wordcloud import STOPWORDS
+        _stopwords = frozenset(word.lower() for word in STOPWORDS)
+    return _stopwords
+
+
+def tokenize(text):
+    # Same rules as WordCloud.process_text: drop stopwords, trailing "'s"
+    # and pure numbers; tokens are lower-cased
+    words = stopwords()
+    tokens = []
+    for token in _TOKEN.findall(text.lower()):
+        if token.endswith("'s"):
+            token = token[:-2]
+        if len(token) < 2 or token.isdigit() or token in words:
+            continue
+        tokens.append(token)
+    return tokens
+
+
+class TokenCounter:
+    def __init__(self):
+        self.uid = uuid.uuid4().hex
+        self.counts = collections.Counter()
+        self.version = 0
+        self.messages = 0
+        self._lock = threading.Lock()
+
+    def add(self, text):
+        tokens = tokenize(text)
+        with self._lock:
+            self.counts.update(tokens)
+            self.messages += 1
+            self.version += 1
+
+    def add_many(self, texts):
+        counts = collections.Counter()
+        added = 0
+        for text in texts:
+            counts.update(tokenize(text))
+            added += 1
+        if added:
+            with self._lock:
+                self.counts.update(counts)
+                self.messages += added
+                self.version += 1
+
+    def most_common(self, n=MAX_WORDS):
+        with self._lock:
+            return dict(self.counts.most_common(n))
+
+
+class ForumTokenCounter(TokenCounter):
+    # Process-wide counter over the forum store, fed by the posts appended
+    # since the last sync
+    def __init__(self):
+        super().__init__()
+        self.last_id = 0
+        self._sync_lock = threading.Lock()
+
+    def sync(self):
+        with self._sync_lock:
+            texts = []
+            for post in forum_store.iter_new_posts(self.last_id):
+                texts.append(post['content'])
+                self.last_id = post['id']
+            self.add_many(texts)
+        return self
+
+
+_forum_counter = None
+_forum_lock = threading.Lock()
+
+
+def forum_counter():
+    global _forum_counter
+    with _forum_lock:
+        if _forum_counter is None:
+            _forum_counter = ForumTokenCounter()
+    return _forum_counter.sync()
+
+
+_images = collections.OrderedDict()
+_images_lock = threading.Lock()
+
+
+def render_png(frequencies, width=800, height=400, background_color='white', max_words=MAX_WORDS):
+    # Lays out and encodes one word cloud; module-level so it can run in a
+    # worker process
+    from wordcloud import WordCloud
+    image = WordCloud(width=width, height=height, background_color=background_color, max_words=max_words)
+    image.generate_from_frequencies(dict(frequencies))
+    buffer = io.BytesIO()
+    image.to_image().save(buffer, format='PNG')
+    return buffer.getvalue()
+
+
+def wordcloud_png(counter, width=800, height=400, background_color='white', max_words=MAX_WORDS, render=None):
+    # Returns PNG bytes for the counter's word cloud, or None when it is
+    # empty; render(fn, *args) runs the layout elsewhere (e.g. in the job
+    # pool) and defaults to calling it directly
+    key = (counter.uid, counter.version, width, height, background_color, max_words)
+    with _images_lock:
+        if key in _images:
+            _images.move_to_end(key)
+            return _images[key]
+    frequencies = counter.most_common(max_words)
+    if not frequencies:
+        return None
+    args = (tuple(frequencies.items()), width, height, background_color, max_words)
+    png = render(render_png, *args) if render is not None else render_png(*args)
+    with _images_lock:
+        _images[key] = png
+        while len(_images) > IMAGE_CACHE_SIZE:
+            _images.popitem(last=False)
+    return png